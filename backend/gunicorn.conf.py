@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for production serving (python backend/run_backend.py --production)
+Tune with WEB_CONCURRENCY (worker processes) and GUNICORN_THREADS (threads per worker).
+Several workers need CREDENTIALS_KEY to share connections; without it one worker runs.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from credentials import production_workers
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = production_workers()
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Workers don't share memory: several of them go through the SQLite store
+os.environ.setdefault('STATE_STORE', 'sqlite' if workers > 1 else 'memory')
+
+# Odoo fetches and PDF renders can be slow; job event streams send heartbeats well within this
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def worker_exit(server, worker):
+    """Save warm-start cache snapshots when a worker shuts down"""
+    run_backend = sys.modules.get('run_backend')
+    if run_backend is not None:
+        run_backend._save_cache_snapshots()
@@ -5,10 +5,16 @@ Backend server for Odoo Invoice Follow-Up Manager React Application
 
 import os
 import sys
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, request, jsonify, send_from_directory, send_file, Response, stream_with_context
 from flask_cors import CORS
-from datetime import datetime
+from datetime import date, datetime, timezone
+import csv
+import io
 import json
+import time
+import atexit
+import threading
+import base64
 
 # Add parent directory to path to import original app modules
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,6 +40,13 @@ except Exception as e:
 
 CORS(app)
 
+from json_provider import init_json_provider
+from response_compression import init_compression, compress_stream
+from rpc_metrics import init_rpc_metrics, rpc_metrics
+init_json_provider(app)
+init_compression(app)
+init_rpc_metrics(app)
+
 # Import the core functionality with better error handling
 DEMO_MODE = False
 try:
@@ -49,7 +62,7 @@ except ImportError as e:
     class OdooConnector:
         def __init__(self, *args, **kwargs): pass
         def connect(self): return False
-        def get_overdue_invoices(self, callback=None): return []
+        def get_overdue_invoices(self, *args, **kwargs): return []
     
     class InvoicePDFGenerator:
         def __init__(self, *args, **kwargs): pass
@@ -71,34 +84,460 @@ except ImportError as e:
     
     thread_manager = ThreadManager()
 
-# Store active connections
-active_connections = {}
+from job_manager import job_manager
+from single_flight import single_flight
+from invoice_index import build_invoice_index, compute_dataset_version, apply_invoice_changes, get_aging_bucket, AGING_BUCKETS
+from invoice_snapshots import SnapshotHistory
+from state_store import create_state_store
+from connection_registry import create_connection_registry, estimate_invoices_size
+from background_refresher import create_background_refresher, create_snapshot_scheduler
+from cache_snapshots import create_snapshot_store
+from report_cache import create_report_cache
+from overdue_history import create_overdue_history, history_source
+from priority_scoring import PriorityScorer
+from config_manager import get_config_manager
+from credentials import create_credentials_cipher
 
-@app.route('/api/odoo/connect', methods=['POST'])
-def connect_odoo():
-    """Connect to Odoo and fetch overdue invoices"""
-    try:
-        data = request.json
-        url = data.get('url')
-        database = data.get('database')
-        username = data.get('username')
-        password = data.get('password')
-        
-        if not all([url, database, username, password]):
-            return jsonify({'error': 'Missing required connection parameters'}), 400
-        
-        # Create Odoo connector
-        connector = OdooConnector(url, database, username, password)
-        
+# Connection metadata, invoice caches and background jobs shared by every worker
+state_store = create_state_store()
+job_manager.use_store(state_store)
+
+# On-disk warm-start snapshots of each connection's caches (survive restarts and deploys)
+cache_snapshots = create_snapshot_store()
+
+# Generated daily reports (summary, CSV, PDF) reused by test sends and the scheduled send
+report_cache = create_report_cache()
+
+# Daily columnar snapshots of each Odoo database's overdue invoices (trend and history charts)
+overdue_history = create_overdue_history()
+
+def _shared_cache_keys(connection_id):
+    """State store keys holding a connection's cached dataset"""
+    return (f"invoices:{connection_id}", f"dataset_version:{connection_id}", f"fetched_at:{connection_id}")
+
+def _close_evicted_connection(connection_id, connection, reason):
+    """Release an evicted connector's HTTP pool (and its shared state when this worker owns it)"""
+    connector = connection.get('connector')
+    if connector is not None and getattr(connector, 'session', None) is not None:
+        connector.session.close()
+    single_flight.forget((connection_id,))
+    if state_store.name == 'memory':
+        # A single in-process store is only reachable through this worker, whatever the reason
+        for key in (f"connection:{connection_id}",) + _shared_cache_keys(connection_id):
+            state_store.delete(key)
+
+def _shed_cached_dataset(connection_id, connection):
+    """A connection's cache was dropped for the memory budget: don't reload it until it is needed
+    
+    The in-process store's compressed copy counts toward the same budget, so it goes too.
+    """
+    connection['cache_shed'] = True
+    if state_store.name == 'memory':
+        for key in _shared_cache_keys(connection_id):
+            state_store.delete(key)
+
+# Worker-local connections (connector + indexed invoice cache), rehydrated from state_store
+active_connections = create_connection_registry(on_evict=_close_evicted_connection,
+                                                on_cache_drop=_shed_cached_dataset)
+
+# Encrypts Odoo passwords published to the shared store (CREDENTIALS_KEY). Without it a
+# password never leaves the worker that received it, and gunicorn runs a single worker.
+_credentials_cipher = create_credentials_cipher()
+if _credentials_cipher is not None:
+    print("🔐 Odoo passwords are shared between workers encrypted with CREDENTIALS_KEY")
+
+def _connection_fields(details):
+    """Non-secret connection details (what snapshots and the shared store may hold)"""
+    return {key: details.get(key) for key in ('url', 'database', 'username')}
+
+def _save_connection_details(connection_id, details):
+    """Publish connection metadata so other workers can rehydrate the connector
+    
+    The password is included only when it stays in this process (memory store) or
+    can be encrypted with CREDENTIALS_KEY.
+    """
+    stored_details = _connection_fields(details)
+    password = details.get('password') or ''
+    if state_store.name == 'memory':
+        stored_details['password'] = password
+    elif _credentials_cipher is not None:
+        stored_details['encryptedPassword'] = _credentials_cipher.encrypt(password.encode('utf-8')).decode('ascii')
+    state_store.set_json(f"connection:{connection_id}", stored_details)
+
+def _stored_password(stored_details):
+    """Password of published connection details, or None if this worker can't recover it"""
+    if 'password' in stored_details:
+        return stored_details['password']
+    token = stored_details.get('encryptedPassword')
+    if token and _credentials_cipher is not None:
+        try:
+            return _credentials_cipher.decrypt(token.encode('ascii')).decode('utf-8')
+        except Exception as e:
+            print(f"⚠️ Could not decrypt shared connection password: {e}")
+    return None
+
+def _known_connection_ids():
+    """Connection ids known to any worker"""
+    stored_ids = [key[len('connection:'):] for key in state_store.keys('connection:')]
+    return sorted(set(stored_ids) | set(active_connections.keys()) | set(cache_snapshots.connection_ids()))
+
+def _resolve_connection_id(connection_id):
+    """Known connection id for a possibly differently formatted id sent by the frontend"""
+    if _get_connection(connection_id):
+        return connection_id
+    return active_connections.resolve(connection_id)
+
+def _get_connection(connection_id):
+    """Worker-local connection entry, rehydrated lazily from the shared state store
+    
+    Returns None if no worker knows this connection. If another worker published a newer
+    invoice cache, it is loaded and re-indexed here.
+    """
+    if not connection_id:
+        return None
+    
+    connection = active_connections.get(connection_id)
+    if connection is None:
+        stored_details = state_store.get_json(f"connection:{connection_id}")
+        password = _stored_password(stored_details) if stored_details else None
+        if not password:
+            return None
+        
+        details = dict(_connection_fields(stored_details), password=password)
+        connector = OdooConnector(details['url'], details['database'], details['username'], details['password'])
         if not connector.connect():
-            return jsonify({'error': 'Failed to connect to Odoo'}), 401
-        
-        # Fetch overdue invoices with progress callback
-        def progress_callback(message, progress):
-            print(f"📊 {message} ({progress:.1f}%)")
-        
+            print(f"⚠️ Could not re-authenticate rehydrated connection {connection_id}, will retry on first fetch")
+        connection = {'connector': connector, 'connection_details': details}
+        active_connections[connection_id] = connection
+        print(f"💧 Rehydrated connection {connection_id} in worker {os.getpid()}")
+    
+    local_index = connection.get('invoice_index')
+    if local_index is not None or not connection.get('cache_shed'):
+        # A cache just dropped for the memory budget is only reloaded on demand (_get_invoice_index)
+        _load_shared_invoices(connection_id, connection)
+    
+    return connection
+
+def _load_shared_invoices(connection_id, connection):
+    """Load and index the shared invoice cache if it is newer than the worker's. Returns the index or None."""
+    stored_version = state_store.get_json(f"dataset_version:{connection_id}")
+    local_index = connection.get('invoice_index')
+    if not stored_version or (local_index is not None and local_index.version == stored_version):
+        return None
+    invoices = state_store.get_json(f"invoices:{connection_id}")
+    if invoices is None:
+        return None
+    invoice_index = _index_invoices(connection, invoices, state_store.get_json(f"fetched_at:{connection_id}"))
+    active_connections.set_cache_size(connection_id, _cached_dataset_size(connection_id, invoices))
+    print(f"💧 Loaded {len(invoices)} shared cached invoices for {connection_id} (version {stored_version})")
+    return invoice_index
+
+def _cached_dataset_size(connection_id, invoices):
+    """Memory held for a connection's dataset: the index, plus the compressed copy in an in-process store"""
+    size = estimate_invoices_size(invoices)
+    if state_store.name == 'memory':
+        size += len(state_store.get(f"invoices:{connection_id}") or b'')
+    return size
+
+def _restore_snapshot(connection_id, connection):
+    """Seed a newly connected connection's cache from its warm-start snapshot
+    
+    Snapshots hold no credentials, so they are only used once the user has connected
+    again. Returns the invoice index, or None if there is no matching snapshot.
+    """
+    snapshot = cache_snapshots.load(connection_id)
+    if not snapshot or snapshot['connectionDetails'] != _connection_fields(connection['connection_details']):
+        return None
+    
+    invoices = snapshot['invoices']
+    connection['connector'].import_reference_caches(snapshot.get('referenceCaches', {}))
+    invoice_index = _index_invoices(connection, invoices, snapshot['fetchedAt'])
+    state_store.set_json(f"invoices:{connection_id}", invoices, compress=True)
+    state_store.set_json(f"fetched_at:{connection_id}", snapshot['fetchedAt'])
+    state_store.set_json(f"dataset_version:{connection_id}", invoice_index.version)
+    active_connections.set_cache_size(connection_id, _cached_dataset_size(connection_id, invoices))
+    print(f"🔥 Warm start: restored {len(invoices)} invoices for {connection_id} from snapshot")
+    return invoice_index
+
+def _snapshot_connection(connection_id):
+    """Write a connection's caches to its warm-start snapshot. Returns True if one was written."""
+    connection = active_connections.peek(connection_id)
+    if connection is None or connection.get('invoice_index') is None:
+        return False
+    
+    invoice_index = connection['invoice_index']
+    snapshot_key = (invoice_index.version, connection.get('fetched_at'))
+    if connection.get('snapshot_key') == snapshot_key:
+        return False  # Unchanged since the last snapshot
+    
+    details = connection['connection_details']
+    size = cache_snapshots.save(connection_id, {
+        'connectionDetails': _connection_fields(details),
+        'fetchedAt': connection.get('fetched_at'),
+        'invoices': invoice_index.invoices,
+        'referenceCaches': connection['connector'].export_reference_caches()
+    })
+    connection['snapshot_key'] = snapshot_key
+    print(f"💾 Saved cache snapshot for {connection_id} ({len(invoice_index)} invoices, {size // 1024} KB)")
+    return True
+
+def _save_cache_snapshots():
+    """Snapshot every connection with a changed cache (scheduled, and at shutdown)"""
+    for connection_id in active_connections.keys():
+        try:
+            _snapshot_connection(connection_id)
+        except Exception as e:
+            print(f"⚠️ Could not save cache snapshot for {connection_id}: {e}")
+
+def _forget_connection(connection_id):
+    """Remove a connection from this worker and from the shared store"""
+    active_connections.pop(connection_id, None)
+    for key in (f"connection:{connection_id}",) + _shared_cache_keys(connection_id):
+        state_store.delete(key)
+    cache_snapshots.delete(connection_id)
+
+def _print_progress(prefix):
+    """Build a progress callback that only logs to stdout"""
+    def progress_callback(message, progress):
+        print(f"📊 {prefix}{message} ({progress:.1f}%)")
+    return progress_callback
+
+def _fetch_overdue_invoices(connection_id, connector, progress_callback=None, raise_errors=False):
+    """Fetch non-zero overdue invoices, sharing one Odoo fetch between concurrent callers
+    
+    With raise_errors, a failed fetch raises instead of returning [] (see _background_refresh).
+    """
+    def fetch():
+        invoices = connector.get_overdue_invoices(progress_callback, raise_errors=raise_errors)
+        # Filter out zero-amount invoices (additional safety)
+        return [inv for inv in invoices if inv['amount_due'] > 0 and inv['amount_total'] > 0]
+    
+    return single_flight.do((connection_id, 'overdue_invoices', raise_errors), fetch)
+
+def _index_invoices(connection, invoices, fetched_at=None):
+    """Set a connection entry's invoice cache and index (worker-local)"""
+    invoice_index = build_invoice_index(invoices)
+    connection['cached_invoices'] = invoices
+    connection['invoice_index'] = invoice_index
+    connection['fetched_at'] = fetched_at or time.time()
+    connection.pop('cache_shed', None)
+    connection.setdefault('snapshot_history', SnapshotHistory()).record(invoice_index)
+    return invoice_index
+
+def _store_invoices(connection_id, invoices):
+    """Cache a fresh invoice list for a connection and publish it to the other workers"""
+    connection = active_connections.peek(connection_id)
+    invoice_index = _index_invoices(connection, invoices)
+    state_store.set_json(f"invoices:{connection_id}", invoices, compress=True)
+    state_store.set_json(f"fetched_at:{connection_id}", connection['fetched_at'])
+    state_store.set_json(f"dataset_version:{connection_id}", invoice_index.version)
+    active_connections.set_cache_size(connection_id, _cached_dataset_size(connection_id, invoices))
+    _record_history(connection_id, connection['connector'])
+    return invoice_index
+
+# Databases (history sources) with an overdue history snapshot being written, and the
+# day each one last got its snapshot in this worker
+_history_writes = set()
+_history_days = {}
+_history_writes_lock = threading.Lock()
+
+def _record_history(connection_id, connector):
+    """Save today's overdue snapshot of the connection's database in a background thread
+    
+    The snapshot comes from Odoo's full invoice rows (overdue_history.record_from_odoo), not
+    from the cached list, whose fetch is capped. That is a second read of the ledger, so it
+    happens at most once per database and day; later refreshes of the day skip it.
+    """
+    source = history_source(connector.url, connector.database)
+    today = date.today().isoformat()
+    with _history_writes_lock:
+        if source in _history_writes or _history_days.get(source) == today:
+            return
+        _history_writes.add(source)
+    
+    def write():
+        try:
+            # Another worker (or the daily report) may have written today's snapshot already
+            if not overdue_history.has_snapshot(source, today):
+                overdue_history.record_from_odoo(connector)
+            with _history_writes_lock:
+                _history_days[source] = today
+        except Exception as e:
+            print(f"⚠️ Could not save overdue history snapshot for {connection_id}: {e}")
+        finally:
+            with _history_writes_lock:
+                _history_writes.discard(source)
+    
+    threading.Thread(target=write, name=f"history-{source}", daemon=True).start()
+
+def _freshness(connection):
+    """When the cached dataset was fetched from Odoo and how old it is"""
+    fetched_at = connection.get('fetched_at')
+    if not fetched_at:
+        return {'fetchedAt': None, 'staleSeconds': None}
+    return {
+        'fetchedAt': datetime.fromtimestamp(fetched_at, timezone.utc).isoformat(),
+        'staleSeconds': int(time.time() - fetched_at)
+    }
+
+def _odoo_timestamp(epoch_seconds):
+    """Odoo write_date format (UTC)"""
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+# Incremental fetches look back this far before the last fetch (clock skew, slow fetches)
+INCREMENTAL_OVERLAP_SECONDS = 300
+# Every Nth background refresh is a full fetch (partner emails/names aren't covered by write_date)
+FULL_REFRESH_EVERY = int(os.environ.get('FULL_REFRESH_EVERY', 6))
+
+def _background_refresh(connection_id):
+    """Refresh one connection's cache in the background. Returns True if the cache changed."""
+    connection = active_connections.peek(connection_id)
+    if connection is None or connection.get('invoice_index') is None:
+        return False  # Evicted, or cache dropped under memory pressure: reload on next read
+    
+    stored_fetched_at = state_store.get_json(f"fetched_at:{connection_id}")
+    if stored_fetched_at and time.time() - stored_fetched_at < background_refresher.interval_seconds / 2:
+        return False  # Another worker refreshed it recently; picked up on next read
+    
+    connector = connection['connector']
+    invoice_index = connection['invoice_index']
+    incremental_count = connection.get('incremental_refreshes', 0)
+    
+    if connection.get('fetched_at') and incremental_count < FULL_REFRESH_EVERY:
+        modified_since = _odoo_timestamp(connection['fetched_at'] - INCREMENTAL_OVERLAP_SECONDS)
+        fetch_started = time.time()
+        changed_invoices = connector.get_overdue_invoices(modified_since=modified_since, raise_errors=True)
+        invoices = apply_invoice_changes(invoice_index.invoices, changed_invoices)
+        connection['incremental_refreshes'] = incremental_count + 1
+        
+        if len(invoices) == len(invoice_index.invoices) and all(a is b for a, b in zip(invoices, invoice_index.invoices)):
+            connection['fetched_at'] = fetch_started
+            state_store.set_json(f"fetched_at:{connection_id}", fetch_started)
+            return False
+        print(f"🔁 Incremental refresh for {connection_id}: {len(changed_invoices)} changed invoices since {modified_since}")
+    else:
+        # Raises on Odoo errors: the refresher logs it and the stale cache and version stay
+        invoices = _fetch_overdue_invoices(connection_id, connector, raise_errors=True)
+        connection['incremental_refreshes'] = 0
+        print(f"🔁 Full refresh for {connection_id}: {len(invoices)} invoices")
+    
+    return _store_invoices(connection_id, invoices).version != invoice_index.version
+
+background_refresher = create_background_refresher(_background_refresh, lambda: active_connections.keys())
+background_refresher.start()
+
+snapshot_scheduler = create_snapshot_scheduler(_snapshot_connection, lambda: active_connections.keys())
+snapshot_scheduler.start()
+atexit.register(_save_cache_snapshots)
+
+def _get_invoice_index(connection_id, progress_callback=None):
+    """Return the connection's cached invoice index, fetching invoices once if the cache is empty"""
+    connection = _get_connection(connection_id)
+    invoice_index = connection.get('invoice_index')
+    if invoice_index is None:
+        invoice_index = _load_shared_invoices(connection_id, connection)
+    if invoice_index is None:
+        print(f"📊 No cached invoices for {connection_id}, fetching from Odoo...")
+        invoices = _fetch_overdue_invoices(connection_id, connection['connector'], progress_callback)
+        invoice_index = _store_invoices(connection_id, invoices)
+    return invoice_index
+
+def _dataset_payload(connection_id, invoice_index, data):
+    """Summary response for a connection's cached dataset
+    
+    With sinceVersion, only the invoices added/updated/removed since that version are
+    sent (full rows if that version is no longer retained). Full rows are otherwise
+    only sent when includeInvoices is set.
+    """
+    connection = active_connections[connection_id]
+    payload = {
+        'success': True,
+        'connectionId': connection_id,
+        'datasetVersion': invoice_index.version,
+        'summary': invoice_index.get_summary(),
+        **_freshness(connection)
+    }
+    
+    since_version = data.get('sinceVersion')
+    if since_version:
+        delta = connection['snapshot_history'].delta_since(since_version, invoice_index)
+        if delta is not None:
+            payload['delta'] = True
+            payload.update(delta)
+            print(f"📦 Delta since {since_version}: {len(delta['added'])} added, {len(delta['updated'])} updated, {len(delta['removed'])} removed")
+            return payload
+        print(f"📦 Version {since_version} no longer retained, sending full payload")
+        payload['delta'] = False
+    
+    # Legacy full payload for clients that still sort and filter in the browser
+    if data.get('includeInvoices') or since_version:
+        payload['overdueInvoices'] = invoice_index.invoices
+        payload['clientsMissingEmail'] = [inv for inv in invoice_index.invoices if not inv['client_email']]
+    
+    return payload
+
+def _dataset_etag(payload):
+    """ETag for a dataset response; summary, full and delta shapes are different representations"""
+    if payload.get('delta'):
+        shape = f"delta-{payload['baseVersion']}"
+    else:
+        shape = 'full' if 'overdueInvoices' in payload else 'summary'
+    return f"{payload['datasetVersion']}-{shape}"
+
+def _versioned_json(payload, etag):
+    """JSON response carrying a weak ETag, or an empty 304 when the client already has this version"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate, but reuse on 304
+    return response
+
+def _encode_cursor(offset, version):
+    """Opaque pagination cursor bound to a dataset version"""
+    raw = json.dumps({'offset': offset, 'version': version}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def _decode_cursor(cursor):
+    """Decode a pagination cursor into (offset, version)"""
+    decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return int(decoded['offset']), decoded['version']
+
+def _connect_and_fetch(data, progress_callback):
+    """Connect to Odoo, fetch overdue invoices and cache them. Returns (payload, status)."""
+    url = data.get('url')
+    database = data.get('database')
+    username = data.get('username')
+    password = data.get('password')
+    
+    if not all([url, database, username, password]):
+        return {'error': 'Missing required connection parameters'}, 400
+    
+    # Create Odoo connector
+    connector = OdooConnector(url, database, username, password)
+    
+    progress_callback("Authenticating with Odoo...", 0)
+    if not connector.connect():
+        return {'error': 'Failed to connect to Odoo'}, 401
+    
+    connection_id = f"{username}_{database}"
+    
+    # Store connection for later use
+    connection = {
+        'connector': connector,
+        'connection_details': data
+    }
+    active_connections[connection_id] = connection
+    _save_connection_details(connection_id, data)
+    
+    invoice_index = _restore_snapshot(connection_id, connection)
+    if invoice_index is not None:
+        # Serve the snapshot now, bring it up to date in the background
+        background_refresher.revalidate(connection_id)
+    else:
         print("🚀 Starting optimized invoice fetch...")
-        invoices = connector.get_overdue_invoices(progress_callback)
+        invoices = _fetch_overdue_invoices(connection_id, connector, progress_callback)
         
         # Debug: Check first few invoices for currency data
         if invoices:
@@ -106,30 +545,48 @@ def connect_odoo():
             print(f"✅ Currency symbols found: {[inv.get('currency_symbol', 'N/A') for inv in invoices[:5]]}")
             print(f"✅ Company names found: {[inv.get('company_name', 'N/A') for inv in invoices[:5]]}")
         
-        # Filter out zero-amount invoices (additional safety)
-        invoices = [inv for inv in invoices if inv['amount_due'] > 0 and inv['amount_total'] > 0]
-        
-        # Check for clients missing email
-        clients_missing_email = [inv for inv in invoices if not inv['client_email']]
-        
-        # Store connection for later use
-        connection_id = f"{username}_{database}"
-        active_connections[connection_id] = {
-            'connector': connector,
-            'connection_details': data,
-            'cached_invoices': invoices  # Cache the invoices during initial connection
-        }
-        
-        print(f"Connected to Odoo: {database} ({len(invoices)} invoices)")
-        print(f"🔍 Debug: Cached {len(invoices)} invoices for connection {connection_id}")
-        print(f"🔍 Debug: Connection data keys: {list(active_connections[connection_id].keys())}")
-        
-        return jsonify({
-            'success': True,
-            'overdueInvoices': invoices,
-            'clientsMissingEmail': clients_missing_email,
-            'connectionId': connection_id
-        })
+        invoice_index = _store_invoices(connection_id, invoices)  # Cache the invoices during initial connection
+    
+    print(f"Connected to Odoo: {database} ({len(invoice_index)} invoices)")
+    print(f"🔍 Debug: Cached {len(invoice_index)} invoices for connection {connection_id}")
+    print(f"🔍 Debug: Connection data keys: {list(active_connections[connection_id].keys())}")
+    
+    return _dataset_payload(connection_id, invoice_index, data), 200
+
+def _refresh_connection(data, progress_callback):
+    """Re-fetch overdue invoices for an existing connection. Returns (payload, status)."""
+    connection_id = data.get('connectionId')
+    connection = _get_connection(connection_id)
+    
+    if not connection:
+        return {'error': 'Connection not found'}, 404
+    
+    connector = connection['connector']
+    
+    print("🔄 Starting optimized refresh...")
+    try:
+        invoices = _fetch_overdue_invoices(connection_id, connector, progress_callback, raise_errors=True)
+    except Exception as e:
+        # A failed fetch must not publish [] as a new dataset; the cached one stays current
+        print(f"❌ Refresh failed for {connection_id}, keeping cached invoices: {str(e)}")
+        return {'error': f'Failed to refresh invoices from Odoo: {str(e)}'}, 502
+    
+    # Update the cache with fresh data
+    invoice_index = _store_invoices(connection_id, invoices)
+    
+    print(f"Refreshed invoices: {len(invoices)} found")
+    
+    return _dataset_payload(connection_id, invoice_index, data), 200
+
+@app.route('/api/odoo/connect', methods=['POST'])
+def connect_odoo():
+    """Connect to Odoo and fetch overdue invoices"""
+    try:
+        data = request.json
+        payload, status = _connect_and_fetch(data, _print_progress(""))
+        if status != 200:
+            return jsonify(payload), status
+        return _versioned_json(payload, _dataset_etag(payload))
         
     except Exception as e:
         print(f"❌ Connection error: {str(e)}")
@@ -140,279 +597,497 @@ def refresh_invoices():
     """Refresh overdue invoices data"""
     try:
         data = request.json
-        connection_id = data.get('connectionId')
-        
-        if connection_id not in active_connections:
-            return jsonify({'error': 'Connection not found'}), 404
-        
-        connector = active_connections[connection_id]['connector']
-        
-        # Use optimized invoice fetching with progress callback
-        def progress_callback(message, progress):
-            print(f"📊 Refresh: {message} ({progress:.1f}%)")
-        
-        print("🔄 Starting optimized refresh...")
-        invoices = connector.get_overdue_invoices(progress_callback)
-        
-        # Filter out zero-amount invoices (additional safety)
-        invoices = [inv for inv in invoices if inv['amount_due'] > 0 and inv['amount_total'] > 0]
-        
-        # Update the cache with fresh data
-        active_connections[connection_id]['cached_invoices'] = invoices
-        
-        clients_missing_email = [inv for inv in invoices if not inv['client_email']]
-        
-        print(f"Refreshed invoices: {len(invoices)} found")
-        
-        return jsonify({
-            'success': True,
-            'overdueInvoices': invoices,
-            'clientsMissingEmail': clients_missing_email
-        })
+        payload, status = _refresh_connection(data, _print_progress("Refresh: "))
+        if status != 200:
+            return jsonify(payload), status
+        return _versioned_json(payload, _dataset_etag(payload))
         
     except Exception as e:
         print(f"❌ Refresh error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/email/send', methods=['POST'])
-def send_bulk_emails():
-    """Send bulk emails to selected clients"""
-    try:
-        data = request.json
-        connection_id = data.get('connectionId')
-        selected_clients = data.get('selectedClients', [])
-        email_config = data.get('emailConfigs', {})  # Changed from emailConfig to emailConfigs
-        
-        print(f"🔍 Debug: Received connection_id: '{connection_id}'")
-        print(f"🔍 Debug: Active connections: {list(active_connections.keys())}")
-        
-        # Handle different connection ID formats
-        if connection_id not in active_connections:
-            # Try to find a matching connection by checking if the connection_id contains any of the stored keys
-            matching_connection = None
-            for stored_connection_id in active_connections.keys():
-                if connection_id in stored_connection_id or stored_connection_id in connection_id:
-                    matching_connection = stored_connection_id
-                    break
-            
-            if matching_connection:
-                print(f"🔍 Debug: Found matching connection: {matching_connection}")
-                connection_id = matching_connection
-            else:
-                print(f"❌ Error: Connection not found. Available connections: {list(active_connections.keys())}")
-                return jsonify({'error': 'Connection not found. Please reconnect to Odoo.'}), 404
+def _send_bulk_emails(data, progress_callback):
+    """Send follow-up emails to the selected clients. Returns (payload, status)."""
+    connection_id = data.get('connectionId')
+    selected_clients = data.get('selectedClients', [])
+    email_config = data.get('emailConfigs', {})  # Changed from emailConfig to emailConfigs
+    
+    print(f"🔍 Debug: Received connection_id: '{connection_id}'")
+    print(f"🔍 Debug: Active connections: {_known_connection_ids()}")
+    
+    # Handle different connection ID formats
+    matching_connection = _resolve_connection_id(connection_id)
+    if not matching_connection:
+        print(f"❌ Error: Connection not found. Available connections: {_known_connection_ids()}")
+        return {'error': 'Connection not found. Please reconnect to Odoo.'}, 404
+    if matching_connection != connection_id:
+        print(f"🔍 Debug: Found matching connection: {matching_connection}")
+        connection_id = matching_connection
+    
+    if not selected_clients:
+        return {'error': 'No clients selected'}, 400
+    
+    connection = _get_connection(connection_id)
+    connector = connection['connector']
+    
+    # Use invoice data sent from frontend (dashboard data) instead of fetching from Odoo
+    invoice_data = data.get('invoiceData', [])
+    
+    if invoice_data:
+        print(f"📊 Using invoice data from frontend ({len(invoice_data)} invoices)")
+        invoice_index = build_invoice_index(invoice_data)
+    else:
+        # Fallback to cached data if frontend doesn't send invoice data
+        print(f"🔍 Debug: No invoice data from frontend, checking cache for connection {connection_id}")
+        print(f"🔍 Debug: Connection data keys: {list(connection.keys())}")
+        print(f"🔍 Debug: Has cached_invoices: {'cached_invoices' in connection}")
+        
+        invoice_index = connection.get('invoice_index')
+        if invoice_index is None:
+            print(f"📊 Fetching invoice data from Odoo...")
+            try:
+                # Add a timeout for the Odoo API call
+                import threading
+                import queue
+                
+                result_queue = queue.Queue()
+                
+                def fetch_invoices():
+                    try:
+                        invoices = connector.get_overdue_invoices()
+                        result_queue.put(('success', invoices))
+                    except Exception as e:
+                        result_queue.put(('error', str(e)))
+                
+                # Start the fetch in a separate thread
+                fetch_thread = threading.Thread(target=fetch_invoices)
+                fetch_thread.daemon = True
+                fetch_thread.start()
+                
+                # Wait for result with timeout (30 seconds)
+                try:
+                    result_type, result_data = result_queue.get(timeout=30)
+                    if result_type == 'error':
+                        raise Exception(f"Odoo API error: {result_data}")
+                    invoices = result_data
+                except queue.Empty:
+                    raise Exception("Odoo API timeout - request took too long")
+                
+                # Filter out zero-amount invoices
+                invoices = [inv for inv in invoices if inv['amount_due'] > 0 and inv['amount_total'] > 0]
+                # Cache the invoice data
+                invoice_index = _store_invoices(connection_id, invoices)
+                print(f"📊 Cached {len(invoices)} invoices")
+            except Exception as e:
+                print(f"❌ Error fetching invoices: {str(e)}")
+                raise Exception(f"Failed to fetch invoice data: {str(e)}")
+        else:
+            print(f"📊 Using cached invoice data ({len(invoice_index)} invoices)")
+            print(f"🔍 Debug: Cache hit! Using {len(invoice_index)} cached invoices")
+    
+    # Invoices grouped by client (built once per fetch by the invoice index)
+    client_invoices = invoice_index.by_client
+    
+    successful_sends = 0
+    failed_sends = 0
+    failed_clients = []
+    
+    # Get global email configuration
+    global_config = data.get('globalEmailConfig', {})
+    print(f"🔍 Debug: Global email config: {global_config}")
+    
+    print(f"📧 Sending emails to {len(selected_clients)} clients...")
+    print(f"🔍 Debug: Received email config keys: {list(email_config.keys())}")
+    for client_name in selected_clients:
+        if client_name in email_config:
+            print(f"🔍 Debug: Email config for '{client_name}': {email_config[client_name]}")
+        else:
+            print(f"🔍 Debug: No email config found for '{client_name}'")
+    
+    for index, client_name in enumerate(selected_clients):
+        progress_callback(f"Sending email {index + 1}/{len(selected_clients)}: {client_name}", index / len(selected_clients) * 100)
         
-        if not selected_clients:
-            return jsonify({'error': 'No clients selected'}), 400
+        if client_name not in client_invoices:
+            failed_sends += 1
+            failed_clients.append(f"{client_name} (no invoices)")
+            print(f"❌ No invoices found for client: {client_name}")
+            continue
         
-        connector = active_connections[connection_id]['connector']
+        client_invoices_list = client_invoices[client_name]
+        client_email = client_invoices_list[0]['client_email']
         
-        # Use invoice data sent from frontend (dashboard data) instead of fetching from Odoo
-        invoice_data = data.get('invoiceData', [])
+        # Check if frontend provided a custom email address for this client
+        client_email_config = email_config.get(client_name, {})
+        print(f"🔍 Debug: Email config for '{client_name}': {client_email_config}")
         
-        if invoice_data:
-            print(f"📊 Using invoice data from frontend ({len(invoice_data)} invoices)")
-            invoices = invoice_data
+        if client_email_config.get('recipientEmail'):
+            client_email = client_email_config['recipientEmail']
+            print(f"🔍 Using frontend-provided email for '{client_name}': '{client_email}'")
         else:
-            # Fallback to cached data if frontend doesn't send invoice data
-            print(f"🔍 Debug: No invoice data from frontend, checking cache for connection {connection_id}")
-            print(f"🔍 Debug: Connection data keys: {list(active_connections[connection_id].keys())}")
-            print(f"🔍 Debug: Has cached_invoices: {'cached_invoices' in active_connections[connection_id]}")
+            print(f"🔍 Using invoice email for '{client_name}': '{client_email}' (type: {type(client_email)})")
+            print(f"🔍 Debug: Invoice data for '{client_name}': {client_invoices_list[0]}")
+        
+        if not client_email or client_email.strip() == '':
+            failed_sends += 1
+            failed_clients.append(f"{client_name} (no email)")
+            print(f"❌ No email found for client: {client_name}")
+            continue
+        
+        try:
+            # Get email configuration for this client
+            client_email_config = email_config.get(client_name, {})
+            
+            # Use custom subject/body if provided, otherwise generate template
+            if client_email_config.get('subject') and client_email_config.get('body'):
+                subject = client_email_config['subject']
+                body = client_email_config['body']
+            else:
+                # Generate email template
+                max_days = invoice_index.get_client_summary(client_name)['maxDays']
+                template_result = generate_email_template(
+                    client_name, 
+                    client_invoices_list, 
+                    max_days, 
+                    email_config.get('template', 'initial')
+                )
+                subject = template_result['subject']
+                body = template_result['body']
+            
+            # Prepare attachments
+            attachments = []
+            
+            # Add automatic IBAN letter if applicable
+            # Get company name from the first invoice for this client
+            company_name = client_invoices_list[0].get('company_name', 'Unknown Company')
+            print(f"🔍 Debug: Company name for {client_name}: '{company_name}'")
             
-            if 'cached_invoices' not in active_connections[connection_id]:
-                print(f"📊 Fetching invoice data from Odoo...")
+            iban_attachment = get_automatic_iban_attachment(company_name)
+            if iban_attachment:
+                attachments.append(iban_attachment)
+                print(f"📎 Added IBAN letter attachment for company: {company_name}")
+            else:
+                print(f"📎 No IBAN letter found for company: {company_name}")
+            
+            # Generate and attach invoice PDF if enabled
+            if global_config.get('enablePdfAttachment', True):
                 try:
-                    # Add a timeout for the Odoo API call
-                    import threading
-                    import queue
+                    print(f"📄 Generating invoice PDF for {client_name}...")
                     
-                    result_queue = queue.Queue()
+                    # Create PDF generator instance
+                    pdf_generator = InvoicePDFGenerator(connector)
                     
-                    def fetch_invoices():
-                        try:
-                            invoices = connector.get_overdue_invoices()
-                            result_queue.put(('success', invoices))
-                        except Exception as e:
-                            result_queue.put(('error', str(e)))
+                    # Get partner ID from the first invoice
+                    partner_id = client_invoices_list[0].get('partner_id', client_name)
                     
-                    # Start the fetch in a separate thread
-                    fetch_thread = threading.Thread(target=fetch_invoices)
-                    fetch_thread.daemon = True
-                    fetch_thread.start()
+                    # Generate PDF with progress callback
+                    def pdf_progress_callback(message, progress):
+                        print(f"📄 PDF Progress for {client_name}: {message} ({progress:.1f}%)")
                     
-                    # Wait for result with timeout (30 seconds)
-                    try:
-                        result_type, result_data = result_queue.get(timeout=30)
-                        if result_type == 'error':
-                            raise Exception(f"Odoo API error: {result_data}")
-                        invoices = result_data
-                    except queue.Empty:
-                        raise Exception("Odoo API timeout - request took too long")
+                    pdf_data = pdf_generator.generate_client_invoices_pdf(
+                        client_name, 
+                        partner_id, 
+                        pdf_progress_callback
+                    )
                     
-                    # Filter out zero-amount invoices
-                    invoices = [inv for inv in invoices if inv['amount_due'] > 0 and inv['amount_total'] > 0]
-                    # Cache the invoice data
-                    active_connections[connection_id]['cached_invoices'] = invoices
-                    print(f"📊 Cached {len(invoices)} invoices")
+                    if pdf_data:
+                        # Create a file-like object for the PDF
+                        import io
+                        pdf_file = io.BytesIO(pdf_data)
+                        pdf_file.name = f"Invoices_{client_name.replace(' ', '_')}.pdf"
+                        attachments.append(pdf_file)
+                        print(f"✅ Successfully generated and attached invoice PDF for {client_name} ({len(pdf_data)} bytes)")
+                    else:
+                        print(f"⚠️ Failed to generate invoice PDF for {client_name}")
                 except Exception as e:
-                    print(f"❌ Error fetching invoices: {str(e)}")
-                    raise Exception(f"Failed to fetch invoice data: {str(e)}")
-            else:
-                invoices = active_connections[connection_id]['cached_invoices']
-                print(f"📊 Using cached invoice data ({len(invoices)} invoices)")
-                print(f"🔍 Debug: Cache hit! Using {len(invoices)} cached invoices")
-        
-        # Group invoices by client
-        client_invoices = {}
-        for invoice in invoices:
-            if invoice['client_name'] not in client_invoices:
-                client_invoices[invoice['client_name']] = []
-            client_invoices[invoice['client_name']].append(invoice)
-        
-        successful_sends = 0
-        failed_sends = 0
-        failed_clients = []
-        
-        # Get global email configuration
-        global_config = data.get('globalEmailConfig', {})
-        print(f"🔍 Debug: Global email config: {global_config}")
-        
-        print(f"📧 Sending emails to {len(selected_clients)} clients...")
-        print(f"🔍 Debug: Received email config keys: {list(email_config.keys())}")
-        for client_name in selected_clients:
-            if client_name in email_config:
-                print(f"🔍 Debug: Email config for '{client_name}': {email_config[client_name]}")
-            else:
-                print(f"🔍 Debug: No email config found for '{client_name}'")
-        
-        for client_name in selected_clients:
-            if client_name not in client_invoices:
-                failed_sends += 1
-                failed_clients.append(f"{client_name} (no invoices)")
-                print(f"❌ No invoices found for client: {client_name}")
-                continue
+                    print(f"❌ Error generating PDF for {client_name}: {str(e)}")
             
-            client_invoices_list = client_invoices[client_name]
-            client_email = client_invoices_list[0]['client_email']
+            # Send email
+            cc_list = email_config.get('ccList', '').split(',') if email_config.get('ccList') else []
+            cc_list = [email.strip() for email in cc_list if email.strip()]
             
-            # Check if frontend provided a custom email address for this client
-            client_email_config = email_config.get(client_name, {})
-            print(f"🔍 Debug: Email config for '{client_name}': {client_email_config}")
+            # Get sender credentials from global config
+            sender_email = global_config.get('senderEmail', email_config.get('senderEmail', 'noreply@company.com'))
+            sender_password = global_config.get('senderPassword', email_config.get('senderPassword', ''))
+            smtp_server = global_config.get('smtpServer', email_config.get('smtpServer', 'smtp.gmail.com'))
+            smtp_port = global_config.get('smtpPort', email_config.get('smtpPort', 587))
             
-            if client_email_config.get('recipientEmail'):
-                client_email = client_email_config['recipientEmail']
-                print(f"🔍 Using frontend-provided email for '{client_name}': '{client_email}'")
+            if send_email(sender_email, sender_password, client_email, cc_list, subject, body, attachments, smtp_server, smtp_port, client_name=client_name, company_name=company_name, enable_threading=True):
+                successful_sends += 1
+                print(f"✅ Email sent to {client_name}")
             else:
-                print(f"🔍 Using invoice email for '{client_name}': '{client_email}' (type: {type(client_email)})")
-                print(f"🔍 Debug: Invoice data for '{client_name}': {client_invoices_list[0]}")
-            
-            if not client_email or client_email.strip() == '':
                 failed_sends += 1
-                failed_clients.append(f"{client_name} (no email)")
-                print(f"❌ No email found for client: {client_name}")
-                continue
-            
-            try:
-                # Get email configuration for this client
-                client_email_config = email_config.get(client_name, {})
-                
-                # Use custom subject/body if provided, otherwise generate template
-                if client_email_config.get('subject') and client_email_config.get('body'):
-                    subject = client_email_config['subject']
-                    body = client_email_config['body']
-                else:
-                    # Generate email template
-                    max_days = max(inv['days_overdue'] for inv in client_invoices_list)
-                    template_result = generate_email_template(
-                        client_name, 
-                        client_invoices_list, 
-                        max_days, 
-                        email_config.get('template', 'initial')
-                    )
-                    subject = template_result['subject']
-                    body = template_result['body']
-                
-                # Prepare attachments
-                attachments = []
-                
-                # Add automatic IBAN letter if applicable
-                # Get company name from the first invoice for this client
-                company_name = client_invoices_list[0].get('company_name', 'Unknown Company')
-                print(f"🔍 Debug: Company name for {client_name}: '{company_name}'")
-                
-                iban_attachment = get_automatic_iban_attachment(company_name)
-                if iban_attachment:
-                    attachments.append(iban_attachment)
-                    print(f"📎 Added IBAN letter attachment for company: {company_name}")
-                else:
-                    print(f"📎 No IBAN letter found for company: {company_name}")
-                
-                # Generate and attach invoice PDF if enabled
-                if global_config.get('enablePdfAttachment', True):
-                    try:
-                        print(f"📄 Generating invoice PDF for {client_name}...")
-                        
-                        # Create PDF generator instance
-                        pdf_generator = InvoicePDFGenerator(connector)
-                        
-                        # Get partner ID from the first invoice
-                        partner_id = client_invoices_list[0].get('partner_id', client_name)
-                        
-                        # Generate PDF with progress callback
-                        def pdf_progress_callback(message, progress):
-                            print(f"📄 PDF Progress for {client_name}: {message} ({progress:.1f}%)")
-                        
-                        pdf_data = pdf_generator.generate_client_invoices_pdf(
-                            client_name, 
-                            partner_id, 
-                            pdf_progress_callback
-                        )
-                        
-                        if pdf_data:
-                            # Create a file-like object for the PDF
-                            import io
-                            pdf_file = io.BytesIO(pdf_data)
-                            pdf_file.name = f"Invoices_{client_name.replace(' ', '_')}.pdf"
-                            attachments.append(pdf_file)
-                            print(f"✅ Successfully generated and attached invoice PDF for {client_name} ({len(pdf_data)} bytes)")
-                        else:
-                            print(f"⚠️ Failed to generate invoice PDF for {client_name}")
-                    except Exception as e:
-                        print(f"❌ Error generating PDF for {client_name}: {str(e)}")
-                
-                # Send email
-                cc_list = email_config.get('ccList', '').split(',') if email_config.get('ccList') else []
-                cc_list = [email.strip() for email in cc_list if email.strip()]
+                failed_clients.append(f"{client_name} (email failed)")
+                print(f"❌ Failed to send email to {client_name}")
                 
-                # Get sender credentials from global config
-                sender_email = global_config.get('senderEmail', email_config.get('senderEmail', 'noreply@company.com'))
-                sender_password = global_config.get('senderPassword', email_config.get('senderPassword', ''))
-                smtp_server = global_config.get('smtpServer', email_config.get('smtpServer', 'smtp.gmail.com'))
-                smtp_port = global_config.get('smtpPort', email_config.get('smtpPort', 587))
-                
-                if send_email(sender_email, sender_password, client_email, cc_list, subject, body, attachments, smtp_server, smtp_port, client_name=client_name, company_name=company_name, enable_threading=True):
-                    successful_sends += 1
-                    print(f"✅ Email sent to {client_name}")
-                else:
-                    failed_sends += 1
-                    failed_clients.append(f"{client_name} (email failed)")
-                    print(f"❌ Failed to send email to {client_name}")
-                    
-            except Exception as e:
-                failed_sends += 1
-                failed_clients.append(f"{client_name} ({str(e)})")
-                print(f"❌ Error sending email to {client_name}: {str(e)}")
+        except Exception as e:
+            failed_sends += 1
+            failed_clients.append(f"{client_name} ({str(e)})")
+            print(f"❌ Error sending email to {client_name}: {str(e)}")
+    
+    print(f"Email sending complete: {successful_sends} successful, {failed_sends} failed")
+    
+    return {
+        'success': True,
+        'successfulSends': successful_sends,
+        'failedSends': failed_sends,
+        'failedClients': failed_clients,
+        'totalClients': len(selected_clients)
+    }, 200
+    
+@app.route('/api/invoices/query', methods=['POST'])
+def query_invoices():
+    """Page through a connection's cached invoices (or per-client summaries) with sorting and filters
+    
+    With includeSummary, the dataset totals (as in the connect response) come with the page.
+    """
+    try:
+        data = request.json or {}
+        connection_id = data.get('connectionId')
         
-        print(f"Email sending complete: {successful_sends} successful, {failed_sends} failed")
+        connection = _get_connection(connection_id)
+        if not connection:
+            return jsonify({'error': 'Connection not found'}), 404
         
+        invoice_index = _get_invoice_index(connection_id)
+        filters = data.get('filters', {})
+        missing_email = filters.get('missingEmail')
+        
+        try:
+            limit = min(max(int(data.get('limit', 100)), 1), 1000)
+            rows = invoice_index.query(
+                mode=data.get('mode', 'invoices'),
+                sort_by=data.get('sortBy', 'amount'),
+                descending=data.get('sortOrder', 'desc') != 'asc',
+                company=filters.get('company'),
+                bucket=filters.get('bucket'),
+                missing_email=bool(missing_email) if missing_email is not None else None
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        offset = 0
+        if data.get('cursor'):
+            try:
+                offset, cursor_version = _decode_cursor(data['cursor'])
+            except Exception:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            if cursor_version != invoice_index.version:
+                return jsonify({
+                    'error': 'Invoice data changed since this cursor was issued. Restart pagination.',
+                    'datasetVersion': invoice_index.version
+                }), 409
+        
+        page = rows[offset:offset + limit]
+        next_offset = offset + len(page)
+        
+        payload = {
+            'success': True,
+            'items': page,
+            'total': len(rows),
+            'nextCursor': _encode_cursor(next_offset, invoice_index.version) if next_offset < len(rows) else None,
+            'datasetVersion': invoice_index.version,
+            **_freshness(connection)
+        }
+        if data.get('includeSummary'):
+            payload['summary'] = invoice_index.get_summary()
+        return jsonify(payload)
+        
+    except Exception as e:
+        print(f"❌ Invoice query error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/clients/priority', methods=['POST'])
+def client_priority():
+    """Clients of a connection's cached invoices ranked by follow-up priority score
+
+    Optional weights ({maxDays, avgDays, amount}) override PRIORITY_WEIGHTS for this request.
+    """
+    try:
+        data = request.json or {}
+        connection_id = data.get('connectionId')
+        
+        connection = _get_connection(connection_id)
+        if not connection:
+            return jsonify({'error': 'Connection not found'}), 404
+        
+        invoice_index = _get_invoice_index(connection_id)
+        filters = data.get('filters', {})
+        
+        try:
+            limit = min(max(int(data.get('limit', 10)), 1), 5000)
+            scorer = PriorityScorer(data.get('weights'))
+            summaries = invoice_index.query(mode='clients', company=filters.get('company'), bucket=filters.get('bucket'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        ranked = scorer.top(summaries, limit)
         return jsonify({
             'success': True,
-            'successfulSends': successful_sends,
-            'failedSends': failed_sends,
-            'failedClients': failed_clients,
-            'totalClients': len(selected_clients)
+            'items': [
+                {**summary, 'priorityScore': round(score, 4), 'rank': rank}
+                for rank, (score, summary) in enumerate(ranked, start=1)
+            ],
+            'total': len(summaries),
+            'weights': scorer.weights,
+            'datasetVersion': invoice_index.version,
+            **_freshness(connection)
         })
         
+    except Exception as e:
+        print(f"❌ Client priority error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# Columns of /api/invoices/export, in order
+EXPORT_COLUMNS = (
+    'invoice_number', 'client_name', 'client_email', 'amount_total', 'amount_due', 'currency_symbol',
+    'invoice_date', 'due_date', 'days_overdue', 'company_name', 'origin'
+)
+# Rows serialized per streamed chunk
+EXPORT_CHUNK_ROWS = 500
+
+def _export_pages(connection, company=None, bucket=None):
+    """(source, iterator of invoice row lists): the cached index if loaded, else paged Odoo reads"""
+    invoice_index = connection.get('invoice_index')
+    if invoice_index is not None:
+        rows = invoice_index.query(mode='invoices', sort_by='client', descending=False, company=company, bucket=bucket)
+        return 'cache', (rows[start:start + EXPORT_CHUNK_ROWS] for start in range(0, len(rows), EXPORT_CHUNK_ROWS))
+    
+    # Stream straight from Odoo without building (and caching) the whole ledger here
+    def odoo_pages():
+        for page in connection['connector'].iter_overdue_invoice_rows():
+            yield [row for row in page
+                   if (not company or row['company_name'] == company)
+                   and (not bucket or get_aging_bucket(row['days_overdue']) == bucket)]
+    return 'odoo', odoo_pages()
+
+def _export_csv(pages):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for page in pages:
+        for start in range(0, len(page), EXPORT_CHUNK_ROWS):
+            writer.writerows([row.get(column, '') for column in EXPORT_COLUMNS] for row in page[start:start + EXPORT_CHUNK_ROWS])
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _export_ndjson(pages):
+    for page in pages:
+        for start in range(0, len(page), EXPORT_CHUNK_ROWS):
+            lines = [app.json.dumps({column: row.get(column) for column in EXPORT_COLUMNS}) for row in page[start:start + EXPORT_CHUNK_ROWS]]
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+@app.route('/api/invoices/export', methods=['GET'])
+def export_invoices():
+    """Stream a connection's overdue ledger as CSV or NDJSON
+    
+    Query string: connectionId, format (csv or ndjson), optional company and bucket filters.
+    Rows come from the cached invoice index, or page by page from Odoo when nothing is cached.
+    """
+    try:
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'error': f"Unknown format: {export_format}. Expected 'csv' or 'ndjson'"}), 400
+        bucket = request.args.get('bucket')
+        if bucket and bucket not in AGING_BUCKETS:
+            return jsonify({'error': f"Unknown aging bucket: {bucket}. Expected one of {list(AGING_BUCKETS)}"}), 400
+        
+        connection = _get_connection(request.args.get('connectionId'))
+        if not connection:
+            return jsonify({'error': 'Connection not found'}), 404
+        
+        source, pages = _export_pages(connection, request.args.get('company'), bucket)
+        chunks = _export_csv(pages) if export_format == 'csv' else _export_ndjson(pages)
+        chunks, encoding = compress_stream(chunks)
+        
+        headers = {
+            'Content-Disposition': f'attachment; filename="overdue_invoices_{datetime.now().strftime("%Y%m%d")}.{export_format}"',
+            'X-Export-Source': source,
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Let proxies pass rows through as they are produced
+        }
+        if encoding:
+            headers['Content-Encoding'] = encoding
+            headers['Vary'] = 'Accept-Encoding'
+        
+        return Response(
+            chunks,
+            mimetype='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+            headers=headers
+        )
+        
+    except Exception as e:
+        print(f"❌ Invoice export error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def _history_request():
+    """(request data, history source, error response) for the overdue history endpoints"""
+    data = request.json or {}
+    connection = _get_connection(data.get('connectionId'))
+    if not connection:
+        return data, None, (jsonify({'error': 'Connection not found'}), 404)
+    connector = connection['connector']
+    return data, history_source(connector.url, connector.database), None
+
+@app.route('/api/history/trend', methods=['POST'])
+def history_trend():
+    """Per-day overdue totals and aging buckets between start and end (ISO dates, inclusive)"""
+    try:
+        data, source, error = _history_request()
+        if error:
+            return error
+        
+        trend = overdue_history.aging_trend(source, data.get('start'), data.get('end'))
+        return jsonify({'success': True, 'days': trend})
+        
+    except Exception as e:
+        print(f"❌ History trend error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/history/client', methods=['POST'])
+def history_client():
+    """Per-day overdue amount, invoice count and max days overdue of one client"""
+    try:
+        data, source, error = _history_request()
+        if error:
+            return error
+        if not data.get('clientName'):
+            return jsonify({'error': 'clientName is required'}), 400
+        
+        history = overdue_history.client_history(source, data['clientName'], data.get('start'), data.get('end'))
+        return jsonify({'success': True, 'clientName': data['clientName'], 'days': history})
+        
+    except Exception as e:
+        print(f"❌ Client history error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/history/delta', methods=['POST'])
+def history_delta():
+    """Invoices added, resolved and changed between a day's snapshot (default today) and the previous one"""
+    try:
+        data, source, error = _history_request()
+        if error:
+            return error
+        
+        day = data.get('day') or datetime.now().strftime("%Y-%m-%d")
+        delta = overdue_history.day_over_day(source, day, data.get('previousDay'))
+        if delta is None:
+            return jsonify({'error': f'No snapshots to compare for {day}'}), 404
+        return jsonify({'success': True, **delta})
+        
+    except Exception as e:
+        print(f"❌ History delta error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/email/send', methods=['POST'])
+def send_bulk_emails():
+    """Send bulk emails to selected clients"""
+    try:
+        payload, status = _send_bulk_emails(request.json, _print_progress("Email: "))
+        return jsonify(payload), status
+        
     except Exception as e:
         print(f"❌ Bulk email error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -493,53 +1168,155 @@ Odoo Invoice Follow-Up Manager"""
         print(f"❌ Test email error: {str(e)}")
         return jsonify({'error': f'Test email failed: {str(e)}'}), 500
 
+def _generate_client_pdf(data, progress_callback):
+    """Generate the overdue invoices PDF for one client. Returns (payload, status)."""
+    connection_id = data.get('connectionId')
+    client_name = data.get('clientName')
+    connection = _get_connection(connection_id)
+    
+    if not connection:
+        return {'error': 'Connection not found'}, 404
+    
+    connector = connection['connector']
+    pdf_generator = InvoicePDFGenerator(connector)
+    
+    # Resolve the client's overdue invoices from the cache instead of refetching the ledger
+    invoice_index = _get_invoice_index(connection_id, progress_callback)
+    client_invoices = [inv for inv in invoice_index.get_client_invoices(client_name) if inv['days_overdue'] > 0]
+    
+    if not client_invoices:
+        return {'error': f'No invoices found for {client_name}'}, 404
+    
+    invoice_ids = [inv['id'] for inv in client_invoices]
+    partner_id = client_invoices[0].get('partner_id') or client_name
+    
+    print(f"Generating PDF for {client_name} ({len(invoice_ids)} cached invoices)...")
+    
+    # Generate PDF (the PDF generator reports progress as a 0-1 fraction)
+    def pdf_progress_callback(message, progress):
+        progress_callback(message, progress * 100)
+    
+    pdf_data = single_flight.do(
+        (connection_id, 'pdf', client_name, tuple(invoice_ids)),
+        pdf_generator.generate_client_invoices_pdf, client_name, partner_id, pdf_progress_callback,
+        invoice_ids=invoice_ids
+    )
+    
+    if pdf_data:
+        pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
+        print(f"PDF generated for {client_name} ({len(pdf_data)} bytes)")
+        return {
+            'success': True,
+            'pdfData': pdf_base64,
+            'filename': f"{client_name}_invoices.pdf"
+        }, 200
+    else:
+        print(f"Failed to generate PDF for {client_name}")
+        return {'error': 'Failed to generate PDF'}, 500
+
 @app.route('/api/pdf/generate', methods=['POST'])
 def generate_pdf():
     """Generate PDF for a specific client"""
     try:
-        data = request.json
-        connection_id = data.get('connectionId')
-        client_name = data.get('clientName')
-        
-        if connection_id not in active_connections:
-            return jsonify({'error': 'Connection not found'}), 404
-        
-        connector = active_connections[connection_id]['connector']
-        pdf_generator = InvoicePDFGenerator(connector)
-        
-        # Get partner ID for the client
-        invoices = connector.get_overdue_invoices()
-        
-        # Filter out zero-amount invoices
-        invoices = [inv for inv in invoices if inv['amount_due'] > 0 and inv['amount_total'] > 0]
-        
-        client_invoices = [inv for inv in invoices if inv['client_name'] == client_name]
-        
-        if not client_invoices:
-            return jsonify({'error': f'No invoices found for {client_name}'}), 404
-        
-        print(f"Generating PDF for {client_name}...")
-        
-        # Generate PDF
-        pdf_data = pdf_generator.generate_client_invoices_pdf(client_name, client_name)
-        
-        if pdf_data:
-            import base64
-            pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
-            print(f"PDF generated for {client_name} ({len(pdf_data)} bytes)")
-            return jsonify({
-                'success': True,
-                'pdfData': pdf_base64,
-                'filename': f"{client_name}_invoices.pdf"
-            })
-        else:
-            print(f"Failed to generate PDF for {client_name}")
-            return jsonify({'error': 'Failed to generate PDF'}), 500
+        payload, status = _generate_client_pdf(request.json, _print_progress("PDF: "))
+        return jsonify(payload), status
             
     except Exception as e:
         print(f"❌ PDF generation error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Background jobs: the same operations as above, run off the request thread
+JOB_OPERATIONS = {
+    'fetch': _connect_and_fetch,
+    'refresh': _refresh_connection,
+    'pdf': _generate_client_pdf,
+    'send': _send_bulk_emails
+}
+
+def _run_job_operation(progress_callback, operation, data):
+    """Adapt a (payload, status) operation to the job manager's raise-on-failure contract"""
+    payload, status = operation(data, progress_callback)
+    if status >= 400:
+        raise Exception(payload.get('error', f'Job failed with status {status}'))
+    return payload
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Submit a fetch, refresh, PDF or bulk-send job and return its id immediately"""
+    try:
+        data = request.json or {}
+        job_type = data.get('type')
+        params = data.get('params', {})
+        
+        if job_type not in JOB_OPERATIONS:
+            return jsonify({'error': f"Unknown job type: {job_type}. Expected one of {list(JOB_OPERATIONS.keys())}"}), 400
+        
+        job = job_manager.submit(
+            job_type,
+            _run_job_operation,
+            JOB_OPERATIONS[job_type],
+            params,
+            description=params.get('clientName') or params.get('connectionId') or params.get('database', '')
+        )
+        
+        return jsonify({
+            'success': True,
+            'jobId': job.id,
+            'status': job.status,
+            'eventsUrl': f"/api/jobs/{job.id}/events"
+        }), 202
+        
+    except Exception as e:
+        print(f"❌ Job submission error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List retained background jobs"""
+    try:
+        jobs = job_manager.list_jobs()
+        return jsonify({
+            'success': True,
+            'jobs': jobs,
+            'total_jobs': len(jobs)
+        })
+    except Exception as e:
+        print(f"❌ Error listing jobs: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status (and result, once completed) of a background job"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream job progress as Server-Sent Events"""
+    if not job_manager.get(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # EventSource sends Last-Event-ID when it reconnects
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', request.args.get('lastEventId', 0)))
+    except ValueError:
+        last_event_id = 0
+    
+    return Response(
+        stream_with_context(job_manager.stream_events(job_id, last_event_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering so events arrive immediately
+        }
+    )
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -551,12 +1328,18 @@ def health_check():
             'cached_invoice_count': len(conn_data.get('cached_invoices', []))
         }
     
+    connection_ids = _known_connection_ids()
+    
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'activeConnections': len(active_connections),
-        'connectionIds': list(active_connections.keys()),
+        'activeConnections': len(connection_ids),
+        'connectionIds': connection_ids,
         'connectionInfo': connection_info,
+        'stateStore': state_store.name,
+        'backgroundRefresh': background_refresher.status(),
+        'cacheSnapshots': snapshot_scheduler.status(),
+        'workerPid': os.getpid(),
         'version': '1.0.0',
         'demo_mode': DEMO_MODE,
         'environment': os.environ.get('NODE_ENV', 'development'),
@@ -570,8 +1353,9 @@ def disconnect_odoo():
         data = request.json
         connection_id = data.get('connectionId')
         
-        if connection_id and connection_id in active_connections:
-            del active_connections[connection_id]
+        if connection_id and connection_id in _known_connection_ids():
+            _forget_connection(connection_id)
+            single_flight.forget((connection_id,))
             print(f"Disconnected from Odoo: {connection_id}")
             return jsonify({
                 'success': True,
@@ -592,10 +1376,14 @@ def clear_cache():
     """Clear cached invoice data for all connections"""
     try:
         cleared_count = 0
-        for conn_id in active_connections:
-            if 'cached_invoices' in active_connections[conn_id]:
-                del active_connections[conn_id]['cached_invoices']
+        for conn_id, conn_data in active_connections.items():
+            if 'cached_invoices' in conn_data:
+                active_connections.drop_cache(conn_id)
                 cleared_count += 1
+        for conn_id in _known_connection_ids():
+            for key in _shared_cache_keys(conn_id):
+                state_store.delete(key)
+            cache_snapshots.delete(conn_id)
         
         return jsonify({
             'success': True,
@@ -614,18 +1402,40 @@ def debug_connections():
                 'connection_details': connection_data.get('connection_details', {}),
                 'has_connector': 'connector' in connection_data,
                 'has_cached_invoices': 'cached_invoices' in connection_data,
-                'cached_invoice_count': len(connection_data.get('cached_invoices', []))
+                'cached_invoice_count': len(connection_data.get('cached_invoices', [])),
+                'cached_client_count': connection_data['invoice_index'].client_count if 'invoice_index' in connection_data else 0
             }
         
         return jsonify({
             'success': True,
             'active_connections': connection_info,
-            'total_connections': len(active_connections)
+            'total_connections': len(active_connections),
+            'registry': active_connections.stats()
         })
     except Exception as e:
         print(f"❌ Error getting connection debug info: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/debug/rpc', methods=['GET'])
+def debug_rpc():
+    """Odoo RPC counts, records, bytes and latency per model/method and per operation (this process)"""
+    try:
+        recent = min(max(int(request.args.get('recent', 20)), 0), 100)
+        return jsonify({'success': True, **rpc_metrics.summary(recent)})
+    except Exception as e:
+        print(f"❌ Error getting RPC metrics: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/debug/rpc/clear', methods=['POST'])
+def clear_rpc_metrics():
+    """Reset the RPC metrics of this process"""
+    try:
+        rpc_metrics.reset()
+        return jsonify({'success': True, 'message': 'RPC metrics cleared'})
+    except Exception as e:
+        print(f"❌ Error clearing RPC metrics: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/debug/threads', methods=['GET'])
 def debug_threads():
     """Debug endpoint to view email threads"""
@@ -665,11 +1475,13 @@ def get_demo_data():
         
         clients_missing_email = [inv for inv in demo_invoices if not inv['client_email']]
         
-        return jsonify({
+        dataset_version = compute_dataset_version(demo_invoices)
+        return _versioned_json({
             'success': True,
             'overdueInvoices': demo_invoices,
-            'clientsMissingEmail': clients_missing_email
-        })
+            'clientsMissingEmail': clients_missing_email,
+            'datasetVersion': dataset_version
+        }, f"{dataset_version}-full")
     except ImportError:
         return jsonify({'error': 'Demo data module not available'}), 500
 
@@ -677,15 +1489,8 @@ def get_demo_data():
 def get_automated_reports_config():
     """Get automated reports configuration"""
     try:
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        
-        from config_manager import ConfigManager
-        config_manager = ConfigManager()
-        
         # Return configuration without decrypted passwords for security
-        config = config_manager.config
+        config = get_config_manager().config
         
         return jsonify({
             'success': True,
@@ -699,45 +1504,17 @@ def get_automated_reports_config():
 def update_automated_reports_config():
     """Update automated reports configuration"""
     try:
-        import sys
-        import os
-        import json
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        
-        from config_manager import ConfigManager
-        
         data = request.json
         print(f"🔍 Received automated reports config update: {data}")
         
-        # Load current config
-        config_manager = ConfigManager()
-        current_config = config_manager.config
-        
-        # Update the configuration
+        # Update the automated_reports section (saved atomically, without encryption)
         if 'updates' in data:
-            updates = data['updates']
-            
-            # Update the automated_reports section
-            if 'automated_reports' not in current_config:
-                current_config['automated_reports'] = {}
-            
-            for key, value in updates.items():
-                current_config['automated_reports'][key] = value
-            
-            # Save directly to file without encryption
-            config_file = config_manager.config_file
-            try:
-                with open(config_file, 'w', encoding='utf-8') as f:
-                    json.dump(current_config, f, indent=2, ensure_ascii=False)
-                print(f"✅ Configuration saved to {config_file}")
-                
+            if get_config_manager().update_automated_reports_config(data['updates']):
                 return jsonify({
                     'success': True,
                     'message': 'Configuration updated successfully'
                 })
-            except Exception as e:
-                print(f"❌ Error saving configuration: {str(e)}")
-                return jsonify({'error': f'Failed to save configuration: {str(e)}'}), 500
+            return jsonify({'error': 'Failed to save configuration'}), 500
         
         return jsonify({'error': 'No updates provided'}), 400
         
@@ -749,21 +1526,20 @@ def update_automated_reports_config():
 def test_automated_report():
     """Test the automated report generation and email sending"""
     try:
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        
-        from config_manager import ConfigManager
-        from core import OdooConnector
-        
-        config_manager = ConfigManager()
+        config_manager = get_config_manager()
         config = config_manager.get_decrypted_config()
         
         print(f"🔍 Testing automated report with config: {config}")
         
+        # Test one report profile (the first one unless the request names another)
+        profile_name = (request.get_json(silent=True) or {}).get('profile')
+        profile = config_manager.get_report_profile(profile_name)
+        if profile is None:
+            return jsonify({'error': f'Report profile not found: {profile_name}'}), 404
+        
         # Check if configuration is complete
-        odoo_config = config['automated_reports']['odoo_connection']
-        email_config = config['automated_reports']['email_settings']
+        odoo_config = profile['odoo_connection']
+        email_config = profile['email_settings']
         
         print(f"🔍 Odoo config: {odoo_config}")
         print(f"🔍 Email config: {email_config}")
@@ -795,22 +1571,26 @@ def test_automated_report():
         import sys
         import os
         sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        from scripts.daily_report_script import generate_daily_report, send_daily_report_email
+        from scripts.daily_report_script import get_daily_report, send_daily_report_email
         
-        report_data = generate_daily_report(connector)
+        # Repeated test clicks share one generation and reuse today's report while Odoo data is unchanged
+        report_data, from_cache = single_flight.do(('automated-report', connector.url, connector.database),
+                                                    get_daily_report, connector, report_cache)
         
         if not report_data:
             return jsonify({'error': 'No report data generated'}), 500
         
         # Send test email
-        if send_daily_report_email(config, report_data):
+        if send_daily_report_email({'automated_reports': profile}, report_data):
             return jsonify({
                 'success': True,
-                'message': f'Test report sent successfully to {config["automated_reports"]["recipient_email"]}',
+                'message': f'Test report sent successfully to {profile["recipient_email"]}',
+                'profile': profile['name'],
                 'report_summary': {
                     'total_invoices': report_data['total_invoices'],
                     'total_amount': report_data['total_amount'],
-                    'total_clients': report_data['total_clients']
+                    'total_clients': report_data['total_clients'],
+                    'from_cache': from_cache
                 }
             })
         else:
@@ -824,7 +1604,7 @@ def test_automated_report():
 def get_email_threads():
     """Get information about email threads"""
     try:
-        threads = thread_manager.threads
+        threads = dict(thread_manager.threads)
         thread_list = []
         
         for client_key, thread_info in threads.items():
@@ -926,10 +1706,22 @@ if __name__ == '__main__':
     print("   - POST /api/odoo/connect")
     print("   - POST /api/odoo/disconnect")
     print("   - POST /api/odoo/refresh")
+    print("   - POST /api/invoices/query")
+    print("   - GET  /api/invoices/export")
+    print("   - POST /api/clients/priority")
+    print("   - POST /api/history/trend")
+    print("   - POST /api/history/client")
+    print("   - POST /api/history/delta")
     print("   - POST /api/email/send")
     print("   - POST /api/pdf/generate")
+    print("   - POST /api/jobs")
+    print("   - GET  /api/jobs")
+    print("   - GET  /api/jobs/<job_id>")
+    print("   - GET  /api/jobs/<job_id>/events")
     print("   - GET  /api/demo/data")
     print("   - GET  /api/debug/connections")
+    print("   - GET  /api/debug/rpc")
+    print("   - POST /api/debug/rpc/clear")
     print("   - GET  /api/debug/threads")
     print("   - POST /api/debug/threads/clear")
     print("   - GET  /api/automated-reports/config")
@@ -938,10 +1730,30 @@ if __name__ == '__main__':
     print("   - GET  /api/email/threads")
     print("   - GET  /api/email/threads/<client_key>")
     print()
+    print(f"🗄️ State store: {state_store.name}")
+    
+    # Let platform restarts (SIGTERM) run the atexit cache snapshot
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    production = '--production' in sys.argv or os.environ.get('SERVER_MODE') == 'production'
+    if production:
+        try:
+            import gunicorn  # noqa: F401
+            backend_dir = os.path.dirname(os.path.abspath(__file__))
+            print(f"🏭 Starting gunicorn on http://0.0.0.0:{port} (workers: backend/gunicorn.conf.py)")
+            os.execvp(sys.executable, [
+                sys.executable, '-m', 'gunicorn',
+                '--chdir', backend_dir,
+                '-c', os.path.join(backend_dir, 'gunicorn.conf.py'),
+                'wsgi:application'
+            ])
+        except ImportError:
+            print("⚠️ gunicorn not installed, falling back to the threaded Flask server")
     
     try:
         print(f"🚀 Starting Flask server on http://0.0.0.0:{port}")
-        app.run(debug=False, host='0.0.0.0', port=port)
+        app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
     except Exception as e:
         print(f"❌ Failed to start Flask server: {e}")
         raise
\ No newline at end of file
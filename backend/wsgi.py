@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for running the backend under gunicorn with several workers
+Connection metadata and invoice caches go through the shared SQLite state store.
+"""
+
+import os
+import sys
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+# Workers don't share memory, so default to the store every worker can see
+os.environ.setdefault('STATE_STORE', 'sqlite')
+
+from run_backend import app
+
+application = app
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Background refresher for Odoo Invoice Follow-Up Manager
+Periodically re-fetches the invoice cache of every active connection so reads
+can be served from the cache without waiting on Odoo (stale-while-revalidate).
+"""
+
+import os
+import time
+import threading
+
+
+class BackgroundRefresher:
+    """Daemon thread calling refresh_fn(connection_id) for each id from connection_ids_fn"""
+
+    def __init__(self, refresh_fn, connection_ids_fn, interval_seconds=300, name='invoice-refresher'):
+        self.refresh_fn = refresh_fn
+        self.connection_ids_fn = connection_ids_fn
+        self.interval_seconds = interval_seconds
+        self.name = name
+        self.last_run = None
+        self.last_duration = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the refresh loop (no-op if already running or disabled)"""
+        with self._lock:
+            if self.running or self.interval_seconds <= 0:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        print(f"🔁 Background {self.name} every {self.interval_seconds}s")
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def revalidate(self, connection_id):
+        """Refresh one connection now in a separate daemon thread"""
+        def run():
+            try:
+                self.refresh_fn(connection_id)
+            except Exception as e:
+                print(f"⚠️ Background {self.name} failed for {connection_id}: {e}")
+        threading.Thread(target=run, name=f"{self.name}-{connection_id}", daemon=True).start()
+
+    def run_once(self):
+        """Refresh every active connection once; errors are logged per connection"""
+        started = time.time()
+        refreshed = 0
+        for connection_id in self.connection_ids_fn():
+            if self._stop_event.is_set():
+                break
+            try:
+                if self.refresh_fn(connection_id):
+                    refreshed += 1
+            except Exception as e:
+                print(f"⚠️ Background {self.name} failed for {connection_id}: {e}")
+        self.last_run = started
+        self.last_duration = time.time() - started
+        return refreshed
+
+    def status(self):
+        return {
+            'running': self.running,
+            'intervalSeconds': self.interval_seconds,
+            'lastRun': self.last_run,
+            'lastDurationSeconds': self.last_duration
+        }
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            refreshed = self.run_once()
+            if refreshed:
+                print(f"🔁 Background {self.name} updated {refreshed} connections in {self.last_duration:.1f}s")
+
+
+def create_background_refresher(refresh_fn, connection_ids_fn):
+    """Refresher configured from BACKGROUND_REFRESH_SECONDS (0 disables it)"""
+    return BackgroundRefresher(
+        refresh_fn,
+        connection_ids_fn,
+        interval_seconds=int(os.environ.get('BACKGROUND_REFRESH_SECONDS', 300))
+    )
+
+
+def create_snapshot_scheduler(snapshot_fn, connection_ids_fn):
+    """Periodic cache snapshots configured from CACHE_SNAPSHOT_SECONDS (0 disables them)"""
+    return BackgroundRefresher(
+        snapshot_fn,
+        connection_ids_fn,
+        interval_seconds=int(os.environ.get('CACHE_SNAPSHOT_SECONDS', 600)),
+        name='cache-snapshot'
+    )
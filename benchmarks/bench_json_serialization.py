@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of large invoice payloads
+
+Compares the standard library json module with the backend's JSON provider
+(orjson when installed) on a /api/odoo/connect-sized payload.
+
+Usage:
+    python benchmarks/bench_json_serialization.py [--invoices 50000] [--repeat 5]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from flask import Flask
+from json_provider import FastJSONProvider, StdlibJSONProvider, ORJSON_AVAILABLE, json_default
+
+
+def generate_invoices(count, seed=42):
+    """Invoice records shaped like OdooConnector.get_overdue_invoices output"""
+    rnd = random.Random(seed)
+    today = date.today()
+    invoices = []
+    for i in range(count):
+        days_overdue = rnd.randint(-10, 120)
+        amount = round(rnd.uniform(50, 25000), 2)
+        due_date = today - timedelta(days=days_overdue)
+        invoices.append({
+            'id': i + 1,
+            'invoice_number': f"PLFZ/2024/{i + 1:06d}",
+            'partner_id': 1000 + i % 2500,
+            'client_name': f"Client {i % 2500}",
+            'client_email': f"billing{i % 2500}@example.com" if i % 11 else '',
+            'amount_total': amount,
+            'amount_due': round(amount * rnd.uniform(0.1, 1.0), 2),
+            'invoice_date': (due_date - timedelta(days=30)).isoformat(),
+            'due_date': due_date,  # date object, exercises the date path
+            'days_overdue': days_overdue,
+            'payment_state': rnd.choice(['not_paid', 'partial']),
+            'currency_symbol': rnd.choice(['$', 'AED', 'SAR']),
+            'company_name': rnd.choice(['Prezlab FZ LLC', 'Prezlab Advanced Design Company']),
+            'origin': f"S{rnd.randint(100, 9999):05d}",
+            'fetched_at': datetime.now(),
+            'checksum': bytes([i % 256]) * 8  # bytes, exercises the base64 path
+        })
+    return invoices
+
+
+def time_it(func, repeat):
+    """Best wall time of func over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invoices', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    invoices = generate_invoices(args.invoices)
+    payload = {'success': True, 'overdueInvoices': invoices, 'connectionId': 'bench_db'}
+
+    app = Flask(__name__)
+    stdlib_provider = StdlibJSONProvider(app)
+
+    results = [
+        ('json.dumps (stdlib)', lambda: json.dumps(payload, default=json_default)),
+        ('StdlibJSONProvider', lambda: stdlib_provider.dumps(payload)),
+    ]
+    if ORJSON_AVAILABLE:
+        fast_provider = FastJSONProvider(app)
+        results.append(('FastJSONProvider (orjson)', lambda: fast_provider.dumps_bytes(payload)))
+        # Both paths must agree on the encoded content
+        assert json.loads(fast_provider.dumps_bytes(payload)) == json.loads(stdlib_provider.dumps(payload))
+    else:
+        print("orjson not installed - only the stdlib path is measured")
+
+    size = len(stdlib_provider.dumps(payload).encode('utf-8'))
+    print(f"Serializing {args.invoices:,} invoices ({size / 1024 / 1024:.1f} MB), best of {args.repeat}:")
+
+    baseline = None
+    for name, func in results:
+        elapsed = time_it(func, args.repeat)
+        baseline = baseline or elapsed
+        print(f"  {name:<28} {elapsed * 1000:9.1f} ms   {baseline / elapsed:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
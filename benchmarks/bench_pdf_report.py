@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark the daily report PDF renderer at growing client counts
+
+Renders generate_pdf_report from scripts/daily_report_script.py for synthetic
+reports with 100, 1,000 and 10,000 severely overdue clients and reports the
+render time and PDF size. With --budget-seconds the run fails when any size
+takes longer than the budget.
+
+Usage:
+    python benchmarks/bench_pdf_report.py [--clients 100 1000 10000] [--repeat 3] [--budget-seconds 5]
+"""
+
+import io
+import sys
+import time
+import random
+import argparse
+import contextlib
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from invoice_index import build_invoice_index
+from daily_report_script import generate_pdf_report, build_report_aggregates
+
+
+def generate_invoices(client_count, invoices_per_client=3, seed=42):
+    """Overdue invoices where every client has at least one invoice over 30 days"""
+    rnd = random.Random(seed)
+    today = date.today()
+    invoices = []
+    for client in range(client_count):
+        for i in range(invoices_per_client):
+            days_overdue = rnd.randint(31, 180) if i == 0 else rnd.randint(-10, 60)
+            amount = round(rnd.uniform(50, 25000), 2)
+            invoices.append({
+                'id': len(invoices) + 1,
+                'invoice_number': f"PLFZ/2024/{len(invoices) + 1:06d}",
+                'client_name': f"Client {client:05d} Trading and Contracting LLC",
+                'client_email': f"billing{client}@example.com",
+                'amount_total': amount,
+                'amount_due': amount,
+                'due_date': (today - timedelta(days=days_overdue)).isoformat(),
+                'days_overdue': days_overdue,
+                'currency_symbol': '$',
+                'company_name': 'Prezlab FZ LLC'
+            })
+    return invoices
+
+
+def render(report_aggregates):
+    # generate_pdf_report logs through print; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_pdf_report(report_aggregates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget-seconds', type=float, default=None)
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"Rendering the daily report PDF, best of {args.repeat}:")
+    for client_count in args.clients:
+        invoices = generate_invoices(client_count)
+        report_aggregates = build_report_aggregates(build_invoice_index(invoices))
+
+        best = float('inf')
+        pdf_content = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pdf_content = render(report_aggregates)
+            best = min(best, time.perf_counter() - start)
+
+        if pdf_content is None:
+            print("  reportlab not installed or rendering failed")
+            sys.exit(1)
+
+        severe_count = len(report_aggregates['severe_clients'])
+        print(f"  {client_count:>7,} clients ({severe_count:,} severe)  {best * 1000:9.1f} ms  {len(pdf_content) / 1024:8.1f} KB")
+        if args.budget_seconds is not None and best > args.budget_seconds:
+            over_budget.append(client_count)
+
+    if over_budget:
+        print(f"Over the {args.budget_seconds:g} s budget at: {', '.join(f'{count:,}' for count in over_budget)} clients")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start import time of the backend and daily report modules
+
+Imports each module in a fresh interpreter with `python -X importtime` and
+reports its cumulative import time (best of --repeat runs) along with the
+heaviest dependencies it pulls in. Modules whose optional dependencies are
+not installed are reported as unavailable.
+
+Usage:
+    python benchmarks/bench_startup_imports.py [--repeat 5] [--top 5] [--budget-ms 500]
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# (label, directory added to sys.path, module name)
+TARGETS = [
+    ('core', ROOT, 'core'),
+    ('demo_data', ROOT, 'demo_data'),
+    ('google_oauth_config', ROOT, 'google_oauth_config'),
+    ('daily_report_script', ROOT / 'scripts', 'daily_report_script'),
+    ('run_backend', ROOT / 'backend', 'run_backend'),
+]
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_import(directory, module):
+    """(cumulative us, {direct dependency: cumulative us}) of one fresh-interpreter import, or None"""
+    code = f"import sys; sys.path.insert(0, {str(ROOT)!r}); sys.path.insert(0, {str(directory)!r}); import {module}"
+    env = dict(os.environ, BACKGROUND_REFRESH_SECONDS='0', CACHE_SNAPSHOT_SECONDS='0')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, env=env, cwd=str(ROOT))
+    if result.returncode != 0:
+        return None
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append((len(match.group(3)), match.group(4), int(match.group(2))))
+
+    # importtime lists a module after everything it imported (deeper indentation)
+    for position in range(len(entries) - 1, -1, -1):
+        indent, name, cumulative_us = entries[position]
+        if name == module:
+            break
+    else:
+        return None
+
+    dependencies = {}
+    for child_indent, child_name, child_us in reversed(entries[:position]):
+        if child_indent <= indent:
+            break
+        if child_indent == indent + 2:
+            dependencies[child_name] = child_us
+    return cumulative_us, dependencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5, help='heaviest dependencies listed per module')
+    parser.add_argument('--budget-ms', type=float, default=None, help='exit non-zero if a module exceeds this')
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"Cold import time, best of {args.repeat} fresh interpreters:")
+    for label, directory, module in TARGETS:
+        runs = [measure_import(directory, module) for _ in range(args.repeat)]
+        runs = [run for run in runs if run is not None]
+        if not runs:
+            print(f"  {label:<22} unavailable (missing dependencies)")
+            continue
+
+        total_us, dependencies = min(runs, key=lambda run: run[0])
+        total_ms = total_us / 1000
+        print(f"  {label:<22} {total_ms:8.1f} ms")
+
+        for name, us in sorted(dependencies.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"      {name:<26} {us / 1000:8.1f} ms")
+
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget.append(label)
+
+    if over_budget:
+        print(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Warm-start cache snapshots for the Odoo Invoice Follow-Up Manager backend
+Persists each connection's invoice cache and reference data (partners,
+currencies, companies) to disk so a restarted backend can answer a reconnect
+from cache. Invoices are stored column-wise and zlib-compressed; credentials
+are never written.
+"""
+
+import os
+import json
+import zlib
+import base64
+import tempfile
+import threading
+
+# Version 2 snapshots hold no credentials (version 1 ones, which did, are deleted on load)
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_SUFFIX = '.snapshot'
+
+
+def pack_rows(rows):
+    """Column-oriented form of a list of dicts (keys are stored once)"""
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    packed = []
+    for row in rows:
+        if len(row) == len(columns):
+            packed.append([row[column] for column in columns])
+        else:
+            packed.append(row)  # Rows missing some columns are kept as dicts
+    return {'columns': columns, 'rows': packed}
+
+
+def unpack_rows(packed):
+    """Inverse of pack_rows"""
+    columns = packed['columns']
+    return [dict(zip(columns, row)) if isinstance(row, list) else row for row in packed['rows']]
+
+
+class CacheSnapshotStore:
+    """One compressed snapshot file per connection in a directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, connection_id):
+        safe_name = base64.urlsafe_b64encode(connection_id.encode('utf-8')).decode('ascii')
+        return os.path.join(self.directory, safe_name + SNAPSHOT_SUFFIX)
+
+    def save(self, connection_id, snapshot):
+        """Atomically write a connection snapshot (dict with an 'invoices' list)"""
+        document = dict(snapshot, formatVersion=SNAPSHOT_FORMAT_VERSION, connectionId=connection_id)
+        document['invoices'] = pack_rows(snapshot.get('invoices', []))
+        raw = zlib.compress(json.dumps(document, default=str, separators=(',', ':')).encode('utf-8'), 6)
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(raw)
+                os.replace(tmp_path, self._path(connection_id))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return len(raw)
+
+    def load(self, connection_id):
+        """Snapshot for a connection, or None if missing, unreadable or from another format (then deleted)"""
+        path = self._path(connection_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                document = json.loads(zlib.decompress(f.read()))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache snapshot for {connection_id}: {e}")
+            return None
+        if document.get('formatVersion') != SNAPSHOT_FORMAT_VERSION:
+            self.delete(connection_id)
+            return None
+        document['invoices'] = unpack_rows(document['invoices'])
+        return document
+
+    def delete(self, connection_id):
+        with self._lock:
+            path = self._path(connection_id)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def connection_ids(self):
+        """Connection ids that have a snapshot on disk"""
+        if not os.path.isdir(self.directory):
+            return []
+        connection_ids = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(SNAPSHOT_SUFFIX):
+                safe_name = filename[:-len(SNAPSHOT_SUFFIX)]
+                connection_ids.append(base64.urlsafe_b64decode(safe_name.encode('ascii')).decode('utf-8'))
+        return connection_ids
+
+
+def create_snapshot_store():
+    """Snapshot store in CACHE_SNAPSHOT_DIR (default data/cache_snapshots next to this module)"""
+    default_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache_snapshots')
+    return CacheSnapshotStore(os.environ.get('CACHE_SNAPSHOT_DIR', default_directory))
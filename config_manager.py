@@ -1,19 +1,94 @@
 import json
 import os
 import base64
-from datetime import datetime
+import tempfile
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
 
+# Minutes to wait after a failed report send before trying again (scheduler and Task Scheduler runs)
+REPORT_RETRY_MINUTES = 15
+
 class ConfigManager:
     def __init__(self, config_file="automated_reports_config.json"):
-        """Initialize configuration manager with JSON file storage"""
+        """Initialize configuration manager with JSON file storage
+        
+        The parsed config is kept in memory and reloaded only when the file changes
+        on disk (Settings page saves, another process). Prefer get_config_manager()
+        for the shared instance.
+        """
         # Create config directory if it doesn't exist
         self.config_dir = Path("config")
         self.config_dir.mkdir(exist_ok=True)
         
         # Set config file path
         self.config_file = self.config_dir / config_file
-        self.config = self.load_config()
+        self._lock = threading.RLock()
+        self._file_state = None
+        self._config = self.load_config()
+    
+    @property
+    def config(self):
+        """Current config snapshot, reloaded first if the file changed
+        
+        Snapshots are shared between readers and replaced (never modified) by
+        writes, so treat them as read-only and change settings through set(),
+        update_automated_reports_config() or save_config().
+        """
+        self._reload_if_changed()
+        return self._config
+    
+    @config.setter
+    def config(self, config):
+        with self._lock:
+            self._config = config
+    
+    def snapshot(self):
+        """Read-only config snapshot (alias of .config)"""
+        return self.config
+    
+    def _stat_file(self):
+        """(mtime, size, inode) of the config file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _reload_if_changed(self):
+        file_state = self._stat_file()
+        if file_state == self._file_state:
+            return
+        with self._lock:
+            file_state = self._stat_file()
+            if file_state == self._file_state:
+                return
+            if file_state is None:
+                # Deleted: recreate the default file like on first start
+                self._config = self.load_config()
+                return
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    self._config = json.load(f)
+                print(f"🔄 Reloaded configuration from {self.config_file}")
+            except Exception as e:
+                # Keep the last good config rather than falling back to defaults
+                print(f"⚠️ Error reloading config, keeping the previous one: {str(e)}")
+            self._file_state = file_state
+    
+    def _write_file(self, config):
+        """Atomically replace the config file (temp file + rename) and remember its state"""
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.config_dir, prefix=self.config_file.name, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(config, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.config_file)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._file_state = self._stat_file()
     
     def _encrypt_password(self, password):
         """Simple encryption for passwords (base64 encoding)"""
@@ -55,11 +130,13 @@ class ConfigManager:
             }
         }
         
-        if self.config_file.exists():
+        file_state = self._stat_file()
+        if file_state is not None:
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     config = json.load(f)
                     # Don't decrypt passwords - assume they're already in plain text
+                    self._file_state = file_state
                     print(f"✅ Loaded configuration from {self.config_file}")
                     return config
             except Exception as e:
@@ -73,7 +150,7 @@ class ConfigManager:
     def save_config(self, config=None):
         """Save configuration to JSON file with encrypted passwords"""
         if config is None:
-            config = self.config
+            config = self._config
         
         # Create a copy for saving (to encrypt passwords)
         save_config = json.loads(json.dumps(config))
@@ -87,8 +164,9 @@ class ConfigManager:
             email_config["sender_password"] = self._encrypt_password(email_config.get("sender_password", ""))
         
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(save_config, f, indent=2, ensure_ascii=False)
+            with self._lock:
+                self._write_file(save_config)
+                self._config = config
             print(f"✅ Configuration saved to {self.config_file}")
             return True
         except Exception as e:
@@ -110,80 +188,163 @@ class ConfigManager:
     def set(self, key, value):
         """Set a configuration value using dot notation and save"""
         keys = key.split('.')
-        config = self.config
-        
-        # Navigate to the parent of the target key
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        
-        # Set the value
-        config[keys[-1]] = value
-        
-        # Save the configuration
-        return self.save_config()
+        with self._lock:
+            # Copy on write: readers may still hold the current snapshot
+            new_config = json.loads(json.dumps(self.config))
+            config = new_config
+            
+            # Navigate to the parent of the target key
+            for k in keys[:-1]:
+                if k not in config:
+                    config[k] = {}
+                config = config[k]
+            
+            # Set the value
+            config[keys[-1]] = value
+            
+            # Save the configuration
+            return self.save_config(new_config)
     
     def update_automated_reports_config(self, updates):
         """Update multiple automated reports settings at once"""
-        if "automated_reports" not in self.config:
-            self.config["automated_reports"] = {}
-        
-        for key, value in updates.items():
-            self.config["automated_reports"][key] = value
-        
         # Save without encryption (direct save)
         try:
-            # Create a copy for saving without encryption
-            save_config = json.loads(json.dumps(self.config))
-            
-            # Ensure passwords are not encrypted by directly using the values from updates
-            if "automated_reports" in save_config:
-                odoo_config = save_config["automated_reports"].get("odoo_connection", {})
-                email_config = save_config["automated_reports"].get("email_settings", {})
+            with self._lock:
+                # Copy on write: readers may still hold the current snapshot
+                new_config = json.loads(json.dumps(self.config))
+                section = new_config.setdefault("automated_reports", {})
+                for key, value in updates.items():
+                    section[key] = value
                 
-                # Use the original values from updates to avoid encryption
-                if "odoo_connection" in updates:
-                    odoo_config.update(updates["odoo_connection"])
-                if "email_settings" in updates:
-                    email_config.update(updates["email_settings"])
-            
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(save_config, f, indent=2, ensure_ascii=False)
+                self._write_file(new_config)
+                self._config = new_config
             print(f"✅ Configuration saved to {self.config_file}")
             return True
         except Exception as e:
             print(f"❌ Error saving configuration: {str(e)}")
             return False
     
-    def is_time_to_send_report(self):
-        """Check if it's time to send the daily report"""
-        if not self.get("automated_reports.enabled", False):
-            return False
+    def get_report_profiles(self):
+        """Report profiles (one per Odoo database/recipient), each merged over the automated_reports defaults
         
+        automated_reports.profiles is a list of partial profiles with a 'name'; keys they
+        leave out (email_settings, recipient_email, ...) come from the automated_reports
+        section. Without profiles the section itself is the single 'default' profile.
+        """
+        section = self.get_decrypted_config().get("automated_reports", {})
+        defaults = {key: value for key, value in section.items() if key != "profiles"}
+        profiles = section.get("profiles") or []
+        if not profiles:
+            return [dict(defaults, name="default")]
+        
+        merged = []
+        for index, profile in enumerate(profiles):
+            merged_profile = dict(defaults, last_sent=None, last_failed_attempt=None)
+            for key, value in profile.items():
+                if isinstance(value, dict) and isinstance(defaults.get(key), dict):
+                    merged_profile[key] = dict(defaults[key], **value)
+                else:
+                    merged_profile[key] = value
+            merged_profile.setdefault("name", f"profile-{index + 1}")
+            merged.append(merged_profile)
+        return merged
+    
+    def get_report_profile(self, name=None):
+        """One merged report profile by name (the first one if name is None), or None"""
+        profiles = self.get_report_profiles()
+        if name is None:
+            return profiles[0]
+        return next((profile for profile in profiles if profile["name"] == name), None)
+    
+    def get_pending_report_profiles(self, now=None):
+        """Enabled profiles whose report hasn't been sent today"""
+        today = (now or datetime.now()).strftime("%Y-%m-%d")
+        return [profile for profile in self.get_report_profiles()
+                if profile.get("enabled", True) and profile.get("last_sent") != today]
+    
+    def get_due_report_profiles(self, now=None, retry_minutes=REPORT_RETRY_MINUTES):
+        """Pending profiles that didn't fail within the last retry_minutes"""
+        now = now or datetime.now()
+        retry_after = now - timedelta(minutes=retry_minutes)
+        due = []
+        for profile in self.get_pending_report_profiles(now):
+            try:
+                failed_at = datetime.fromisoformat(profile.get("last_failed_attempt") or "")
+            except ValueError:
+                failed_at = None
+            if failed_at is None or failed_at <= retry_after:
+                due.append(profile)
+        return due
+    
+    def get_report_time_on(self, day):
+        """Datetime of the configured report time on a given date"""
         report_time = self.get("automated_reports.report_time", "09:00")
-        current_time = datetime.now().strftime("%H:%M")
+        try:
+            hour, minute = (int(part) for part in report_time.split(":"))
+        except ValueError:
+            hour, minute = 9, 0
+        return datetime(day.year, day.month, day.day, hour, minute)
+    
+    def get_next_report_time(self, now=None):
+        """Next time the daily report should fire (today's time if it's still due)"""
+        now = now or datetime.now()
+        todays_run = self.get_report_time_on(now)
+        if not self.get_pending_report_profiles(now):
+            return todays_run + timedelta(days=1)
+        return todays_run
+    
+    def is_time_to_send_report(self, now=None, retry_minutes=REPORT_RETRY_MINUTES):
+        """Check if it's time to send the daily report
         
-        # Check if current time matches report time
-        if current_time == report_time:
-            # Check if we already sent today
-            last_sent = self.get("automated_reports.last_sent")
-            today = datetime.now().strftime("%Y-%m-%d")
-            
-            if last_sent != today:
-                return True
+        The report is due once today's report time has passed and it wasn't sent today
+        (for every profile), so a run that missed the exact minute catches up on the next check.
+        A profile whose last attempt failed waits retry_minutes before it is due again.
+        """
+        if not self.get("automated_reports.enabled", False):
+            return False
+        
+        now = now or datetime.now()
+        if not self.get_due_report_profiles(now, retry_minutes):
+            return False
         
-        return False
+        return now >= self.get_report_time_on(now)
     
-    def mark_report_sent(self):
-        """Mark that the report was sent today"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        return self.set("automated_reports.last_sent", today)
+    def mark_report_sent(self, profile_names=None):
+        """Mark that the report was sent today (for the given profiles when profiles are configured)"""
+        return self._mark_report_profiles("last_sent", datetime.now().strftime("%Y-%m-%d"), profile_names)
+    
+    def mark_report_failed(self, profile_names=None, now=None):
+        """Record a failed send so the next attempt waits for the retry delay (see get_due_report_profiles)"""
+        return self._mark_report_profiles("last_failed_attempt", (now or datetime.now()).isoformat(timespec="seconds"), profile_names)
+    
+    def _mark_report_profiles(self, key, value, profile_names=None):
+        """Set a report status key on the given profiles (or on the section when there are no profiles)"""
+        profiles = self.get("automated_reports.profiles") or []
+        if not profiles:
+            # Same save path as the Settings page, which keeps passwords in the form load_config expects
+            return self.update_automated_reports_config({key: value})
+        
+        profiles = json.loads(json.dumps(profiles))
+        for index, profile in enumerate(profiles):
+            if profile_names is None or profile.get("name", f"profile-{index + 1}") in profile_names:
+                profile[key] = value
+        return self.update_automated_reports_config({"profiles": profiles})
     
     def get_decrypted_config(self):
-        """Get configuration with decrypted passwords for use in scripts"""
+        """Get configuration with decrypted passwords for use in scripts (read-only snapshot)"""
         # self.config already has decrypted passwords from load_config()
-        return json.loads(json.dumps(self.config))
+        return self.config
+
+_config_managers = {}
+_config_managers_lock = threading.Lock()
+
+def get_config_manager(config_file="automated_reports_config.json"):
+    """Process-wide ConfigManager for a config file, created on first use"""
+    with _config_managers_lock:
+        config_manager = _config_managers.get(config_file)
+        if config_manager is None:
+            config_manager = _config_managers[config_file] = ConfigManager(config_file)
+        return config_manager
 
 # Test the configuration manager
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Connection registry for the Odoo Invoice Follow-Up Manager backend
+Holds the worker-local connection entries (connector + cached invoices) with
+idle-TTL eviction, a cap on the number of connections and a memory budget for
+cached invoices, evicting the least recently used entries first.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+# Entry keys holding the cached dataset (dropped when the memory budget is exceeded)
+CACHE_KEYS = ('cached_invoices', 'invoice_index')
+
+# Minimum seconds between idle sweeps triggered by registry access
+SWEEP_INTERVAL_SECONDS = 30
+
+
+def estimate_invoices_size(invoices, sample_size=50):
+    """Rough in-memory size of an invoice list in bytes, extrapolated from a sample of rows"""
+    if not invoices:
+        return 0
+    sample = invoices[:sample_size]
+    sample_bytes = 0
+    for invoice in sample:
+        sample_bytes += sys.getsizeof(invoice)
+        for key, value in invoice.items():
+            sample_bytes += sys.getsizeof(key) + sys.getsizeof(value)
+    # The invoice index roughly doubles the footprint (lookups, row hashes, summaries)
+    return int(sample_bytes / len(sample) * len(invoices) * 2)
+
+
+def normalize_connection_id(connection_id):
+    """Case- and whitespace-insensitive form of a connection id"""
+    return (connection_id or '').strip().lower()
+
+
+class ConnectionRegistry:
+    """Thread-safe LRU map of connection id -> connection entry dict"""
+
+    def __init__(self, idle_ttl_seconds=3600, max_connections=100, max_cache_bytes=256 * 1024 * 1024,
+                 on_evict=None, on_cache_drop=None):
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_connections = max_connections
+        self.max_cache_bytes = max_cache_bytes
+        self.on_evict = on_evict
+        self.on_cache_drop = on_cache_drop
+        self._entries = OrderedDict()   # connection_id -> entry, least recently used first
+        self._last_access = {}
+        self._cache_bytes = {}
+        self._aliases = {}              # normalized id -> connection_id
+        self._total_cache_bytes = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+
+    def __contains__(self, connection_id):
+        with self._lock:
+            return connection_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def items(self):
+        with self._lock:
+            return list(self._entries.items())
+
+    def get(self, connection_id, default=None):
+        """Entry for an exact connection id (marks it as recently used)"""
+        self._maybe_sweep()
+        with self._lock:
+            entry = self._entries.get(connection_id)
+            if entry is None:
+                return default
+            self._touch(connection_id)
+            return entry
+
+    def peek(self, connection_id, default=None):
+        """Entry for an exact connection id without marking it as used (background work)"""
+        with self._lock:
+            return self._entries.get(connection_id, default)
+
+    def __getitem__(self, connection_id):
+        entry = self.get(connection_id)
+        if entry is None:
+            raise KeyError(connection_id)
+        return entry
+
+    def __setitem__(self, connection_id, entry):
+        evicted = []
+        with self._lock:
+            if connection_id in self._entries:
+                self._release_cache(connection_id)
+            self._entries[connection_id] = entry
+            self._aliases[normalize_connection_id(connection_id)] = connection_id
+            self._touch(connection_id)
+            while len(self._entries) > self.max_connections:
+                oldest_id = next(iter(self._entries))
+                evicted.append((oldest_id, self._remove(oldest_id), 'capacity'))
+        self._notify(evicted)
+
+    def pop(self, connection_id, default=None):
+        with self._lock:
+            if connection_id not in self._entries:
+                return default
+            return self._remove(connection_id)
+
+    def clear(self):
+        with self._lock:
+            for connection_id in list(self._entries):
+                self._remove(connection_id)
+
+    def resolve(self, connection_id):
+        """Registered id matching a possibly differently formatted id, or None
+
+        Tries the exact id, then a case-insensitive match, then the leading
+        '_'-separated parts of the id (ids sent with an extra suffix).
+        """
+        if not connection_id:
+            return None
+        with self._lock:
+            if connection_id in self._entries:
+                return connection_id
+            normalized = normalize_connection_id(connection_id)
+            if normalized in self._aliases:
+                return self._aliases[normalized]
+            parts = normalized.split('_')
+            for end in range(len(parts) - 1, 0, -1):
+                candidate = self._aliases.get('_'.join(parts[:end]))
+                if candidate is not None:
+                    return candidate
+        return None
+
+    def set_cache_size(self, connection_id, size_bytes):
+        """Record the size of an entry's cached dataset and enforce the memory budget
+
+        Entries whose cache is dropped for the budget are passed to on_cache_drop.
+        """
+        evicted = []
+        with self._lock:
+            if connection_id not in self._entries:
+                return
+            self._release_cache(connection_id, drop=False)
+            self._cache_bytes[connection_id] = size_bytes
+            self._total_cache_bytes += size_bytes
+
+            # Drop the caches of the least recently used entries, never the one just stored
+            for other_id in list(self._entries):
+                if self._total_cache_bytes <= self.max_cache_bytes:
+                    break
+                if other_id != connection_id and self._cache_bytes.get(other_id):
+                    self._release_cache(other_id)
+                    evicted.append((other_id, self._entries[other_id]))
+        for other_id, entry in evicted:
+            print(f"🧹 Dropped cached invoices for {other_id} (cache memory budget {self.max_cache_bytes // (1024 * 1024)} MB)")
+            if self.on_cache_drop:
+                try:
+                    self.on_cache_drop(other_id, entry)
+                except Exception as e:
+                    print(f"⚠️ Error cleaning up dropped cache of {other_id}: {e}")
+
+    def drop_cache(self, connection_id):
+        """Drop an entry's cached dataset but keep the connection"""
+        with self._lock:
+            if connection_id in self._entries:
+                self._release_cache(connection_id)
+
+    def sweep(self):
+        """Evict entries idle for longer than the TTL"""
+        evicted = []
+        now = time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            for connection_id in list(self._entries):
+                if now - self._last_access[connection_id] <= self.idle_ttl_seconds:
+                    break  # Entries are in access order, the rest are newer
+                evicted.append((connection_id, self._remove(connection_id), 'idle'))
+        self._notify(evicted)
+        return [connection_id for connection_id, _, _ in evicted]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connections': len(self._entries),
+                'maxConnections': self.max_connections,
+                'cacheBytes': self._total_cache_bytes,
+                'maxCacheBytes': self.max_cache_bytes,
+                'idleTtlSeconds': self.idle_ttl_seconds
+            }
+
+    def _touch(self, connection_id):
+        self._entries.move_to_end(connection_id)
+        self._last_access[connection_id] = time.monotonic()
+
+    def _release_cache(self, connection_id, drop=True):
+        self._total_cache_bytes -= self._cache_bytes.pop(connection_id, 0)
+        if drop:
+            entry = self._entries[connection_id]
+            for key in CACHE_KEYS:
+                entry.pop(key, None)
+
+    def _remove(self, connection_id):
+        self._release_cache(connection_id, drop=False)
+        self._last_access.pop(connection_id, None)
+        normalized = normalize_connection_id(connection_id)
+        if self._aliases.get(normalized) == connection_id:
+            del self._aliases[normalized]
+        return self._entries.pop(connection_id)
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep >= SWEEP_INTERVAL_SECONDS:
+            self.sweep()
+
+    def _notify(self, evicted):
+        for connection_id, entry, reason in evicted:
+            print(f"🧹 Evicted connection {connection_id} ({reason})")
+            if self.on_evict and entry is not None:
+                try:
+                    self.on_evict(connection_id, entry, reason)
+                except Exception as e:
+                    print(f"⚠️ Error cleaning up evicted connection {connection_id}: {e}")
+
+
+def create_connection_registry(on_evict=None, on_cache_drop=None):
+    """Registry configured from CONNECTION_IDLE_TTL_SECONDS, MAX_CONNECTIONS and CONNECTION_CACHE_MAX_MB"""
+    return ConnectionRegistry(
+        idle_ttl_seconds=int(os.environ.get('CONNECTION_IDLE_TTL_SECONDS', 3600)),
+        max_connections=int(os.environ.get('MAX_CONNECTIONS', 100)),
+        max_cache_bytes=int(os.environ.get('CONNECTION_CACHE_MAX_MB', 256)) * 1024 * 1024,
+        on_evict=on_evict,
+        on_cache_drop=on_cache_drop
+    )
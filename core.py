@@ -4,7 +4,6 @@ Core functionality for Odoo Invoice Follow-Up Manager
 Contains classes and functions without Streamlit dependencies
 """
 
-import pandas as pd
 from datetime import datetime, timedelta
 import json
 import os
@@ -22,18 +21,17 @@ import io
 import requests
 import hashlib
 import uuid
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.chrome.options import Options
-    from webdriver_manager.chrome import ChromeDriverManager
-    from webdriver_manager.firefox import GeckoDriverManager
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
+import contextvars
+import threading
+import importlib.util
+
+from rpc_metrics import rpc_metrics, result_records
+
+# Selenium/webdriver_manager are only needed for browser-based PDF generation, so only
+# check that they are installed here; import them in the code path that uses them
+SELENIUM_AVAILABLE = (importlib.util.find_spec('selenium') is not None
+                      and importlib.util.find_spec('webdriver_manager') is not None)
+if not SELENIUM_AVAILABLE:
     print("⚠️  Selenium not available - PDF generation via browser disabled")
 
 # Load environment variables
@@ -45,6 +43,8 @@ class EmailThreadManager:
     def __init__(self, thread_file="email_threads.json"):
         """Initialize the thread manager with a JSON file to store thread information"""
         self.thread_file = thread_file
+        # Guards self.threads and the file: scheduled report groups send in parallel
+        self._lock = threading.RLock()
         self.threads = self._load_threads()
     
     def _load_threads(self):
@@ -59,12 +59,21 @@ class EmailThreadManager:
             return {}
     
     def _save_threads(self):
-        """Save thread information to file"""
+        """Save thread information to file (callers hold the lock)"""
+        temp_path = None
         try:
-            with open(self.thread_file, 'w', encoding='utf-8') as f:
+            # Write a temporary file and rename it so a crash never leaves a truncated file
+            directory = os.path.dirname(os.path.abspath(self.thread_file))
+            fd, temp_path = tempfile.mkstemp(prefix='.email_threads.', suffix='.tmp', dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 json.dump(self.threads, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.thread_file)
+            temp_path = None
         except Exception as e:
             print(f"Warning: Could not save thread file: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
     
     def get_thread_id(self, client_name, client_email, company_name=None):
         """Get or create a thread ID for a specific client"""
@@ -85,47 +94,53 @@ class EmailThreadManager:
         
         sanitized_company = sanitize_company_name(company_name)
         
-        if client_key not in self.threads:
-            # Create new thread
-            thread_id = f"<{thread_hash}@{sanitized_company}.com>"
-            self.threads[client_key] = {
-                'thread_id': thread_id,
-                'client_name': client_name,
-                'client_email': client_email,
-                'company_name': company_name,
-                'created_date': datetime.now().isoformat(),
-                'message_count': 0
-            }
-            self._save_threads()
-        else:
-            # Update message count
-            self.threads[client_key]['message_count'] += 1
-            self._save_threads()
-        
-        return self.threads[client_key]['thread_id']
+        with self._lock:
+            if client_key not in self.threads:
+                # Create new thread
+                thread_id = f"<{thread_hash}@{sanitized_company}.com>"
+                self.threads[client_key] = {
+                    'thread_id': thread_id,
+                    'client_name': client_name,
+                    'client_email': client_email,
+                    'company_name': company_name,
+                    'created_date': datetime.now().isoformat(),
+                    'message_count': 0
+                }
+                self._save_threads()
+            else:
+                # Update message count
+                self.threads[client_key]['message_count'] += 1
+                self._save_threads()
+            
+            return self.threads[client_key]['thread_id']
     
     def get_thread_info(self, client_name, client_email, company_name=None):
         """Get thread information for a client"""
         client_key = f"{client_name}_{client_email}_{company_name or 'default'}"
-        return self.threads.get(client_key, {})
+        with self._lock:
+            return dict(self.threads.get(client_key, {}))
     
     def update_thread_subject(self, client_name, client_email, subject, company_name=None):
         """Update the subject line for a thread to maintain context"""
         client_key = f"{client_name}_{client_email}_{company_name or 'default'}"
-        if client_key in self.threads:
-            self.threads[client_key]['last_subject'] = subject
-            self._save_threads()
+        with self._lock:
+            if client_key in self.threads:
+                self.threads[client_key]['last_subject'] = subject
+                self._save_threads()
     
     def clear_threads(self):
         """Clear all thread data (for testing purposes)"""
-        self.threads = {}
-        self._save_threads()
+        with self._lock:
+            self.threads = {}
+            self._save_threads()
         print("🧹 All email threads cleared")
     
     def get_thread_summary(self):
         """Get a summary of all threads"""
         summary = []
-        for client_key, thread_info in self.threads.items():
+        with self._lock:
+            threads = list(self.threads.items())
+        for client_key, thread_info in threads:
             summary.append({
                 'client_key': client_key,
                 'client_name': thread_info.get('client_name', ''),
@@ -197,8 +212,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(auth_url, json=auth_data)
-            result = response.json()
+            response, result = self._post_rpc(auth_url, auth_data)
             
             if result.get('result') and result['result'].get('uid'):
                 self.uid = result['result']['uid']
@@ -220,11 +234,20 @@ class OdooConnector:
             print(f"Connection error: {str(e)}")
             return False
     
-    def get_overdue_invoices(self, progress_callback=None):
-        """Fetch overdue invoices from Odoo with ultra-optimized batch processing"""
+    @rpc_metrics.operation()
+    def get_overdue_invoices(self, progress_callback=None, modified_since=None, raise_errors=False):
+        """Fetch overdue invoices from Odoo with ultra-optimized batch processing
+        
+        With modified_since (Odoo UTC datetime string), only invoices written after it are
+        fetched, including ones paid since (amount_due 0) so callers can drop them.
+        Failures return [] unless raise_errors is set, so callers that replace a cached
+        dataset can tell a failed fetch from "no overdue invoices".
+        """
         try:
             if not self.uid:
                 if not self.connect():
+                    if raise_errors:
+                        raise Exception("Could not authenticate with Odoo")
                     return []
             
             print(f"🚀 Starting ultra-optimized invoice fetch...")
@@ -232,6 +255,17 @@ class OdooConnector:
             # Search for overdue invoices with optimized query
             print(f"🔍 Debug: Searching for invoices with residual amounts > 0")
             
+            if modified_since:
+                search_domain = [
+                    ("move_type", "=", "out_invoice"),
+                    ("write_date", ">", modified_since)  # Incremental: paid invoices included
+                ]
+            else:
+                search_domain = [
+                    ("move_type", "=", "out_invoice"),
+                    ("amount_residual", ">", 0)  # Pre-filter zero amounts
+                ]
+            
             search_url = f"{self.url}/web/dataset/call_kw"
             search_data = {
                 "jsonrpc": "2.0",
@@ -240,10 +274,7 @@ class OdooConnector:
                     "model": "account.move",
                     "method": "search_read",
                     "args": [
-                        [
-                            ("move_type", "=", "out_invoice"),
-                            ("amount_residual", ">", 0)  # Pre-filter zero amounts
-                        ]
+                        search_domain
                     ],
                     "kwargs": {
                         "fields": [
@@ -258,15 +289,20 @@ class OdooConnector:
             
             print(f"🔍 Debug: Search criteria: {search_data['params']['args'][0]}")
             
-            response = self.session.post(search_url, json=search_data)
-            result = response.json()
+            response, result = self._post_rpc(search_url, search_data)
             
             # Debug: Log the raw response to see what's happening
             print(f"🔍 Debug: Odoo API response status: {response.status_code}")
             print(f"🔍 Debug: Odoo API response: {result}")
             
+            if modified_since and 'result' in result and not result['result']:
+                print(f"✅ No invoices changed since {modified_since}")
+                return []
+            
             if not result.get('result'):
                 print(f"❌ No result from Odoo API. Error: {result.get('error', 'Unknown error')}")
+                if raise_errors and 'result' not in result:
+                    raise Exception(f"Odoo invoice search failed: {result.get('error', 'Unknown error')}")
                 return []
             
             raw_invoices = result['result']
@@ -281,7 +317,10 @@ class OdooConnector:
                 print(f"🔍 Debug: Sample invoice data: {first_invoice}")
             
             # Filter out zero-amount invoices first
-            valid_invoices = [inv for inv in raw_invoices if inv['amount_total'] > 0 and inv['amount_residual'] > 0]
+            if modified_since:
+                valid_invoices = [inv for inv in raw_invoices if inv['amount_total'] > 0]
+            else:
+                valid_invoices = [inv for inv in raw_invoices if inv['amount_total'] > 0 and inv['amount_residual'] > 0]
             print(f"📋 Processing {len(valid_invoices)} valid invoices...")
             
             # Collect all unique IDs for batch fetching
@@ -307,21 +346,24 @@ class OdooConnector:
             # Start parallel threads
             if partner_ids:
                 partner_thread = threading.Thread(
-                    target=lambda: partner_queue.put(self._get_partners_batch(partner_ids))
+                    target=contextvars.copy_context().run,  # so its RPC counts toward this operation
+                    args=(lambda: partner_queue.put(self._get_partners_batch(partner_ids)),)
                 )
                 partner_thread.daemon = True
                 partner_thread.start()
             
             if currency_ids:
                 currency_thread = threading.Thread(
-                    target=lambda: currency_queue.put(self._get_currencies_batch(currency_ids))
+                    target=contextvars.copy_context().run,  # so its RPC counts toward this operation
+                    args=(lambda: currency_queue.put(self._get_currencies_batch(currency_ids)),)
                 )
                 currency_thread.daemon = True
                 currency_thread.start()
             
             if company_ids:
                 company_thread = threading.Thread(
-                    target=lambda: company_queue.put(self._get_companies_batch(company_ids))
+                    target=contextvars.copy_context().run,  # so its RPC counts toward this operation
+                    args=(lambda: company_queue.put(self._get_companies_batch(company_ids)),)
                 )
                 company_thread.daemon = True
                 company_thread.start()
@@ -390,6 +432,7 @@ class OdooConnector:
                 invoice_data = {
                     'id': invoice['id'],
                     'invoice_number': invoice['name'],
+                    'partner_id': partner_id,
                     'client_name': partner['name'],
                     'client_email': partner.get('email', ''),
                     'amount_total': invoice['amount_total'],
@@ -425,8 +468,191 @@ class OdooConnector:
             
         except Exception as e:
             print(f"Error fetching invoices: {str(e)}")
+            if raise_errors:
+                raise
             return []
     
+    def _post_rpc(self, url, payload):
+        """POST a JSON-RPC payload and parse the reply, recording the call in rpc_metrics
+        
+        Returns (response, parsed JSON). The model/method come from the payload params
+        (session calls such as authenticate are recorded under the 'session' model).
+        """
+        started = time.perf_counter()
+        response = self.session.post(url, json=payload)
+        result = None
+        try:
+            result = response.json()
+            return response, result
+        finally:
+            params = payload.get('params', {})
+            rpc_metrics.record(
+                params.get('model', 'session'), params.get('method', url.rsplit('/', 1)[-1]),
+                time.perf_counter() - started,
+                records=result_records(result.get('result') if isinstance(result, dict) else None),
+                size=len(response.content)
+            )
+    
+    def _call_kw(self, model, method, args, kwargs=None):
+        """Call an Odoo model method over JSON-RPC and return its result (raises on RPC errors)"""
+        _, result = self._post_rpc(f"{self.url}/web/dataset/call_kw", {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"model": model, "method": method, "args": args, "kwargs": kwargs or {}}
+        })
+        if 'error' in result:
+            raise Exception(result['error'].get('data', {}).get('message') or result['error'].get('message', 'Unknown error'))
+        return result.get('result')
+    
+    def _get_partner_names(self, partner_ids):
+        """Partner names by id, via the batched partner cache"""
+        self._get_partners_batch(partner_ids)
+        return {pid: self._partners_cache.get(pid, {}).get('name', 'Unknown') for pid in partner_ids}
+    
+    @rpc_metrics.operation()
+    def get_overdue_aggregates(self):
+        """Per-client overdue totals computed by Odoo (read_group) instead of from every invoice
+        
+        Returns one row per (partner, due date) with invoice_count and amount_due, so the
+        number of rows grows with clients and billing dates rather than with invoices.
+        """
+        if not self.uid:
+            if not self.connect():
+                return []
+        
+        groups = self._call_kw("account.move", "read_group", [
+            [("move_type", "=", "out_invoice"), ("amount_residual", ">", 0)],
+            ["amount_residual:sum", "amount_total:sum"],
+            ["partner_id", "invoice_date_due:day"]
+        ], {"lazy": False})
+        
+        partner_ids = list(set(group['partner_id'][0] for group in groups if group.get('partner_id')))
+        partner_names = self._get_partner_names(partner_ids)
+        
+        aggregates = []
+        for group in groups:
+            if not group.get('amount_total') or group['amount_total'] <= 0:
+                continue
+            partner_id = group['partner_id'][0] if group.get('partner_id') else None
+            aggregates.append({
+                'partner_id': partner_id,
+                'client_name': partner_names.get(partner_id, 'Unknown'),
+                'due_date': self._group_day(group, 'invoice_date_due'),
+                'invoice_count': group['__count'],
+                'amount_due': group['amount_residual']
+            })
+        
+        print(f"✅ Aggregated overdue invoices into {len(aggregates)} client/due date groups")
+        return aggregates
+    
+    @rpc_metrics.operation()
+    def get_overdue_dataset_version(self):
+        """Cheap fingerprint of the overdue invoice set: open invoice count plus latest write_date
+
+        Changes whenever an overdue invoice is created, paid, edited or removed, without
+        fetching the invoices themselves (two small RPCs).
+        """
+        if not self.uid:
+            if not self.connect():
+                return None
+
+        domain = [("move_type", "=", "out_invoice"), ("amount_residual", ">", 0)]
+        count = self._call_kw("account.move", "search_count", [domain])
+        latest = self._call_kw("account.move", "search_read", [domain], {
+            "fields": ["write_date"], "order": "write_date desc", "limit": 1
+        })
+        latest_write = latest[0]['write_date'] if latest else ''
+        return f"{count}-{latest_write}"
+
+    def _group_day(self, group, field):
+        """ISO date of a read_group ':day' group (from __range, or the group's __domain on older Odoo)"""
+        day_range = group.get('__range', {}).get(f"{field}:day")
+        if day_range:
+            return day_range['from'][:10]
+        for term in group.get('__domain', []):
+            if isinstance(term, (list, tuple)) and len(term) == 3 and term[0] == field and term[1] == '>=':
+                return str(term[2])[:10]
+        return None
+    
+    # Fields read for invoice-level report/export rows
+    INVOICE_ROW_FIELDS = [
+        "id", "name", "partner_id", "amount_total", "amount_residual", "invoice_date",
+        "invoice_date_due", "currency_id", "company_id", "invoice_origin"
+    ]
+    
+    @rpc_metrics.operation()
+    def get_overdue_invoice_rows(self):
+        """Invoice-level rows for report listings, without the per-invoice enrichment of get_overdue_invoices
+        
+        One search_read; client names and emails come from the partner cache, currency symbols from one
+        batched currency read and company names from the invoice's company_id.
+        """
+        if not self.uid:
+            if not self.connect():
+                return []
+        
+        records = self._call_kw("account.move", "search_read", [
+            [("move_type", "=", "out_invoice"), ("amount_residual", ">", 0)]
+        ], {"fields": self.INVOICE_ROW_FIELDS})
+        rows = self._build_invoice_rows(records)
+        
+        print(f"✅ Fetched {len(rows)} invoice rows for the report")
+        return rows
+    
+    def iter_overdue_invoice_rows(self, page_size=2000):
+        """Yield pages of the same rows as get_overdue_invoice_rows, for streaming exports
+        
+        Pages are keyed on invoice id (id > last id seen) rather than offsets, so invoices
+        paid during the export don't shift later pages.
+        """
+        if not self.uid:
+            if not self.connect():
+                return
+        
+        last_id = 0
+        while True:
+            records = self._call_kw("account.move", "search_read", [
+                [("move_type", "=", "out_invoice"), ("amount_residual", ">", 0), ("id", ">", last_id)]
+            ], {"fields": self.INVOICE_ROW_FIELDS, "order": "id asc", "limit": page_size})
+            if not records:
+                return
+            last_id = records[-1]['id']
+            yield self._build_invoice_rows(records)
+            if len(records) < page_size:
+                return
+    
+    def _build_invoice_rows(self, records):
+        """Report rows for account.move records read with INVOICE_ROW_FIELDS"""
+        records = [record for record in records if record['amount_total'] > 0]
+        
+        # Names and emails come from the same batched partner read
+        self._get_partners_batch(list(set(r['partner_id'][0] for r in records if r.get('partner_id'))))
+        currency_ids = list(set(r['currency_id'][0] for r in records if r.get('currency_id')))
+        self._get_currencies_batch(currency_ids)
+        
+        today = datetime.now()
+        rows = []
+        for record in records:
+            partner_id = record['partner_id'][0] if record.get('partner_id') else None
+            currency_id = record['currency_id'][0] if record.get('currency_id') else None
+            partner = self._partners_cache.get(partner_id, {})
+            rows.append({
+                'id': record['id'],
+                'invoice_number': record['name'],
+                'partner_id': partner_id,
+                'client_name': partner.get('name', 'Unknown'),
+                'client_email': partner.get('email') or '',
+                'amount_total': record['amount_total'],
+                'amount_due': record['amount_residual'],
+                'invoice_date': record['invoice_date'],
+                'due_date': record['invoice_date_due'],
+                'days_overdue': (today - datetime.strptime(record['invoice_date_due'], "%Y-%m-%d")).days,
+                'currency_symbol': self._currencies_cache.get(currency_id, {}).get('symbol', '$'),
+                'company_name': record['company_id'][1] if record.get('company_id') else self._get_company_from_invoice_number(record['name']),
+                'origin': record.get('invoice_origin', '')
+            })
+        return rows
+    
     def _get_company_from_invoice_number(self, invoice_number):
         """Get company name from invoice number pattern (fast local processing)"""
         if invoice_number.startswith('PLFZ/'):
@@ -451,6 +677,21 @@ class OdooConnector:
         import time
         self._cache_timestamp = time.time()
     
+    def export_reference_caches(self):
+        """Partner, currency and company caches in a JSON-friendly form (for warm starts)"""
+        return {
+            'partners': list(self._partners_cache.values()),
+            'currencies': list(self._currencies_cache.values()),
+            'companies': list(self._companies_cache.values())
+        }
+    
+    def import_reference_caches(self, caches):
+        """Restore caches saved by export_reference_caches; they count as fresh for one cache period"""
+        self._partners_cache.update({record['id']: record for record in caches.get('partners', [])})
+        self._currencies_cache.update({record['id']: record for record in caches.get('currencies', [])})
+        self._companies_cache.update({record['id']: record for record in caches.get('companies', [])})
+        self._update_cache_timestamp()
+    
     def _get_partners_batch(self, partner_ids):
         """Batch fetch multiple partners in one API call with caching"""
         try:
@@ -481,8 +722,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(partner_url, json=partner_data)
-            result = response.json()
+            response, result = self._post_rpc(partner_url, partner_data)
             
             partners_cache = {}
             if result.get('result'):
@@ -531,8 +771,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(currency_url, json=currency_data)
-            result = response.json()
+            response, result = self._post_rpc(currency_url, currency_data)
             
             currencies_cache = {}
             if result.get('result'):
@@ -581,8 +820,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(company_url, json=company_data)
-            result = response.json()
+            response, result = self._post_rpc(company_url, company_data)
             
             companies_cache = {}
             if result.get('result'):
@@ -616,8 +854,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(partner_url, json=partner_data)
-            result = response.json()
+            response, result = self._post_rpc(partner_url, partner_data)
             
             print(f"🔍 Debug: Partner API response for ID {partner_id}: {result}")
             
@@ -646,8 +883,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(currency_url, json=currency_data)
-            result = response.json()
+            response, result = self._post_rpc(currency_url, currency_data)
             
             if result.get('result') and result['result']:
                 return result['result'][0]
@@ -672,8 +908,7 @@ class OdooConnector:
                 }
             }
             
-            response = self.session.post(company_url, json=company_data)
-            result = response.json()
+            response, result = self._post_rpc(company_url, company_data)
             
             print(f"🔍 Debug: Company API response for ID {company_id}: {result}")
             
@@ -692,14 +927,19 @@ class InvoicePDFGenerator:
         self.connector = odoo_connector
         self.driver = None
     
-    def generate_client_invoices_pdf(self, client_name, partner_id, progress_callback=None):
-        """Generate PDF with all invoices for a client using API-first approach"""
+    @rpc_metrics.operation()
+    def generate_client_invoices_pdf(self, client_name, partner_id, progress_callback=None, invoice_ids=None):
+        """Generate PDF with all invoices for a client using API-first approach
+        
+        If invoice_ids is given (e.g. resolved from cached invoices) the partner and
+        invoice searches are skipped and only the report is rendered.
+        """
         try:
             if progress_callback:
                 progress_callback(f"Generating PDF for {client_name}...", 0.1)
             
             # Try API method first (more reliable and faster)
-            pdf_data = self._generate_pdf_via_api(client_name, partner_id, progress_callback)
+            pdf_data = self._generate_pdf_via_api(client_name, partner_id, progress_callback, invoice_ids)
             if pdf_data:
                 if progress_callback:
                     progress_callback(f"PDF generated successfully via API for {client_name}", 1.0)
@@ -721,119 +961,144 @@ class InvoicePDFGenerator:
             print(f"Error generating PDF for {client_name}: {str(e)}")
             return None
     
-    def _generate_pdf_via_api(self, client_name, partner_id, progress_callback=None):
+    def _generate_pdf_via_api(self, client_name, partner_id, progress_callback=None, invoice_ids=None):
         """Generate PDF using direct HTTP request to Odoo (the only working method)"""
         try:
-            if progress_callback:
-                progress_callback(f"Getting partner ID for {client_name}...", 0.1)
-            
-            # First, get the partner ID if we don't have it
-            if isinstance(partner_id, str):
-                # partner_id is actually the client name, so we need to find the partner ID
-                partner_ids = self.connector.models.execute_kw(
-                    self.connector.database, self.connector.uid, self.connector.password,
-                    'res.partner', 'search',
-                    [[('name', '=', partner_id)]]
-                )
-                if not partner_ids:
-                    print(f"❌ No partner found for client: {client_name}")
-                    return None
-                partner_id = partner_ids[0]
-                print(f"✅ Found partner ID {partner_id} for client: {client_name}")
-            
-            if progress_callback:
-                progress_callback(f"Getting overdue invoice IDs for {client_name}...", 0.3)
-            
-            # Get only OVERDUE invoice IDs for this client (follow-up report criteria)
-            today = datetime.now().date()
-            invoice_ids = self.connector.models.execute_kw(
-                self.connector.database, self.connector.uid, self.connector.password,
-                'account.move', 'search',
-                [[('partner_id', '=', partner_id), 
-                  ('move_type', '=', 'out_invoice'),
-                  ('state', '=', 'posted'),
-                  ('payment_state', '!=', 'paid'),
-                  ('invoice_date_due', '<', today.isoformat())]]
-            )
+            if invoice_ids:
+                print(f"✅ Using {len(invoice_ids)} known overdue invoices for {client_name}: {invoice_ids}")
+            else:
+                invoice_ids = self._search_overdue_invoice_ids(client_name, partner_id, progress_callback)
             
             if not invoice_ids:
-                print(f"❌ No overdue invoices found for {client_name}")
                 return None
             
-            print(f"✅ Found {len(invoice_ids)} overdue invoices for {client_name}: {invoice_ids}")
-            
             if progress_callback:
                 progress_callback(f"Generating PDF for {client_name}...", 0.5)
             
-            # Direct HTTP request (the only working method)
-            if self.connector.url and invoice_ids:
-                import requests
-                
-                # Create a session to maintain cookies
-                session = requests.Session()
-                session.headers.update({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                })
-                
-                # Authenticate using Odoo v17 method
-                login_url = f"{self.connector.url}/web/session/authenticate"
-                login_data = {
-                    'jsonrpc': '2.0',
-                    'method': 'call',
-                    'params': {
-                        'db': self.connector.database,
-                        'login': self.connector.username,
-                        'password': self.connector.password
-                    }
+            return self._render_invoice_report(client_name, invoice_ids)
+            
+        except Exception as e:
+            print(f"❌ Error generating PDF for {client_name}: {str(e)}")
+            return None
+    
+    def _search_overdue_invoice_ids(self, client_name, partner_id, progress_callback=None):
+        """Look up the client's overdue invoice IDs in Odoo"""
+        if progress_callback:
+            progress_callback(f"Getting partner ID for {client_name}...", 0.1)
+        
+        # First, get the partner ID if we don't have it
+        if isinstance(partner_id, str):
+            # partner_id is actually the client name, so we need to find the partner ID
+            partner_ids = self._execute_kw('res.partner', 'search', [[('name', '=', partner_id)]])
+            if not partner_ids:
+                print(f"❌ No partner found for client: {client_name}")
+                return None
+            partner_id = partner_ids[0]
+            print(f"✅ Found partner ID {partner_id} for client: {client_name}")
+        
+        if progress_callback:
+            progress_callback(f"Getting overdue invoice IDs for {client_name}...", 0.3)
+        
+        # Get only OVERDUE invoice IDs for this client (follow-up report criteria)
+        today = datetime.now().date()
+        invoice_ids = self._execute_kw(
+            'account.move', 'search',
+            [[('partner_id', '=', partner_id), 
+              ('move_type', '=', 'out_invoice'),
+              ('state', '=', 'posted'),
+              ('payment_state', '!=', 'paid'),
+              ('invoice_date_due', '<', today.isoformat())]]
+        )
+        
+        if not invoice_ids:
+            print(f"❌ No overdue invoices found for {client_name}")
+            return None
+        
+        print(f"✅ Found {len(invoice_ids)} overdue invoices for {client_name}: {invoice_ids}")
+        return invoice_ids
+    
+    def _execute_kw(self, model, method, args):
+        """XML-RPC execute_kw on the connector's models proxy, recorded in rpc_metrics (without bytes)"""
+        started = time.perf_counter()
+        result = self.connector.models.execute_kw(
+            self.connector.database, self.connector.uid, self.connector.password, model, method, args
+        )
+        rpc_metrics.record(model, method, time.perf_counter() - started, records=result_records(result))
+        return result
+    
+    def _render_invoice_report(self, client_name, invoice_ids):
+        """Render the Odoo invoice report for the given invoice IDs"""
+        # Direct HTTP request (the only working method)
+        if self.connector.url and invoice_ids:
+            import requests
+            
+            # Create a session to maintain cookies
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            })
+            
+            # Authenticate using Odoo v17 method
+            login_url = f"{self.connector.url}/web/session/authenticate"
+            login_data = {
+                'jsonrpc': '2.0',
+                'method': 'call',
+                'params': {
+                    'db': self.connector.database,
+                    'login': self.connector.username,
+                    'password': self.connector.password
                 }
+            }
+            
+            started = time.perf_counter()
+            login_response = session.post(login_url, json=login_data, timeout=30)
+            rpc_metrics.record('session', 'authenticate', time.perf_counter() - started,
+                               records=1, size=len(login_response.content))
+            
+            if login_response.status_code == 200:
+                # Try to parse the login response
+                try:
+                    login_result = login_response.json()
+                    if login_result.get('result', {}).get('uid'):
+                        print(f"✅ Login successful for {client_name}")
+                    else:
+                        print(f"❌ Login failed for {client_name}: {login_result}")
+                        return None
+                except:
+                    print(f"❌ Could not parse login response for {client_name}")
+                    return None
                 
-                login_response = session.post(login_url, json=login_data, timeout=30)
+                # Generate PDF using the report URL
+                report_url = f"{self.connector.url}/report/pdf/account.report_invoice/{','.join(map(str, invoice_ids))}"
+                started = time.perf_counter()
+                response = session.get(report_url, timeout=30)
+                rpc_metrics.record('report', 'account.report_invoice', time.perf_counter() - started,
+                                   records=len(invoice_ids), size=len(response.content))
                 
-                if login_response.status_code == 200:
-                    # Try to parse the login response
-                    try:
-                        login_result = login_response.json()
-                        if login_result.get('result', {}).get('uid'):
-                            print(f"✅ Login successful for {client_name}")
-                        else:
-                            print(f"❌ Login failed for {client_name}: {login_result}")
-                            return None
-                    except:
-                        print(f"❌ Could not parse login response for {client_name}")
-                        return None
-                    
-                    # Generate PDF using the report URL
-                    report_url = f"{self.connector.url}/report/pdf/account.report_invoice/{','.join(map(str, invoice_ids))}"
-                    response = session.get(report_url, timeout=30)
-                    
-                    if response.status_code == 200:
-                        content_type = response.headers.get('content-type', '')
-                        if 'application/pdf' in content_type or response.content.startswith(b'%PDF'):
-                            print(f"✅ PDF generated successfully for {client_name} - Size: {len(response.content)} bytes")
-                            return response.content
-                        else:
-                            print(f"❌ HTTP request returned non-PDF content for {client_name}: {content_type}")
-                            print(f"❌ Response length: {len(response.content)} bytes")
-                            # Show first 200 characters for debugging
-                            try:
-                                print(f"❌ Response preview: {response.text[:200]}...")
-                            except:
-                                print("❌ Could not decode response text")
+                if response.status_code == 200:
+                    content_type = response.headers.get('content-type', '')
+                    if 'application/pdf' in content_type or response.content.startswith(b'%PDF'):
+                        print(f"✅ PDF generated successfully for {client_name} - Size: {len(response.content)} bytes")
+                        return response.content
                     else:
-                        print(f"❌ HTTP request failed for {client_name} with status: {response.status_code}")
+                        print(f"❌ HTTP request returned non-PDF content for {client_name}: {content_type}")
+                        print(f"❌ Response length: {len(response.content)} bytes")
+                        # Show first 200 characters for debugging
                         try:
-                            print(f"❌ Response content: {response.text[:200]}...")
+                            print(f"❌ Response preview: {response.text[:200]}...")
                         except:
-                            print("❌ Could not decode error response")
+                            print("❌ Could not decode response text")
                 else:
-                    print(f"❌ Login request failed for {client_name} with status: {login_response.status_code}")
-            
-            print(f"❌ PDF generation failed for {client_name}")
-            return None
-            
-        except Exception as e:
-            print(f"❌ Error generating PDF for {client_name}: {str(e)}")
-            return None
+                    print(f"❌ HTTP request failed for {client_name} with status: {response.status_code}")
+                    try:
+                        print(f"❌ Response content: {response.text[:200]}...")
+                    except:
+                        print("❌ Could not decode error response")
+            else:
+                print(f"❌ Login request failed for {client_name} with status: {login_response.status_code}")
+        
+        print(f"❌ PDF generation failed for {client_name}")
+        return None
 
 def get_automatic_iban_attachment(reference_company):
     """Get automatic IBAN letter attachment based on reference company"""
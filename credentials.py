@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Shared Odoo credentials for Odoo Invoice Follow-Up Manager
+Several gunicorn workers can only serve the same connection if each of them can
+re-authenticate it, so passwords are published to the shared state store
+encrypted with CREDENTIALS_KEY (a Fernet key). Without a key the backend runs a
+single worker and passwords never leave its memory.
+"""
+
+import os
+
+# Worker processes used by --production when WEB_CONCURRENCY is not set
+DEFAULT_WORKERS = 2
+
+
+def create_credentials_cipher(key=None):
+    """Fernet cipher for CREDENTIALS_KEY, or None if no key is configured
+
+    Raises ValueError for a malformed key, so a bad deploy fails at startup rather
+    than on the first request of another worker.
+    """
+    key = key if key is not None else os.environ.get('CREDENTIALS_KEY')
+    if not key:
+        return None
+    from cryptography.fernet import Fernet
+    return Fernet(key.encode('utf-8'))
+
+
+def production_workers():
+    """Worker processes for gunicorn: WEB_CONCURRENCY (default 2), but 1 without CREDENTIALS_KEY
+
+    Without shared credentials a connection only works on the worker that received
+    its /api/odoo/connect, so a second worker would answer 404 for half the requests.
+    """
+    workers = int(os.environ.get('WEB_CONCURRENCY', DEFAULT_WORKERS))
+    if workers > 1 and not os.environ.get('CREDENTIALS_KEY'):
+        print(f"⚠️ CREDENTIALS_KEY not set: running 1 worker instead of {workers} "
+              "(generate one with: python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\")")
+        return 1
+    return workers
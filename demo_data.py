@@ -4,13 +4,16 @@ Demo data generator for testing the Odoo Invoice Follow-Up Manager
 This script generates sample overdue invoice data for testing purposes.
 """
 
-import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 import random
 
-def generate_demo_data():
-    """Generate sample overdue invoice data for testing"""
+# Fixed seed so the demo dataset (and its datasetVersion/ETag) is the same on every call;
+# it only changes when the date moves the due dates
+DEMO_DATA_SEED = 2024
+
+def generate_demo_data(seed=DEMO_DATA_SEED):
+    """Generate sample overdue invoice data for testing (seed=None for a different set each call)"""
+    rng = random.Random(seed)
     
     # Sample client names
     clients = [
@@ -57,16 +60,16 @@ def generate_demo_data():
     
     for i in range(25):  # Generate 25 sample invoices
         # Random client
-        client_idx = random.randint(0, len(clients) - 1)
+        client_idx = rng.randint(0, len(clients) - 1)
         client_name = clients[client_idx]
         client_email = client_emails[client_idx]
         
         # Random due date (past dates for overdue invoices)
-        days_overdue = random.randint(1, 60)
+        days_overdue = rng.randint(1, 60)
         due_date = today - timedelta(days=days_overdue)
         
         # Random amount (ensure it's not zero)
-        amount = round(random.uniform(500, 10000), 2)
+        amount = round(rng.uniform(500, 10000), 2)
         if amount == 0:
             amount = 500  # Fallback to minimum amount
         
@@ -86,13 +89,13 @@ def generate_demo_data():
             "S01836",
             "S0150"
         ]
-        origin = random.choice(origins)
+        origin = rng.choice(origins)
         
         # Sample currency symbol
         currency_symbol = "SAR"
         
         # Random company
-        company_name = random.choice(companies)
+        company_name = rng.choice(companies)
         
         invoices.append({
             'invoice_number': invoice_number,
@@ -111,6 +114,9 @@ def generate_demo_data():
 
 def main():
     """Main function to run the demo data generator"""
+    # Streamlit and pandas are only needed for the UI; the backend only imports generate_demo_data
+    import streamlit as st
+    import pandas as pd
     
     st.set_page_config(
         page_title="Demo Data Generator",
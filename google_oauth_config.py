@@ -3,12 +3,10 @@ Google OAuth Configuration for Gmail Integration
 """
 
 import os
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 import pickle
 import json
-import streamlit as st
+
+# The Google client libraries and streamlit are imported inside the functions that use them
 
 # Gmail API scopes
 SCOPES = [
@@ -60,6 +58,8 @@ OAUTH_CONFIG = {"web": load_oauth_config()}
 def get_google_oauth_url():
     """Generate Google OAuth URL for authentication with proper redirect"""
     try:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        
         flow = InstalledAppFlow.from_client_config(OAUTH_CONFIG, SCOPES)
         auth_url, _ = flow.authorization_url(
             access_type='offline',
@@ -75,6 +75,8 @@ def get_google_oauth_url():
 def handle_oauth_callback():
     """Handle OAuth callback from Google"""
     try:
+        import streamlit as st
+        
         # Get query parameters from Streamlit
         query_params = st.experimental_get_query_params()
         code = query_params.get("code", [None])[0]
@@ -94,6 +96,8 @@ def handle_oauth_callback():
 def exchange_code_for_tokens(authorization_code):
     """Exchange authorization code for access and refresh tokens"""
     try:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        
         flow = InstalledAppFlow.from_client_config(OAUTH_CONFIG, SCOPES)
         flow.fetch_token(code=authorization_code)
         
@@ -130,6 +134,9 @@ def get_user_info(credentials):
 def refresh_access_token(refresh_token):
     """Refresh access token using refresh token"""
     try:
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        
         credentials = Credentials(
             None,  # No access token initially
             refresh_token=refresh_token,
@@ -157,6 +164,8 @@ def refresh_access_token(refresh_token):
 def create_credentials_from_tokens(token_data):
     """Create Credentials object from token data"""
     try:
+        from google.oauth2.credentials import Credentials
+        
         return Credentials(
             token=token_data['access_token'],
             refresh_token=token_data['refresh_token'],
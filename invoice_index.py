@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Invoice index for Odoo Invoice Follow-Up Manager
+Groups a fetched invoice list by client, company and aging bucket once,
+with per-client aggregates, so endpoints and reports don't regroup it.
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Aging buckets used by the dashboard, emails and the daily report
+AGING_BUCKETS = ('recent', 'moderate', 'severe')
+
+# Sort keys accepted by InvoiceIndex.query for invoice rows and client summaries
+INVOICE_SORT_KEYS = {
+    'amount': lambda inv: inv['amount_due'],
+    'days_overdue': lambda inv: inv['days_overdue'],
+    'client': lambda inv: (inv['client_name'] or '').lower()
+}
+CLIENT_SORT_KEYS = {
+    'amount': lambda summary: summary['totalAmount'],
+    'days_overdue': lambda summary: summary['maxDays'],
+    'client': lambda summary: (summary['clientName'] or '').lower()
+}
+
+# Number of distinct filtered/sorted views kept per index
+QUERY_CACHE_SIZE = 32
+
+
+def get_aging_bucket(days_overdue):
+    """Aging bucket for a number of days overdue (≤15 recent, 16-30 moderate, >30 severe)"""
+    if days_overdue > 30:
+        return 'severe'
+    elif days_overdue > 15:
+        return 'moderate'
+    return 'recent'
+
+
+class InvoiceIndex:
+    """Lookups and per-client aggregates over one invoice list"""
+
+    def __init__(self, invoices):
+        self.invoices = invoices
+        self.by_id = {}
+        self.by_client = {}
+        self.by_company = {}
+        self.by_bucket = {bucket: [] for bucket in AGING_BUCKETS}
+        self.client_summaries = {}
+        self.total_amount = 0
+        self.row_hashes = {}
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+        for invoice in invoices:
+            invoice_id = get_invoice_id(invoice)
+            if invoice_id is not None:
+                self.by_id[invoice_id] = invoice
+                self.row_hashes[invoice_id] = compute_row_hash(invoice)
+            self.by_client.setdefault(invoice['client_name'], []).append(invoice)
+            self.by_company.setdefault(invoice.get('company_name', 'Unknown Company'), []).append(invoice)
+            self.by_bucket[get_aging_bucket(invoice['days_overdue'])].append(invoice)
+
+            amount_due = invoice['amount_due']
+            self.total_amount += amount_due
+
+            summary = self.client_summaries.get(invoice['client_name'])
+            if summary is None:
+                summary = {
+                    'clientName': invoice['client_name'],
+                    'clientEmail': invoice.get('client_email', ''),
+                    'companyName': invoice.get('company_name', 'Unknown Company'),
+                    'totalAmount': 0,
+                    'invoiceCount': 0,
+                    'maxDays': invoice['days_overdue'],
+                    'totalDays': 0
+                }
+                self.client_summaries[invoice['client_name']] = summary
+            summary['totalAmount'] += amount_due
+            summary['invoiceCount'] += 1
+            summary['totalDays'] += invoice['days_overdue']
+            if invoice['days_overdue'] > summary['maxDays']:
+                summary['maxDays'] = invoice['days_overdue']
+
+        self.bucket_clients = finish_client_summaries(self.client_summaries)
+
+        self.version = compute_dataset_version(invoices, self.row_hashes)
+
+    def __len__(self):
+        return len(self.invoices)
+
+    @property
+    def client_count(self):
+        return len(self.by_client)
+
+    def get_client_invoices(self, client_name):
+        """Invoices for a client (empty list if unknown)"""
+        return self.by_client.get(client_name, [])
+
+    def get_client_summary(self, client_name):
+        """Precomputed totals for a client (None if unknown)"""
+        return self.client_summaries.get(client_name)
+
+    def clients_in_bucket(self, bucket):
+        """Client summaries whose oldest invoice falls in the bucket, largest balance first"""
+        return self.bucket_clients.get(bucket, [])
+
+    def get_summary(self):
+        """Dashboard-level totals without the invoice rows"""
+        total_invoices = len(self.invoices)
+        total_days = sum(summary['totalDays'] for summary in self.client_summaries.values())
+        missing_email_clients = [s for s in self.client_summaries.values() if not s['clientEmail']]
+        currency_counts = {}
+        for inv in self.invoices:
+            currency = inv.get('currency_symbol') or 'AED'
+            currency_counts[currency] = currency_counts.get(currency, 0) + 1
+
+        return {
+            'totalInvoices': total_invoices,
+            'totalAmount': self.total_amount,
+            'totalClients': self.client_count,
+            'averageDaysOverdue': total_days / total_invoices if total_invoices else 0,
+            'clientsMissingEmailCount': len(missing_email_clients),
+            'invoicesMissingEmailCount': sum(s['invoiceCount'] for s in missing_email_clients),
+            'buckets': {
+                bucket: {
+                    'invoiceCount': len(self.by_bucket[bucket]),
+                    'clientCount': len(self.bucket_clients[bucket]),
+                    'amount': sum(inv['amount_due'] for inv in self.by_bucket[bucket])
+                }
+                for bucket in AGING_BUCKETS
+            },
+            'companies': {
+                company: {
+                    'invoiceCount': len(company_invoices),
+                    'amount': sum(inv['amount_due'] for inv in company_invoices)
+                }
+                for company, company_invoices in self.by_company.items()
+            },
+            'currencies': currency_counts
+        }
+
+    def query(self, mode='invoices', sort_by='amount', descending=True, company=None, bucket=None, missing_email=None):
+        """Filtered and sorted invoice rows (mode='invoices') or client summaries (mode='clients')
+
+        Results are memoized per index, since an index never changes after it is built.
+        Request threads share an index, so the memo is only touched under its lock.
+        """
+        cache_key = (mode, sort_by, descending, company, bucket, missing_email)
+        with self._query_cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+                return cached
+
+        if mode not in ('invoices', 'clients'):
+            raise ValueError(f"Unknown mode: {mode}. Expected 'invoices' or 'clients'")
+        if bucket and bucket not in AGING_BUCKETS:
+            raise ValueError(f"Unknown aging bucket: {bucket}. Expected one of {list(AGING_BUCKETS)}")
+
+        if mode == 'clients':
+            sort_keys = CLIENT_SORT_KEYS
+            rows = self.bucket_clients[bucket] if bucket else self.client_summaries.values()
+            if company:
+                rows = [s for s in rows if s['companyName'] == company]
+            if missing_email is not None:
+                rows = [s for s in rows if (not s['clientEmail']) == missing_email]
+        else:
+            sort_keys = INVOICE_SORT_KEYS
+            if company:
+                rows = self.by_company.get(company, [])
+                if bucket:
+                    rows = [inv for inv in rows if get_aging_bucket(inv['days_overdue']) == bucket]
+            else:
+                rows = self.by_bucket[bucket] if bucket else self.invoices
+            if missing_email is not None:
+                rows = [inv for inv in rows if (not inv.get('client_email')) == missing_email]
+
+        if sort_by not in sort_keys:
+            raise ValueError(f"Unknown sort key: {sort_by}. Expected one of {list(sort_keys.keys())}")
+
+        result = sorted(rows, key=sort_keys[sort_by], reverse=descending)
+
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = result
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return result
+
+
+class ClientAggregates:
+    """Per-client totals built from grouped Odoo rows (OdooConnector.get_overdue_aggregates)
+
+    Offers the client_summaries / clients_in_bucket / totals part of InvoiceIndex
+    without needing the invoice rows.
+    """
+
+    def __init__(self, groups, today=None):
+        today = today or datetime.now()
+        self.client_summaries = {}
+        self.total_amount = 0
+        self.invoice_count = 0
+
+        for group in groups:
+            if group['due_date']:
+                days_overdue = (today - datetime.strptime(group['due_date'], "%Y-%m-%d")).days
+            else:
+                days_overdue = 0
+            count = group['invoice_count']
+            self.total_amount += group['amount_due']
+            self.invoice_count += count
+
+            summary = self.client_summaries.get(group['client_name'])
+            if summary is None:
+                summary = {
+                    'clientName': group['client_name'],
+                    'clientEmail': '',
+                    'companyName': '',
+                    'totalAmount': 0,
+                    'invoiceCount': 0,
+                    'maxDays': days_overdue,
+                    'totalDays': 0
+                }
+                self.client_summaries[group['client_name']] = summary
+            summary['totalAmount'] += group['amount_due']
+            summary['invoiceCount'] += count
+            summary['totalDays'] += days_overdue * count
+            if days_overdue > summary['maxDays']:
+                summary['maxDays'] = days_overdue
+
+        self.bucket_clients = finish_client_summaries(self.client_summaries)
+
+    def __len__(self):
+        return self.invoice_count
+
+    @property
+    def client_count(self):
+        return len(self.client_summaries)
+
+    def clients_in_bucket(self, bucket):
+        """Client summaries whose oldest invoice falls in the bucket, largest balance first"""
+        return self.bucket_clients.get(bucket, [])
+
+
+def finish_client_summaries(client_summaries):
+    """Add avgDays and bucket to accumulated client summaries; returns {bucket: summaries}"""
+    bucket_clients = {bucket: [] for bucket in AGING_BUCKETS}
+    for summary in client_summaries.values():
+        summary['avgDays'] = summary['totalDays'] / summary['invoiceCount']
+        summary['bucket'] = get_aging_bucket(summary['maxDays'])
+        bucket_clients[summary['bucket']].append(summary)
+
+    # Largest balances first, like the dashboard and report
+    for bucket in AGING_BUCKETS:
+        bucket_clients[bucket].sort(key=lambda x: x['totalAmount'], reverse=True)
+    return bucket_clients
+
+
+def get_invoice_id(invoice):
+    """Invoice id (Odoo records use 'id', demo data uses 'invoice_id')"""
+    return invoice.get('id', invoice.get('invoice_id'))
+
+
+def compute_row_hash(invoice):
+    """Short content hash of a single invoice record"""
+    return hashlib.sha1(json.dumps(invoice, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def compute_dataset_version(invoices, row_hashes=None):
+    """Short content hash identifying an invoice dataset"""
+    digest = hashlib.sha1()
+    for invoice in invoices:
+        invoice_id = get_invoice_id(invoice)
+        if row_hashes is not None and invoice_id in row_hashes:
+            row_hash = row_hashes[invoice_id]
+        else:
+            row_hash = compute_row_hash(invoice)
+        digest.update(row_hash.encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def apply_invoice_changes(invoices, changed_invoices, today=None):
+    """New invoice list with incrementally fetched changes merged in
+
+    Changed invoices replace their cached rows, fully paid ones are dropped and
+    days_overdue is recomputed for every row, since it moves with the date.
+    """
+    today = today or datetime.now()
+    changes = {get_invoice_id(invoice): invoice for invoice in changed_invoices}
+
+    merged = []
+    for invoice in invoices:
+        invoice_id = get_invoice_id(invoice)
+        merged.append(changes.pop(invoice_id, invoice))
+    merged.extend(changes.values())
+
+    result = []
+    for invoice in merged:
+        if invoice['amount_due'] <= 0 or invoice['amount_total'] <= 0:
+            continue
+        days_overdue = (today - datetime.strptime(invoice['due_date'], "%Y-%m-%d")).days
+        if days_overdue != invoice['days_overdue']:
+            # Rows are shared with the previous index, so copy instead of mutating
+            invoice = dict(invoice, days_overdue=days_overdue)
+        result.append(invoice)
+    return result
+
+
+def build_invoice_index(invoices):
+    """Build an InvoiceIndex for a freshly fetched invoice list"""
+    return InvoiceIndex(invoices or [])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Versioned invoice snapshots for Odoo Invoice Follow-Up Manager
+Keeps the row hashes of the last few dataset versions of a connection
+so a refresh can send only the invoices that changed.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class SnapshotHistory:
+    """Recent dataset versions of one connection, as {invoice_id: row_hash} maps"""
+
+    def __init__(self, max_versions=5):
+        self.max_versions = max_versions
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, invoice_index):
+        """Remember the row hashes of a freshly built invoice index"""
+        with self._lock:
+            self._versions[invoice_index.version] = invoice_index.row_hashes
+            self._versions.move_to_end(invoice_index.version)
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+
+    def delta_since(self, base_version, invoice_index):
+        """Added, updated and removed invoices between base_version and invoice_index
+
+        Returns None when base_version is no longer retained (caller sends a full payload).
+        """
+        with self._lock:
+            base_hashes = self._versions.get(base_version)
+        if base_hashes is None:
+            return None
+
+        current_hashes = invoice_index.row_hashes
+        added = []
+        updated = []
+        for invoice_id, row_hash in current_hashes.items():
+            base_hash = base_hashes.get(invoice_id)
+            if base_hash is None:
+                added.append(invoice_index.by_id[invoice_id])
+            elif base_hash != row_hash:
+                updated.append(invoice_index.by_id[invoice_id])
+        removed = [invoice_id for invoice_id in base_hashes if invoice_id not in current_hashes]
+
+        return {
+            'baseVersion': base_version,
+            'added': added,
+            'updated': updated,
+            'removed': removed
+        }
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Background job manager for Odoo Invoice Follow-Up Manager
+Runs long operations (fetch, refresh, PDF, bulk send) off the request thread
+and records their progress as events that can be streamed to the browser.
+With a shared state store, job status and events are published there so any
+server worker can answer status polls and event streams. The status record only
+references the result, which is stored once under its own key.
+"""
+
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Events kept per job (in memory and in the store); older progress events are dropped
+MAX_JOB_EVENTS = 100
+
+
+class Job:
+    """A single background operation and its progress events"""
+
+    def __init__(self, job_type, description=''):
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.description = description
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._next_event_id = 1
+        self._condition = threading.Condition()
+        self._store = None
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def add_event(self, event_type, data, status=None):
+        """Append an event (optionally changing status) and wake up streaming listeners"""
+        with self._condition:
+            if status:
+                self.status = status
+                if self.is_finished:
+                    self.finished_at = time.time()
+            event = {
+                'id': self._next_event_id,
+                'event': event_type,
+                'data': data
+            }
+            self._next_event_id += 1
+            self.events.append(event)
+            dropped = self.events[:-MAX_JOB_EVENTS]
+            del self.events[:-MAX_JOB_EVENTS]
+            if self._store is not None:
+                # Event first, then status: a reader that sees the job finished has all its events
+                if event_type == 'result':
+                    # The result event points at the stored result instead of repeating it
+                    self._store.set_json(result_key(self.id), data, compress=True)
+                    stored_event = {'id': event['id'], 'event': event_type, 'resultKey': result_key(self.id)}
+                else:
+                    stored_event = event
+                self._store.set_json(event_key(self.id, event['id']), stored_event)
+                for old_event in dropped:
+                    self._store.delete(event_key(self.id, old_event['id']))
+                self.publish()
+            self._condition.notify_all()
+            return event
+
+    def publish(self):
+        """Write the job's status (without its result) to the shared store"""
+        self._store.set_json(f"job:{self.id}", {
+            'job': self.to_dict(include_result=False),
+            'resultKey': result_key(self.id) if self.status == 'completed' else None,
+            'createdAt': self.created_at,
+            'finishedAt': self.finished_at
+        })
+
+    def wait_for_events(self, after_id, timeout):
+        """Block until there are events newer than after_id or the job finishes"""
+        with self._condition:
+            if self._next_event_id - 1 <= after_id and not self.is_finished:
+                self._condition.wait(timeout)
+            return [event for event in self.events if event['id'] > after_id]
+
+    def to_dict(self, include_result=True):
+        """Serializable job status"""
+        job_info = {
+            'jobId': self.id,
+            'type': self.type,
+            'description': self.description,
+            'status': self.status,
+            'progress': round(self.progress, 1),
+            'message': self.message,
+            'createdAt': datetime.fromtimestamp(self.created_at).isoformat(),
+            'startedAt': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finishedAt': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            'error': self.error
+        }
+        if include_result and self.status == 'completed':
+            job_info['result'] = self.result
+        return job_info
+
+
+class StoredJob:
+    """Read-only view of a job published to the shared store by another worker"""
+
+    # How often a waiting event stream re-reads the store
+    POLL_SECONDS = 0.5
+
+    def __init__(self, store, job_id, record):
+        self.store = store
+        self.id = job_id
+        self._record = record
+
+    @property
+    def created_at(self):
+        return self._record['createdAt']
+
+    @property
+    def status(self):
+        return self._record['job']['status']
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    @property
+    def events(self):
+        events = []
+        for key in sorted(self.store.keys(f"job_event:{self.id}:")):
+            event = self.store.get_json(key)
+            if event is None:
+                continue  # Dropped between listing and reading
+            if 'resultKey' in event:
+                event = {'id': event['id'], 'event': event['event'], 'data': self.store.get_json(event['resultKey'])}
+            events.append(event)
+        return events
+
+    def refresh(self):
+        record = self.store.get_json(f"job:{self.id}")
+        if record is not None:
+            self._record = record
+
+    def wait_for_events(self, after_id, timeout):
+        """Poll the store until there are events newer than after_id, the job finishes or timeout passes"""
+        deadline = time.time() + timeout
+        while True:
+            self.refresh()
+            finished = self.is_finished
+            events = [event for event in self.events if event['id'] > after_id]
+            if events or finished or time.time() >= deadline:
+                return events
+            time.sleep(min(self.POLL_SECONDS, max(deadline - time.time(), 0)))
+
+    def to_dict(self, include_result=True):
+        job_info = dict(self._record['job'])
+        if include_result and self._record.get('resultKey'):
+            job_info['result'] = self.store.get_json(self._record['resultKey'])
+        return job_info
+
+
+class JobManager:
+    """Runs jobs on a small thread pool and keeps them around for polling/streaming"""
+
+    def __init__(self, max_workers=4, retention_seconds=3600, prune_interval_seconds=300):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.retention_seconds = retention_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self.store = None
+        self._pruner = None
+
+    def use_store(self, store):
+        """Publish jobs to a shared state store (e.g. SQLite across gunicorn workers)"""
+        self.store = store
+
+    def submit(self, job_type, target, *args, description='', **kwargs):
+        """Queue target(progress_callback, *args, **kwargs) and return the Job"""
+        job = Job(job_type, description)
+        job._store = self.store
+
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._pruner is None:
+                self._pruner = threading.Thread(target=self._prune_periodically, name='job-pruner', daemon=True)
+                self._pruner.start()
+
+        job.add_event('status', {'status': job.status})
+        self._executor.submit(self._run, job, target, args, kwargs)
+        print(f"🧵 Queued {job_type} job {job.id}")
+        return job
+
+    def get(self, job_id):
+        """Get a job by id: this worker's Job, a StoredJob published by another worker, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or self.store is None:
+            return job
+        record = self.store.get_json(f"job:{job_id}")
+        return StoredJob(self.store, job_id, record) if record is not None else None
+
+    def list_jobs(self):
+        """Summaries of all retained jobs (of every worker when a store is used), newest first"""
+        with self._lock:
+            jobs = {job.id: job for job in self._jobs.values()}
+        if self.store is not None:
+            for key in self.store.keys('job:'):
+                job_id = key[len('job:'):]
+                if job_id not in jobs:
+                    record = self.store.get_json(key)
+                    if record is not None:
+                        jobs[job_id] = StoredJob(self.store, job_id, record)
+        jobs = sorted(jobs.values(), key=lambda job: job.created_at, reverse=True)
+        return [job.to_dict(include_result=False) for job in jobs]
+
+    def stream_events(self, job_id, last_event_id=0, heartbeat=15):
+        """Yield Server-Sent Events for a job until it finishes"""
+        job = self.get(job_id)
+        if not job:
+            return
+
+        sent = last_event_id
+        while True:
+            events = job.wait_for_events(sent, heartbeat)
+            if events:
+                for event in events:
+                    sent = event['id']
+                    yield format_sse(event)
+            elif not job.is_finished:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+
+            if job.is_finished and not events:
+                break
+
+    def _run(self, job, target, args, kwargs):
+        job.started_at = time.time()
+        job.add_event('status', {'status': 'running'}, status='running')
+
+        def progress_callback(message, progress):
+            print(f"📊 [{job.type} {job.id[:8]}] {message} ({progress:.1f}%)")
+            job.message = message
+            job.progress = progress
+            job.add_event('progress', {'message': message, 'progress': round(progress, 1)})
+
+        try:
+            job.result = target(progress_callback, *args, **kwargs)
+            job.progress = 100.0
+            job.add_event('result', job.result, status='completed')
+            print(f"✅ Job {job.id} ({job.type}) completed")
+        except Exception as e:
+            job.error = str(e)
+            job.add_event('error', {'error': job.error}, status='failed')
+            print(f"❌ Job {job.id} ({job.type}) failed: {str(e)}")
+
+    def _prune_periodically(self):
+        while True:
+            time.sleep(self.prune_interval_seconds)
+            try:
+                self.prune()
+            except Exception as e:
+                print(f"⚠️ Job pruning failed: {str(e)}")
+
+    def prune(self):
+        """Drop finished jobs older than the retention window (and their stored events and results)"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.is_finished and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+        if self.store is not None:
+            for key in self.store.keys('job:'):
+                record = self.store.get_json(key)
+                if record is None or (record['finishedAt'] and record['finishedAt'] < cutoff):
+                    job_id = key[len('job:'):]
+                    for stored_event_key in self.store.keys(f"job_event:{job_id}:"):
+                        self.store.delete(stored_event_key)
+                    self.store.delete(result_key(job_id))
+                    self.store.delete(key)
+
+
+def event_key(job_id, event_id):
+    return f"job_event:{job_id}:{event_id:06d}"
+
+
+def result_key(job_id):
+    return f"job_result:{job_id}"
+
+
+def format_sse(event):
+    """Format an event dict as a Server-Sent Events message"""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+# Global job manager instance
+job_manager = JobManager()
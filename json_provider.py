@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+JSON provider for the Odoo Invoice Follow-Up Manager backend
+Serializes API responses with orjson when it is installed and falls back
+to the standard library json module otherwise. Both paths encode the same
+extra types the same way (ISO dates, base64 bytes, Decimal as float).
+"""
+
+import base64
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_default(o):
+    """Encode values the json modules don't handle natively"""
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(o)).decode('ascii')
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    # numpy/pandas scalars (e.g. from DataFrame aggregations)
+    if hasattr(o, 'item') and callable(o.item):
+        return o.item()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider with the shared encoding of extra types"""
+
+    default = staticmethod(json_default)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson-backed provider; loads and dumps keep the Flask provider interface"""
+
+    default = staticmethod(json_default)
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=json_default, option=self._options())
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for stdlib options (indent, separators...) get the stdlib path
+            kwargs.setdefault('default', json_default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install the fastest available JSON provider on a Flask app"""
+    if ORJSON_AVAILABLE:
+        app.json = FastJSONProvider(app)
+        print("⚡ Using orjson for JSON responses")
+    else:
+        app.json = StdlibJSONProvider(app)
+        print("📦 orjson not installed, using standard json for JSON responses")
+    return app.json
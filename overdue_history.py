@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Historical overdue snapshots for Odoo Invoice Follow-Up Manager
+Saves one snapshot of the overdue invoices per Odoo database and day in a
+compact columnar file (typed arrays, dictionary-encoded strings, one zlib
+block per column) with a date index, so aging trends, day-over-day deltas and
+per-client history can be read back without re-querying Odoo.
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import hashlib
+import tempfile
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+
+from invoice_index import AGING_BUCKETS, get_aging_bucket
+
+HISTORY_MAGIC = b'OVDH'
+HISTORY_FORMAT_VERSION = 1
+HISTORY_SUFFIX = '.cols'
+INDEX_FILENAME = 'index.json'
+
+# Snapshot columns: (name, type). int/amount/date are typed arrays (amounts in thousandths, exact
+# for 3-decimal currencies), category columns are dictionary-encoded, str columns stored as-is.
+COLUMNS = (
+    ('id', 'int'),
+    ('invoice_number', 'str'),
+    ('partner_id', 'int'),
+    ('client_name', 'category'),
+    ('company_name', 'category'),
+    ('currency_symbol', 'category'),
+    ('amount_total', 'amount'),
+    ('amount_due', 'amount'),
+    ('due_date', 'date'),
+    ('days_overdue', 'int'),
+)
+
+ARRAY_TYPECODES = {'int': 'q', 'amount': 'q', 'date': 'i', 'category': 'I'}
+STR_SEPARATOR = '\x1f'
+
+
+def history_source(url, database):
+    """Directory name of an Odoo database's history (same database, same history)"""
+    return hashlib.sha1(f"{url.rstrip('/')}|{database}".encode('utf-8')).hexdigest()[:12]
+
+
+def _encode_column(column_type, values):
+    """(compressed values, compressed dictionary or None) of one column"""
+    dictionary = None
+    if column_type == 'category':
+        dictionary = []
+        codes = {}
+        encoded = array('I')
+        for value in values:
+            value = '' if value is None else str(value)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            encoded.append(code)
+        raw = encoded.tobytes()
+        dictionary = zlib.compress(STR_SEPARATOR.join(dictionary).encode('utf-8'), 6)
+    elif column_type == 'str':
+        raw = STR_SEPARATOR.join('' if value is None else str(value) for value in values).encode('utf-8')
+    elif column_type == 'date':
+        raw = array('i', (date.fromisoformat(value[:10]).toordinal() if value else 0 for value in values)).tobytes()
+    elif column_type == 'amount':
+        raw = array('q', (round((value or 0) * 1000) for value in values)).tobytes()
+    else:
+        raw = array('q', (int(value or 0) for value in values)).tobytes()
+    return zlib.compress(raw, 6), dictionary
+
+
+def _decode_column(column, blob, byteorder, dictionary_blob=None):
+    """Python list of one column's values"""
+    raw = zlib.decompress(blob)
+    column_type = column['type']
+    if column_type == 'str':
+        text = raw.decode('utf-8')
+        return text.split(STR_SEPARATOR) if column['rows'] else []
+
+    values = array(ARRAY_TYPECODES[column_type])
+    values.frombytes(raw)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    if column_type == 'category':
+        dictionary = zlib.decompress(dictionary_blob).decode('utf-8').split(STR_SEPARATOR)
+        return [dictionary[code] for code in values]
+    if column_type == 'amount':
+        return [value / 1000 for value in values]
+    if column_type == 'date':
+        return [date.fromordinal(ordinal).isoformat() if ordinal else None for ordinal in values]
+    return values.tolist()
+
+
+def summarize_invoices(invoices):
+    """Per-day totals kept in the date index (aging trend without opening snapshot files)"""
+    buckets = {bucket: {'amount': 0, 'count': 0} for bucket in AGING_BUCKETS}
+    clients = set()
+    total_amount = 0
+    for invoice in invoices:
+        bucket = buckets[get_aging_bucket(invoice.get('days_overdue', 0))]
+        bucket['amount'] += invoice['amount_due']
+        bucket['count'] += 1
+        total_amount += invoice['amount_due']
+        clients.add(invoice.get('client_name'))
+    for bucket in buckets.values():
+        bucket['amount'] = round(bucket['amount'], 2)
+    return {
+        'invoiceCount': len(invoices),
+        'clientCount': len(clients),
+        'totalAmount': round(total_amount, 2),
+        'buckets': buckets
+    }
+
+
+class OverdueHistoryStore:
+    """Per-database directories of daily columnar snapshots plus an index.json of per-day totals"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _source_dir(self, source):
+        return os.path.join(self.directory, source)
+
+    def _path(self, source, day):
+        return os.path.join(self._source_dir(source), f"{day}{HISTORY_SUFFIX}")
+
+    def _write_atomic(self, path, raw):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def record(self, url, database, invoices, dataset_version=None, day=None):
+        """Save today's (or day's) snapshot of a database's overdue invoices
+
+        Later snapshots of the same day replace earlier ones; an unchanged dataset
+        version is not rewritten. Returns the snapshot size in bytes, or 0 if skipped.
+        """
+        source = history_source(url, database)
+        day = day or date.today().isoformat()
+        index = self.read_index(source)
+        if dataset_version and index['days'].get(day, {}).get('datasetVersion') == dataset_version:
+            return 0
+
+        header = {
+            'formatVersion': HISTORY_FORMAT_VERSION,
+            'day': day,
+            'savedAt': datetime.now().isoformat(timespec='seconds'),
+            'datasetVersion': dataset_version,
+            'byteorder': sys.byteorder,
+            'rows': len(invoices),
+            'summary': summarize_invoices(invoices),
+            'columns': []
+        }
+        blobs = []
+        offset = 0
+        for name, column_type in COLUMNS:
+            blob, dictionary = _encode_column(column_type, [invoice.get(name) for invoice in invoices])
+            column = {'name': name, 'type': column_type, 'rows': len(invoices), 'offset': offset, 'length': len(blob)}
+            blobs.append(blob)
+            offset += len(blob)
+            if dictionary is not None:
+                column['dictionaryOffset'] = offset
+                column['dictionaryLength'] = len(dictionary)
+                blobs.append(dictionary)
+                offset += len(dictionary)
+            header['columns'].append(column)
+
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        raw = HISTORY_MAGIC + struct.pack('<BI', HISTORY_FORMAT_VERSION, len(header_bytes)) + header_bytes + b''.join(blobs)
+
+        with self._lock:
+            os.makedirs(self._source_dir(source), exist_ok=True)
+            self._write_atomic(self._path(source, day), raw)
+            index = self.read_index(source)
+            index['source'] = {'url': url.rstrip('/'), 'database': database}
+            index['days'][day] = self._index_entry(header, len(raw))
+            self._write_atomic(os.path.join(self._source_dir(source), INDEX_FILENAME),
+                               json.dumps(index, indent=1, sort_keys=True).encode('utf-8'))
+        return len(raw)
+
+    def has_snapshot(self, source, day=None):
+        """Whether a database already has a snapshot for day (default today)"""
+        return os.path.exists(self._path(source, day or date.today().isoformat()))
+
+    def record_from_odoo(self, connector, rows=None):
+        """Save today's snapshot of a connector's database from Odoo's full overdue invoice rows
+
+        The backend and the daily report both write history through here, so a day's
+        snapshot always comes from the same uncapped source (get_overdue_invoice_rows)
+        instead of swinging between differently scoped datasets. The dataset version is
+        read before the rows, and an unchanged version skips the fetch. Rows the caller
+        already fetched are saved without a version, so the next versioned write
+        replaces them. Returns the snapshot size in bytes, or 0 if skipped.
+        """
+        if rows is not None:
+            return self.record(connector.url, connector.database, rows)
+
+        dataset_version = connector.get_overdue_dataset_version()
+        source = history_source(connector.url, connector.database)
+        day = date.today().isoformat()
+        if dataset_version and self.read_index(source)['days'].get(day, {}).get('datasetVersion') == dataset_version:
+            return 0
+        return self.record(connector.url, connector.database, connector.get_overdue_invoice_rows(), dataset_version, day)
+
+    def _index_entry(self, header, size):
+        return dict(header['summary'], datasetVersion=header['datasetVersion'], savedAt=header['savedAt'], bytes=size)
+
+    def read_index(self, source):
+        """{'source': ..., 'days': {day: totals}} of a database, rebuilt from snapshot headers if out of date"""
+        source_dir = self._source_dir(source)
+        index_path = os.path.join(source_dir, INDEX_FILENAME)
+        index = {'source': None, 'days': {}}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Rebuilding unreadable overdue history index {index_path}: {e}")
+
+        if os.path.isdir(source_dir):
+            # Another worker's snapshot may have landed after the index was written
+            for filename in os.listdir(source_dir):
+                day = filename[:-len(HISTORY_SUFFIX)]
+                if filename.endswith(HISTORY_SUFFIX) and day not in index['days']:
+                    try:
+                        header, _, _ = self._open(source, day)
+                        index['days'][day] = self._index_entry(header, os.path.getsize(self._path(source, day)))
+                    except Exception as e:
+                        print(f"⚠️ Skipping unreadable overdue snapshot {filename}: {e}")
+        return index
+
+    def days(self, source, start=None, end=None):
+        """Snapshot dates of a database between start and end (ISO dates, inclusive), oldest first"""
+        return sorted(day for day in self.read_index(source)['days']
+                      if (start is None or day >= start) and (end is None or day <= end))
+
+    def _open(self, source, day):
+        """(header, mmap, data offset) of a snapshot file; the caller closes the mmap"""
+        with open(self._path(source, day), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if mapped[:4] != HISTORY_MAGIC:
+                raise ValueError('not an overdue history snapshot')
+            format_version, header_length = struct.unpack('<BI', mapped[4:9])
+            if format_version != HISTORY_FORMAT_VERSION:
+                raise ValueError(f'unsupported snapshot format {format_version}')
+            header = json.loads(mapped[9:9 + header_length])
+        except Exception:
+            mapped.close()
+            raise
+        return header, mapped, 9 + header_length
+
+    def load(self, source, day, columns=None):
+        """One day's snapshot as {column: [values]}, decoding only the requested columns, or None"""
+        if not os.path.exists(self._path(source, day)):
+            return None
+        header, mapped, data_offset = self._open(source, day)
+        try:
+            wanted = set(columns) if columns else None
+            result = {}
+            for column in header['columns']:
+                if wanted is None or column['name'] in wanted:
+                    start = data_offset + column['offset']
+                    dictionary_blob = None
+                    if 'dictionaryOffset' in column:
+                        dictionary_start = data_offset + column['dictionaryOffset']
+                        dictionary_blob = mapped[dictionary_start:dictionary_start + column['dictionaryLength']]
+                    result[column['name']] = _decode_column(column, mapped[start:start + column['length']],
+                                                            header['byteorder'], dictionary_blob)
+            return result
+        finally:
+            mapped.close()
+
+    def iter_range(self, source, start=None, end=None, columns=None):
+        """Yield (day, {column: [values]}) for each snapshot in the range, one day in memory at a time"""
+        for day in self.days(source, start, end):
+            snapshot = self.load(source, day, columns)
+            if snapshot is not None:
+                yield day, snapshot
+
+    def aging_trend(self, source, start=None, end=None):
+        """Per-day totals and aging buckets (from the index, no snapshot files are opened)"""
+        days = self.read_index(source)['days']
+        return [dict(days[day], day=day) for day in self.days(source, start, end)]
+
+    def client_history(self, source, client_name, start=None, end=None):
+        """Per-day overdue amount, invoice count and max days overdue of one client"""
+        history = []
+        for day, snapshot in self.iter_range(source, start, end, ('client_name', 'amount_due', 'days_overdue')):
+            amount = 0
+            count = 0
+            max_days = 0
+            for name, amount_due, days_overdue in zip(snapshot['client_name'], snapshot['amount_due'], snapshot['days_overdue']):
+                if name == client_name:
+                    amount += amount_due
+                    count += 1
+                    max_days = max(max_days, days_overdue)
+            history.append({'day': day, 'amount': round(amount, 2), 'invoiceCount': count, 'maxDays': max_days})
+        return history
+
+    def day_over_day(self, source, day, previous_day=None):
+        """Changes between the previous snapshot and day's (keyed on invoice id, one pass each), or None
+
+        added: not in the previous snapshot; newly_overdue: past due now but not before;
+        resolved: no longer open (paid or closed); escalated: moved to a later aging bucket
+        (past 15 or 30 days); changed: open amount differs.
+        """
+        if previous_day is None:
+            earlier = self.days(source, end=(date.fromisoformat(day) - timedelta(days=1)).isoformat())
+            if not earlier:
+                return None
+            previous_day = earlier[-1]
+
+        columns = ('id', 'invoice_number', 'client_name', 'amount_due', 'days_overdue')
+        current = self.load(source, day, columns)
+        previous = self.load(source, previous_day, columns)
+        if current is None or previous is None:
+            return None
+
+        def row(snapshot, position):
+            return {column: snapshot[column][position] for column in columns}
+
+        bucket_rank = {bucket: rank for rank, bucket in enumerate(AGING_BUCKETS)}
+        previous_positions = {invoice_id: position for position, invoice_id in enumerate(previous['id'])}
+        seen = set()
+        added, newly_overdue, escalated, changed = [], [], [], []
+
+        for position, invoice_id in enumerate(current['id']):
+            days_overdue = current['days_overdue'][position]
+            previous_position = previous_positions.get(invoice_id)
+            if previous_position is None:
+                added.append(row(current, position))
+                if days_overdue > 0:
+                    newly_overdue.append(row(current, position))
+                continue
+
+            seen.add(invoice_id)
+            previous_days = previous['days_overdue'][previous_position]
+            if days_overdue > 0 >= previous_days:
+                newly_overdue.append(row(current, position))
+            previous_bucket = get_aging_bucket(previous_days)
+            bucket = get_aging_bucket(days_overdue)
+            if bucket_rank[bucket] > bucket_rank[previous_bucket]:
+                escalated.append(dict(row(current, position), bucket=bucket, previous_bucket=previous_bucket))
+            previous_amount = previous['amount_due'][previous_position]
+            if round(current['amount_due'][position] - previous_amount, 2) != 0:
+                changed.append(dict(row(current, position), previous_amount_due=previous_amount))
+
+        resolved = [row(previous, position) for position, invoice_id in enumerate(previous['id']) if invoice_id not in seen]
+        return {
+            'day': day,
+            'previousDay': previous_day,
+            'added': added,
+            'newlyOverdue': newly_overdue,
+            'resolved': resolved,
+            'escalated': escalated,
+            'changed': changed,
+            'totalAmount': round(sum(current['amount_due']), 2),
+            'previousTotalAmount': round(sum(previous['amount_due']), 2)
+        }
+
+
+def create_overdue_history():
+    """History store in OVERDUE_HISTORY_DIR (default data/overdue_history next to this module)"""
+    default_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'overdue_history')
+    return OverdueHistoryStore(os.environ.get('OVERDUE_HISTORY_DIR', default_directory))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Client follow-up priority scoring for Odoo Invoice Follow-Up Manager
+Scores every client summary (InvoiceIndex / ClientAggregates) in one vectorized
+pass with configurable weights and selects the top k, so the daily report and
+the dashboard rank clients the same way.
+"""
+
+import os
+import heapq
+import threading
+import importlib.util
+
+# numpy is imported on first use (it adds ~100 ms to cold start); without it
+# the same formula runs as a Python loop with heap-based top-k selection
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+# score = maxDays * w + avgDays * w + totalAmount / 1000 * w
+# (60% weight to longest overdue, 30% to average overdue, 10% to amount)
+DEFAULT_WEIGHTS = {'maxDays': 0.6, 'avgDays': 0.3, 'amount': 0.1}
+AMOUNT_UNIT = 1000
+
+# Number of client lists whose score columns are kept (see client_columns)
+COLUMN_CACHE_SIZE = 32
+
+
+def parse_weights(value):
+    """Weights from a dict or a 'maxDays=0.6,avgDays=0.3,amount=0.1' string, merged over the defaults"""
+    if not value:
+        return dict(DEFAULT_WEIGHTS)
+    if isinstance(value, str):
+        pairs = [item.split('=', 1) for item in value.split(',') if item.strip()]
+        if any(len(pair) != 2 for pair in pairs):
+            raise ValueError(f"Invalid priority weights: {value}. Expected name=value pairs")
+        value = {name.strip(): weight.strip() for name, weight in pairs}
+    if not isinstance(value, dict):
+        raise ValueError("Priority weights must be an object of name: number")
+
+    unknown = set(value) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown priority weights: {sorted(unknown)}. Expected {list(DEFAULT_WEIGHTS)}")
+
+    weights = dict(DEFAULT_WEIGHTS)
+    for name, weight in value.items():
+        try:
+            weights[name] = float(weight)
+        except (TypeError, ValueError):
+            raise ValueError(f"Priority weight {name} must be a number")
+    return weights
+
+
+def get_configured_weights():
+    """Weights from PRIORITY_WEIGHTS (e.g. 'maxDays=0.5,amount=0.2'), else the defaults"""
+    return parse_weights(os.environ.get('PRIORITY_WEIGHTS'))
+
+
+class ClientColumns:
+    """The scored fields of a list of client summaries as columns (numpy arrays when available)"""
+
+    def __init__(self, summaries):
+        self.summaries = list(summaries)
+        count = len(self.summaries)
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            self.max_days = np.fromiter((s['maxDays'] for s in self.summaries), dtype=np.float64, count=count)
+            self.avg_days = np.fromiter((s['avgDays'] for s in self.summaries), dtype=np.float64, count=count)
+            self.amounts = np.fromiter((s['totalAmount'] for s in self.summaries), dtype=np.float64, count=count)
+        else:
+            self.max_days = [s['maxDays'] for s in self.summaries]
+            self.avg_days = [s['avgDays'] for s in self.summaries]
+            self.amounts = [s['totalAmount'] for s in self.summaries]
+
+    def __len__(self):
+        return len(self.summaries)
+
+
+_column_cache = {}
+_column_cache_lock = threading.Lock()
+
+
+def client_columns(summaries):
+    """ClientColumns of a summary list, reused while the same list object is passed again
+
+    InvoiceIndex.query memoizes its result lists and an index never changes, so
+    repeated rankings of one view (e.g. with other weights) skip the extraction.
+    """
+    if not isinstance(summaries, list):
+        return ClientColumns(summaries)
+
+    with _column_cache_lock:
+        cached = _column_cache.get(id(summaries))
+        # Holding the list keeps its id from being reused by another object
+        if cached is not None and cached[0] is summaries:
+            return cached[1]
+
+    columns = ClientColumns(summaries)
+    with _column_cache_lock:
+        if len(_column_cache) >= COLUMN_CACHE_SIZE:
+            _column_cache.pop(next(iter(_column_cache)))
+        _column_cache[id(summaries)] = (summaries, columns)
+    return columns
+
+
+class PriorityScorer:
+    """Priority scores and top-k selection over client summaries"""
+
+    def __init__(self, weights=None):
+        self.weights = parse_weights(weights) if weights is not None else get_configured_weights()
+
+    def score_all(self, columns):
+        """Priority score of every client of a ClientColumns, in order"""
+        max_weight = self.weights['maxDays']
+        avg_weight = self.weights['avgDays']
+        amount_weight = self.weights['amount'] / AMOUNT_UNIT
+
+        if NUMPY_AVAILABLE:
+            return columns.max_days * max_weight + columns.avg_days * avg_weight + columns.amounts * amount_weight
+        return [
+            max_days * max_weight + avg_days * avg_weight + amount * amount_weight
+            for max_days, avg_days, amount in zip(columns.max_days, columns.avg_days, columns.amounts)
+        ]
+
+    def top(self, summaries, k=None):
+        """[(score, summary)] highest score first: the k best, or all when k is None
+
+        Accepts summaries or ClientColumns. Ties keep the input order, like a stable sort.
+        """
+        columns = summaries if isinstance(summaries, ClientColumns) else client_columns(summaries)
+        count = len(columns)
+        k = count if k is None else max(0, min(k, count))
+        if k == 0:
+            return []
+
+        scores = self.score_all(columns)
+        if NUMPY_AVAILABLE:
+            positions = _top_positions(scores, k)
+            return [(score, columns.summaries[position])
+                    for score, position in zip(scores[positions].tolist(), positions.tolist())]
+
+        positions = heapq.nlargest(k, range(count), key=scores.__getitem__)
+        return [(scores[position], columns.summaries[position]) for position in positions]
+
+
+def _top_positions(scores, k):
+    """Positions of the k highest scores (numpy), highest first, earlier position first on ties"""
+    import numpy as np
+    if k < len(scores):
+        # O(n) selection of the k-th score, then everything above it and the
+        # earliest clients tied with it
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate((above, tied))
+    else:
+        candidates = np.arange(len(scores))
+    # lexsort: last key is primary (score descending), then position ascending
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
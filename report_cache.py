@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Daily report artifact cache for Odoo Invoice Follow-Up Manager
+Stores generated reports (summary, CSV and PDF) on disk keyed by report date
+and dataset version, so test sends from the Settings page and the scheduled
+send reuse one report instead of regenerating it from Odoo.
+"""
+
+import os
+import json
+import zlib
+import base64
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPORT_CACHE_FORMAT_VERSION = 1
+REPORT_SUFFIX = '.report'
+
+
+class ReportArtifactCache:
+    """One compressed report file per (report date, dataset version) in a directory"""
+
+    def __init__(self, directory, max_age_seconds=3600):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+
+    def _path(self, report_date, dataset_version):
+        safe_version = base64.urlsafe_b64encode(str(dataset_version).encode('utf-8')).decode('ascii')
+        return os.path.join(self.directory, f"{report_date}_{safe_version}{REPORT_SUFFIX}")
+
+    def get(self, dataset_version, report_date=None):
+        """Cached report data for today's (or report_date's) dataset version, or None if missing or stale"""
+        report_date = report_date or datetime.now().strftime("%Y-%m-%d")
+        path = self._path(report_date, dataset_version)
+        if not os.path.exists(path):
+            return None
+        if self.max_age_seconds and time.time() - os.path.getmtime(path) > self.max_age_seconds:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                document = json.loads(zlib.decompress(f.read()))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cached report {path}: {e}")
+            return None
+        if document.get('formatVersion') != REPORT_CACHE_FORMAT_VERSION:
+            return None
+
+        report_data = document['report']
+        pdf_content = report_data.get('pdf_content')
+        report_data['pdf_content'] = base64.b64decode(pdf_content) if pdf_content else None
+        return report_data
+
+    def put(self, dataset_version, report_data):
+        """Atomically store report data (generate_daily_report output) and prune older report dates"""
+        report_date = report_data['report_date']
+        report = dict(report_data)
+        if report.get('pdf_content'):
+            report['pdf_content'] = base64.b64encode(report['pdf_content']).decode('ascii')
+        document = {
+            'formatVersion': REPORT_CACHE_FORMAT_VERSION,
+            'datasetVersion': dataset_version,
+            'report': report
+        }
+        raw = zlib.compress(json.dumps(document, default=str, separators=(',', ':')).encode('utf-8'), 6)
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(raw)
+                os.replace(tmp_path, self._path(report_date, dataset_version))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._prune(report_date)
+        return len(raw)
+
+    def get_or_generate(self, dataset_version, generate_fn, report_date=None):
+        """(report_data, from_cache): the cached report, or generate_fn() stored for next time"""
+        report_data = self.get(dataset_version, report_date)
+        if report_data is not None:
+            return report_data, True
+
+        report_data = generate_fn()
+        if report_data:
+            try:
+                self.put(dataset_version, report_data)
+            except Exception as e:
+                print(f"⚠️ Could not cache generated report: {e}")
+        return report_data, False
+
+    def _prune(self, report_date):
+        """Remove reports from earlier dates (they are never reused)"""
+        for filename in os.listdir(self.directory):
+            if filename.endswith(REPORT_SUFFIX) and filename.split('_', 1)[0] < report_date:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+
+def create_report_cache():
+    """Report cache in REPORT_CACHE_DIR (default data/report_cache next to this module)
+
+    REPORT_CACHE_MAX_AGE_SECONDS (default 3600, 0 = until the day ends) bounds how long a
+    report is reused when Odoo reports no invoice changes, e.g. after partner renames.
+    """
+    default_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'report_cache')
+    return ReportArtifactCache(
+        os.environ.get('REPORT_CACHE_DIR', default_directory),
+        max_age_seconds=int(os.environ.get('REPORT_CACHE_MAX_AGE_SECONDS', 3600))
+    )
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Response compression for the Odoo Invoice Follow-Up Manager backend
+Compresses JSON API responses with brotli (when installed) or gzip, and
+streamed responses (exports) with gzip chunk by chunk.
+"""
+
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+
+
+def _choose_encoding():
+    """Pick the best encoding the client accepts ('br', 'gzip' or None)"""
+    accept_encodings = request.accept_encodings
+    if BROTLI_AVAILABLE and accept_encodings.quality('br') > 0:
+        return 'br'
+    if accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """after_request hook: compress eligible JSON responses in place"""
+    if (response.status_code < 200 or response.status_code >= 300
+            or response.status_code == 204
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = _choose_encoding()
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(compressed))
+    return response
+
+
+def compress_stream(chunks):
+    """(chunks, encoding) for a streamed response: gzipped chunk by chunk if the client accepts gzip
+
+    Every chunk is flushed, so compressed bytes reach the client as soon as they are produced.
+    """
+    if request.accept_encodings.quality('gzip') <= 0:
+        return chunks, None
+
+    def generate():
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    return generate(), 'gzip'
+
+
+def init_compression(app):
+    """Register response compression on a Flask app"""
+    app.after_request(compress_response)
+    print(f"🗜️ Response compression enabled (gzip{', brotli' if BROTLI_AVAILABLE else ''})")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Odoo RPC accounting for Odoo Invoice Follow-Up Manager
+Records every RPC made by OdooConnector and InvoicePDFGenerator (model, method,
+records returned, latency and bytes) under the logical operation that made it,
+and warns when one operation calls the same model more than a budget allows,
+which usually means a per-record (N+1) lookup.
+"""
+
+import os
+import time
+import threading
+import functools
+import contextvars
+from collections import deque
+
+# Calls to one model within one operation before an N+1 warning is logged
+RPC_CALL_BUDGET = int(os.environ.get('RPC_CALL_BUDGET', 20))
+# Finished operations kept for the summary
+RECENT_OPERATIONS = 100
+
+
+class Operation:
+    """RPC calls made by one logical operation (a backend request, an invoice fetch, ...)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.finished_at = None
+        self.calls = {}
+        self.warned_models = set()
+
+    def model_calls(self, model):
+        return sum(stats['calls'] for (call_model, _), stats in self.calls.items() if call_model == model)
+
+    def to_dict(self):
+        calls = [
+            dict(stats, model=model, method=method, totalMs=round(stats['totalMs'], 1), maxMs=round(stats['maxMs'], 1))
+            for (model, method), stats in self.calls.items()
+        ]
+        return {
+            'name': self.name,
+            'startedAt': self.started_at,
+            'durationMs': round(((self.finished_at or time.time()) - self.started_at) * 1000, 1),
+            'totalCalls': sum(call['calls'] for call in calls),
+            'calls': sorted(calls, key=lambda call: call['calls'], reverse=True),
+            'overBudget': sorted(self.warned_models)
+        }
+
+
+def _add_call(stats, key, records, seconds, size):
+    entry = stats.get(key)
+    if entry is None:
+        entry = stats[key] = {'calls': 0, 'records': 0, 'bytes': 0, 'totalMs': 0.0, 'maxMs': 0.0}
+    milliseconds = seconds * 1000
+    entry['calls'] += 1
+    entry['records'] += records
+    entry['bytes'] += size
+    entry['totalMs'] += milliseconds
+    entry['maxMs'] = max(entry['maxMs'], milliseconds)
+
+
+class RpcMetrics:
+    """Process-wide RPC totals plus the calls of active and recent operations"""
+
+    def __init__(self, budget=RPC_CALL_BUDGET, recent=RECENT_OPERATIONS):
+        self.budget = budget
+        self._operations = contextvars.ContextVar('rpc_operations', default=())
+        self._totals = {}
+        self._operation_totals = {}
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        """Begin an operation in the current context; returns a token for finish()"""
+        operation = Operation(name)
+        return operation, self._operations.set(self._operations.get() + (operation,))
+
+    def finish(self, started):
+        """End an operation begun with start()"""
+        operation, token = started
+        try:
+            self._operations.reset(token)
+        except ValueError:
+            # Finished from another context (e.g. after a streamed response)
+            self._operations.set(tuple(active for active in self._operations.get() if active is not operation))
+        operation.finished_at = time.time()
+        with self._lock:
+            if operation.calls:
+                self._recent.append(operation)
+            totals = self._operation_totals.setdefault(operation.name, {'count': 0, 'calls': 0, 'maxCalls': 0})
+            call_count = sum(stats['calls'] for stats in operation.calls.values())
+            totals['count'] += 1
+            totals['calls'] += call_count
+            totals['maxCalls'] = max(totals['maxCalls'], call_count)
+        return operation
+
+    def operation(self, name=None):
+        """Decorator running a function as an operation named name (default: its qualified name)
+
+        Calls made inside nested operations also count toward the outer ones.
+        """
+        def decorator(fn):
+            operation_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = self.start(operation_name)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.finish(started)
+            return wrapper
+        return decorator
+
+    def record(self, model, method, seconds, records=0, size=0):
+        """Count one RPC toward the process totals and every active operation"""
+        key = (model, method)
+        over_budget = []
+        with self._lock:
+            _add_call(self._totals, key, records, seconds, size)
+            for operation in self._operations.get():
+                _add_call(operation.calls, key, records, seconds, size)
+                if self.budget and model not in operation.warned_models and operation.model_calls(model) > self.budget:
+                    operation.warned_models.add(model)
+                    over_budget.append(operation.name)
+        for name in over_budget:
+            print(f"⚠️ RPC budget exceeded: {name} made more than {self.budget} calls to {model} (possible N+1 lookup)")
+
+    def summary(self, recent=20):
+        """Per-model/method totals, per-operation totals and the most recent operations"""
+        with self._lock:
+            totals = [
+                dict(stats, model=model, method=method,
+                     avgMs=round(stats['totalMs'] / stats['calls'], 1), totalMs=round(stats['totalMs'], 1),
+                     maxMs=round(stats['maxMs'], 1))
+                for (model, method), stats in self._totals.items()
+            ]
+            operations = {
+                name: dict(stats, avgCalls=round(stats['calls'] / stats['count'], 1))
+                for name, stats in self._operation_totals.items()
+            }
+            recent_operations = [operation.to_dict() for operation in list(self._recent)[-recent:]]
+        return {
+            'budget': self.budget,
+            'totals': sorted(totals, key=lambda stats: stats['calls'], reverse=True),
+            'operations': operations,
+            'recent': recent_operations[::-1]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._operation_totals.clear()
+            self._recent.clear()
+
+
+def result_records(result):
+    """Records in an RPC result: list length, 1 for a single value, 0 for none"""
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def init_rpc_metrics(app):
+    """Run every backend request as an operation named after its endpoint"""
+    from flask import g, request
+
+    def start_request_operation():
+        g.rpc_operation = rpc_metrics.start(f"{request.method} {request.url_rule.rule if request.url_rule else request.path}")
+
+    def finish_request_operation(error=None):
+        started = g.pop('rpc_operation', None)
+        if started is not None:
+            rpc_metrics.finish(started)
+
+    app.before_request(start_request_operation)
+    app.teardown_request(finish_request_operation)
+    print(f"📈 RPC accounting enabled (budget {rpc_metrics.budget} calls per model per operation)")
+
+
+# Global RPC metrics shared by the connector, the PDF generator and the backend
+rpc_metrics = RpcMetrics()
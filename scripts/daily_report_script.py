@@ -9,28 +9,87 @@ It will:
 3. Connect to Odoo and generate the report
 4. Send the report via email with PDF attachment
 5. Log the results
+
+Run with --scheduler to keep it running instead: it sleeps until the next
+report time, catches up on a report whose time has passed, and reuses the
+Odoo connection between runs.
 """
 
 import sys
 import os
 import csv
 import io
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
 # Add the parent directory to the path so we can import our modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from config_manager import ConfigManager
+from config_manager import get_config_manager, REPORT_RETRY_MINUTES
 from core import OdooConnector
+from invoice_index import build_invoice_index, ClientAggregates
+from report_cache import create_report_cache
+from overdue_history import create_overdue_history, history_source
+from priority_scoring import PriorityScorer
 
 def log_message(message, level="INFO"):
     """Log a message with timestamp"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {level}: {message}")
 
-def generate_pdf_report(invoices, top_clients=None, severe_clients=None, moderate_clients=None):
-    """Generate a comprehensive PDF report identical to the download button"""
+# Client rows rendered per PDF section; longer lists are summarized (the CSV has every row)
+MAX_PDF_SECTION_ROWS = 5000
+
+# Height of one table row: 10pt text plus 6pt top and 8pt bottom padding
+PDF_TABLE_ROW_HEIGHT = 26
+
+# The PDF renders in a worker process while invoice rows are fetched from Odoo. When the rows
+# are already loaded only the CSV overlaps with it, so smaller PDFs than this (severe clients)
+# render inline, faster than a worker process starts
+PDF_WORKER_MIN_CLIENTS = 1000
+
+_pdf_executor = None
+_pdf_executor_lock = threading.Lock()
+
+# Odoo connectors kept between scheduler runs, keyed by connection_key
+_connectors = {}
+
+def truncate_client_name(client_name, max_length=25):
+    """Shorten long client names to fit the PDF table column"""
+    return client_name[:max_length] + '...' if len(client_name) > max_length else client_name
+
+def build_client_table(header, rows, col_widths):
+    """One multi-page table per report section: repeating header row, striped rows via style commands"""
+    from reportlab.platypus import Table, TableStyle
+    from reportlab.lib import colors
+    
+    # Fixed row heights (single-line cells) spare reportlab from measuring every
+    # remaining cell again each time the table is split across a page
+    table = Table([header] + rows, colWidths=col_widths, rowHeights=PDF_TABLE_ROW_HEIGHT, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(52/255, 73/255, 94/255)),  # Dark blue header
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.Color(52/255, 73/255, 94/255)),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.Color(248/255, 249/255, 250/255), colors.white]),  # Alternate row colors
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    return table
+
+def generate_pdf_report(report_aggregates):
+    """Generate a comprehensive PDF report identical to the download button
+    
+    Takes the output of build_report_aggregates (small and picklable, so it can be
+    rendered in a worker process) rather than the invoice list.
+    """
     try:
         # Import jsPDF equivalent for Python (we'll use reportlab but match the exact layout)
         from reportlab.lib.pagesizes import letter, A4
@@ -96,44 +155,12 @@ def generate_pdf_report(invoices, top_clients=None, severe_clients=None, moderat
         story.append(Paragraph("SUMMARY", heading_style))
         story.append(Spacer(1, 15))
         
-        # Calculate report data exactly like download button
-        total_invoices = len(invoices)
-        total_amount = sum(inv['amount_due'] for inv in invoices)
-        
-        # Use passed parameters or calculate if not provided
-        if severe_clients is None or moderate_clients is None:
-            # Group invoices by client exactly like download button
-            client_invoices = {}
-            for invoice in invoices:
-                client_name = invoice['client_name']
-                if client_name not in client_invoices:
-                    client_invoices[client_name] = []
-                client_invoices[client_name].append(invoice)
-            
-            # Find severely overdue clients (>30 days) - exactly like download button
-            severe_clients = []
-            moderate_clients = []
-            
-            for client_name, client_inv_list in client_invoices.items():
-                max_days = max(inv['days_overdue'] for inv in client_inv_list)
-                total_amount_client = sum(inv['amount_due'] for inv in client_inv_list)
-                invoice_count = len(client_inv_list)
-                
-                client_summary = {
-                    'clientName': client_name,
-                    'totalAmount': total_amount_client,
-                    'invoiceCount': invoice_count,
-                    'maxDays': max_days
-                }
-                
-                if max_days > 30:
-                    severe_clients.append(client_summary)
-                elif max_days > 15 and max_days <= 30:
-                    moderate_clients.append(client_summary)
-            
-            # Sort by amount descending exactly like download button
-            severe_clients.sort(key=lambda x: x['totalAmount'], reverse=True)
-            moderate_clients.sort(key=lambda x: x['totalAmount'], reverse=True)
+        # Report data computed once by build_report_aggregates
+        total_invoices = report_aggregates['total_invoices']
+        total_amount = report_aggregates['total_amount']
+        top_clients = report_aggregates['top_clients']
+        severe_clients = report_aggregates['severe_clients']
+        moderate_clients = report_aggregates['moderate_clients']
         
         # Summary box - exactly like download button
         summary_data = [
@@ -163,47 +190,18 @@ def generate_pdf_report(invoices, top_clients=None, severe_clients=None, moderat
             story.append(Paragraph("TOP 3 CLIENTS TO FOLLOW UP ON", heading_style))
             story.append(Spacer(1, 15))
             
-            # Table header for top clients
-            top_header_data = [['Client Name', 'Total Amount', 'Max Days Overdue', 'Avg Days Overdue', 'Invoice Count']]
-            top_header_table = Table(top_header_data, colWidths=[2.5*inch, 1.5*inch, 1.2*inch, 1.2*inch, 1*inch])
-            top_header_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.Color(52/255, 73/255, 94/255)),  # Dark blue header
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            story.append(top_header_table)
-            story.append(Spacer(1, 12))
-            
-            # Table rows for top clients
-            for index, client in enumerate(top_clients):
-                # Alternate row colors
-                if index % 2 == 0:
-                    row_color = colors.Color(248/255, 249/255, 250/255)  # Light gray
-                else:
-                    row_color = colors.white
-                
-                row_data = [[
-                    client['client_name'][:25] + '...' if len(client['client_name']) > 25 else client['client_name'],
-                    f"${client['total_amount']:,.2f}",
-                    str(client['max_days_overdue']),
-                    str(client['avg_days_overdue']),
-                    str(client['invoice_count'])
-                ]]
-                
-                row_table = Table(row_data, colWidths=[2.5*inch, 1.5*inch, 1.2*inch, 1.2*inch, 1*inch])
-                row_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), row_color),
-                    ('TEXTCOLOR', (0, 0), (-1, -1), colors.Color(52/255, 73/255, 94/255)),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ]))
-                story.append(row_table)
-                story.append(Spacer(1, 12))
+            top_rows = [[
+                truncate_client_name(client['client_name']),
+                f"${client['total_amount']:,.2f}",
+                str(client['max_days_overdue']),
+                str(client['avg_days_overdue']),
+                str(client['invoice_count'])
+            ] for client in top_clients]
+            story.append(build_client_table(
+                ['Client Name', 'Total Amount', 'Max Days Overdue', 'Avg Days Overdue', 'Invoice Count'],
+                top_rows,
+                [2.5*inch, 1.5*inch, 1.2*inch, 1.2*inch, 1*inch]
+            ))
         else:
             story.append(Paragraph("No clients identified for follow-up.", normal_style))
             story.append(Spacer(1, 20))
@@ -213,52 +211,29 @@ def generate_pdf_report(invoices, top_clients=None, severe_clients=None, moderat
         # Severely Overdue Clients Section - exactly like download button
         log_message(f"Debug: severe_clients count = {len(severe_clients) if severe_clients else 0}")
         if severe_clients:
-            log_message(f"Debug: First 3 severe clients: {severe_clients[:3]}")
-            log_message(f"Debug: severe_clients type: {type(severe_clients)}")
-            log_message(f"Debug: severe_clients is empty: {len(severe_clients) == 0}")
             story.append(Paragraph("SEVERELY OVERDUE CLIENTS", heading_style))
             story.append(Spacer(1, 15))
             
-            # Table header - exactly like download button
-            header_data = [['Client Name', 'Amount', 'Invoices', 'Days Overdue']]
-            header_table = Table(header_data, colWidths=[2.5*inch, 1.5*inch, 1*inch, 1*inch])
-            header_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.Color(52/255, 73/255, 94/255)),  # Dark blue header
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            story.append(header_table)
-            story.append(Spacer(1, 12))
+            # Very long lists are capped; the CSV attachment has every client
+            shown_clients = severe_clients[:MAX_PDF_SECTION_ROWS]
+            severe_rows = [[
+                truncate_client_name(client['clientName']),
+                f"${client['totalAmount']:,.2f}",
+                str(client['invoiceCount']),
+                str(client['maxDays'])
+            ] for client in shown_clients]
+            story.append(build_client_table(
+                ['Client Name', 'Amount', 'Invoices', 'Days Overdue'],
+                severe_rows,
+                [2.5*inch, 1.5*inch, 1*inch, 1*inch]
+            ))
             
-            # Table rows - exactly like download button
-            for index, client in enumerate(severe_clients):
-                # Alternate row colors
-                if index % 2 == 0:
-                    row_color = colors.Color(248/255, 249/255, 250/255)  # Light gray
-                else:
-                    row_color = colors.white
-                
-                row_data = [[
-                    client['clientName'][:25] + '...' if len(client['clientName']) > 25 else client['clientName'],
-                    f"${client['totalAmount']:,.2f}",
-                    str(client['invoiceCount']),
-                    str(client['maxDays'])
-                ]]
-                
-                row_table = Table(row_data, colWidths=[2.5*inch, 1.5*inch, 1*inch, 1*inch])
-                row_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), row_color),
-                    ('TEXTCOLOR', (0, 0), (-1, -1), colors.Color(52/255, 73/255, 94/255)),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ]))
-                story.append(row_table)
-                story.append(Spacer(1, 12))
+            if len(severe_clients) > len(shown_clients):
+                story.append(Spacer(1, 10))
+                story.append(Paragraph(
+                    f"... and {len(severe_clients) - len(shown_clients):,} more severely overdue clients (see the CSV attachment).",
+                    normal_style
+                ))
         else:
             story.append(Paragraph("No severely overdue clients found.", normal_style))
             story.append(Spacer(1, 20))
@@ -291,136 +266,224 @@ def generate_pdf_report(invoices, top_clients=None, severe_clients=None, moderat
         log_message(f"Error generating PDF report: {str(e)}", "ERROR")
         return None
 
-def calculate_top_clients_to_follow_up(client_invoices):
-    """Calculate top 3 clients to follow up on based on overdue duration and invoice amounts"""
-    client_scores = []
-    
-    for client_name, client_inv_list in client_invoices.items():
-        # Calculate metrics for this client
-        total_amount = sum(inv['amount_due'] for inv in client_inv_list)
-        max_days_overdue = max(inv['days_overdue'] for inv in client_inv_list)
-        avg_days_overdue = sum(inv['days_overdue'] for inv in client_inv_list) / len(client_inv_list)
-        invoice_count = len(client_inv_list)
-        
-        # Calculate priority score (more weight to overdue duration)
-        # Formula: (max_days_overdue * 0.6) + (avg_days_overdue * 0.3) + (total_amount / 1000 * 0.1)
-        # This gives 60% weight to longest overdue, 30% to average overdue, 10% to amount
-        priority_score = (max_days_overdue * 0.6) + (avg_days_overdue * 0.3) + (total_amount / 1000 * 0.1)
-        
-        client_scores.append({
-            'client_name': client_name,
-            'total_amount': total_amount,
-            'max_days_overdue': max_days_overdue,
-            'avg_days_overdue': round(avg_days_overdue, 1),
-            'invoice_count': invoice_count,
+def calculate_top_clients_to_follow_up(client_aggregates, limit=3):
+    """Top clients to follow up on by priority score (see priority_scoring, weights from PRIORITY_WEIGHTS)"""
+    return [
+        {
+            'client_name': client_summary['clientName'],
+            'total_amount': client_summary['totalAmount'],
+            'max_days_overdue': client_summary['maxDays'],
+            'avg_days_overdue': round(client_summary['avgDays'], 1),
+            'invoice_count': client_summary['invoiceCount'],
             'priority_score': priority_score
-        })
+        }
+        for priority_score, client_summary in PriorityScorer().top(client_aggregates.client_summaries.values(), limit)
+    ]
+
+def build_report_aggregates(client_aggregates):
+    """Totals, top clients and severity buckets shared by the CSV, the PDF and the email, computed once"""
+    return {
+        'total_invoices': len(client_aggregates),
+        'total_amount': client_aggregates.total_amount,
+        'total_clients': client_aggregates.client_count,
+        'top_clients': calculate_top_clients_to_follow_up(client_aggregates),
+        # Severe (>30 days) and moderate (16-30 days) clients, largest balance first
+        'severe_clients': client_aggregates.clients_in_bucket('severe'),
+        'moderate_clients': client_aggregates.clients_in_bucket('moderate')
+    }
+
+def get_pdf_executor():
+    """Process pool for PDF rendering (one per report rendered at once, up to 4), kept warm for the scheduler"""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn behaves the same on Windows and is safe to start from the threaded backend;
+            # workers are only started when reports are rendered concurrently
+            _pdf_executor = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return _pdf_executor
+
+def start_pdf_report(report_aggregates, rows_pending=False):
+    """Start rendering the PDF in the worker process. Returns a future, or None to render inline."""
+    if not rows_pending and len(report_aggregates['severe_clients']) < PDF_WORKER_MIN_CLIENTS:
+        return None
+    try:
+        return get_pdf_executor().submit(generate_pdf_report, report_aggregates)
+    except Exception as e:
+        log_message(f"PDF worker unavailable ({str(e)}), rendering inline", "WARNING")
+        return None
+
+def finish_pdf_report(pdf_future, report_aggregates):
+    """PDF bytes from the worker process, or rendered inline without one (or if the worker died)"""
+    global _pdf_executor
+    if pdf_future is not None:
+        try:
+            return pdf_future.result()
+        except Exception as e:
+            log_message(f"PDF worker failed ({str(e)}), rendering inline", "WARNING")
+            _pdf_executor = None  # A broken pool cannot be reused
+    return generate_pdf_report(report_aggregates)
+
+def build_report_csv(invoices, top_clients, delta=None):
+    """CSV attachment: every overdue invoice grouped by client, the top clients to follow up on
+    and, with a day-over-day delta, the invoices that changed since the previous snapshot"""
+    csv_buffer = io.StringIO()
+    csv_writer = csv.writer(csv_buffer)
+    
+    # Write header
+    csv_writer.writerow([
+        'Client Name', 'Invoice Number', 'Invoice Date', 'Due Date', 
+        'Origin', 'Amount Due', 'Currency', 'Days Overdue', 'Company'
+    ])
+    
+    # Write data rows, grouped by client
+    invoices_by_client = {}
+    for invoice in invoices:
+        invoices_by_client.setdefault(invoice['client_name'], []).append(invoice)
+    
+    for client_name, client_inv_list in invoices_by_client.items():
+        for invoice in client_inv_list:
+            csv_writer.writerow([
+                invoice['client_name'],
+                invoice['invoice_number'],
+                invoice['invoice_date'],
+                invoice['due_date'],
+                invoice.get('origin', ''),
+                invoice['amount_due'],
+                invoice['currency_symbol'],
+                invoice['days_overdue'],
+                invoice['company_name']
+            ])
+    
+    # Add top clients to follow up on section
+    csv_writer.writerow([])  # Empty row for separation
+    csv_writer.writerow(['TOP 3 CLIENTS TO FOLLOW UP ON'])
+    csv_writer.writerow(['Client Name', 'Total Amount', 'Max Days Overdue', 'Average Days Overdue', 'Invoice Count', 'Priority Score'])
+    
+    for client in top_clients:
+        csv_writer.writerow([
+            client['client_name'],
+            client['total_amount'],
+            client['max_days_overdue'],
+            client['avg_days_overdue'],
+            client['invoice_count'],
+            round(client['priority_score'], 2)
+        ])
+    
+    if delta:
+        csv_writer.writerow([])
+        csv_writer.writerow([f"CHANGES SINCE {delta['previousDay']}"])
+        csv_writer.writerow(['Change', 'Client Name', 'Invoice Number', 'Amount Due', 'Days Overdue'])
+        for key, label in CHANGE_CATEGORIES:
+            for row in delta[key]:
+                csv_writer.writerow([
+                    label,
+                    row['client_name'],
+                    row['invoice_number'],
+                    row['amount_due'],
+                    row['days_overdue']
+                ])
     
-    # Sort by priority score (highest first) and return top 3
-    client_scores.sort(key=lambda x: x['priority_score'], reverse=True)
-    return client_scores[:3]
+    csv_content = csv_buffer.getvalue()
+    csv_buffer.close()
+    return csv_content
+
+def load_report_data(connector):
+    """Per-client aggregates for the report. Returns (client_aggregates, invoices).
+    
+    Client totals are aggregated by Odoo (read_group) and invoices is None: the rows for the
+    CSV listing are fetched afterwards with load_invoice_rows, while the PDF renders. Falls
+    back to the full enriched invoice fetch if aggregation fails.
+    """
+    try:
+        return ClientAggregates(connector.get_overdue_aggregates()), None
+    except Exception as e:
+        log_message(f"Odoo aggregation failed ({str(e)}), using full invoice data", "WARNING")
+        invoices = connector.get_overdue_invoices()
+        return build_invoice_index(invoices), invoices
+
+def load_invoice_rows(connector):
+    """Invoice rows for the CSV listing (full enriched fetch if the lightweight one fails)
+    
+    Returns (rows, complete): complete is False for the fallback, whose fetch is capped.
+    """
+    try:
+        return connector.get_overdue_invoice_rows(), True
+    except Exception as e:
+        log_message(f"Invoice row fetch failed ({str(e)}), using full invoice data", "WARNING")
+        return connector.get_overdue_invoices(), False
+
+# Day-over-day change categories: (delta key, label used in the email and the CSV)
+CHANGE_CATEGORIES = (
+    ('newlyOverdue', 'Newly overdue'),
+    ('resolved', 'Paid or closed'),
+    ('escalated', 'Escalated past 15/30 days'),
+)
+
+def record_overdue_history(connector, rows=None):
+    """Save today's overdue snapshot and diff it against the previous one
+    
+    rows are full get_overdue_invoice_rows output already fetched for the CSV; without
+    them the snapshot is fetched from Odoo (see OverdueHistoryStore.record_from_odoo).
+    Returns the day-over-day delta (see OverdueHistoryStore.day_over_day), or None on the
+    first run or if the history is unavailable.
+    """
+    try:
+        history = create_overdue_history()
+        history.record_from_odoo(connector, rows)
+        return history.day_over_day(history_source(connector.url, connector.database), datetime.now().strftime("%Y-%m-%d"))
+    except Exception as e:
+        log_message(f"Could not update overdue history: {str(e)}", "WARNING")
+        return None
+
+def summarize_changes(delta):
+    """Counts and amounts per change category for the email and the report summary"""
+    if not delta:
+        return None
+    changes = {
+        'previous_day': delta['previousDay'],
+        'total_amount_change': round(delta['totalAmount'] - delta['previousTotalAmount'], 2)
+    }
+    for key, _ in CHANGE_CATEGORIES:
+        changes[key] = {
+            'count': len(delta[key]),
+            'amount': round(sum(row['amount_due'] for row in delta[key]), 2)
+        }
+    return changes
 
 def generate_daily_report(connector):
     """Generate the same report as the Settings page download button"""
     try:
         log_message("Generating daily report...")
         
-        # Get overdue invoices (same logic as Settings page)
-        invoices = connector.get_overdue_invoices()
+        # Get per-client totals (same logic as Settings page)
+        client_aggregates, invoices = load_report_data(connector)
         
-        if not invoices:
+        if not len(client_aggregates):
             log_message("No overdue invoices found", "WARNING")
             return None
         
-        # Group invoices by client
-        client_invoices = {}
-        for invoice in invoices:
-            client_name = invoice['client_name']
-            if client_name not in client_invoices:
-                client_invoices[client_name] = []
-            client_invoices[client_name].append(invoice)
-        
-        # Calculate top clients to follow up on
-        top_clients = calculate_top_clients_to_follow_up(client_invoices)
-        
-        # Calculate severe and moderate clients for PDF report
-        severe_clients = []
-        moderate_clients = []
-        
-        for client_name, client_inv_list in client_invoices.items():
-            max_days = max(inv['days_overdue'] for inv in client_inv_list)
-            total_amount_client = sum(inv['amount_due'] for inv in client_inv_list)
-            invoice_count = len(client_inv_list)
-            
-            client_summary = {
-                'clientName': client_name,
-                'totalAmount': total_amount_client,
-                'invoiceCount': invoice_count,
-                'maxDays': max_days
-            }
-            
-            if max_days > 30:
-                severe_clients.append(client_summary)
-            elif max_days > 15 and max_days <= 30:
-                moderate_clients.append(client_summary)
-        
-        # Sort by amount descending
-        severe_clients.sort(key=lambda x: x['totalAmount'], reverse=True)
-        moderate_clients.sort(key=lambda x: x['totalAmount'], reverse=True)
-        
-        log_message(f"Debug: Calculated {len(severe_clients)} severe clients and {len(moderate_clients)} moderate clients")
-        log_message(f"Debug: First 3 severe clients in generate_daily_report: {severe_clients[:3] if severe_clients else 'None'}")
-        
-        # Calculate summary statistics
-        total_invoices = len(invoices)
-        total_amount = sum(inv['amount_due'] for inv in invoices)
-        total_clients = len(client_invoices)
-        
-        # Create CSV report
-        csv_buffer = io.StringIO()
-        csv_writer = csv.writer(csv_buffer)
-        
-        # Write header
-        csv_writer.writerow([
-            'Client Name', 'Invoice Number', 'Invoice Date', 'Due Date', 
-            'Origin', 'Amount Due', 'Currency', 'Days Overdue', 'Company'
-        ])
-        
-        # Write data rows
-        for client_name, client_inv_list in client_invoices.items():
-            for invoice in client_inv_list:
-                csv_writer.writerow([
-                    invoice['client_name'],
-                    invoice['invoice_number'],
-                    invoice['invoice_date'],
-                    invoice['due_date'],
-                    invoice.get('origin', ''),
-                    invoice['amount_due'],
-                    invoice['currency_symbol'],
-                    invoice['days_overdue'],
-                    invoice['company_name']
-                ])
-        
-        # Add top clients to follow up on section
-        csv_writer.writerow([])  # Empty row for separation
-        csv_writer.writerow(['TOP 3 CLIENTS TO FOLLOW UP ON'])
-        csv_writer.writerow(['Client Name', 'Total Amount', 'Max Days Overdue', 'Average Days Overdue', 'Invoice Count', 'Priority Score'])
-        
-        for client in top_clients:
-            csv_writer.writerow([
-                client['client_name'],
-                client['total_amount'],
-                client['max_days_overdue'],
-                client['avg_days_overdue'],
-                client['invoice_count'],
-                round(client['priority_score'], 2)
-            ])
-        
-        csv_content = csv_buffer.getvalue()
-        csv_buffer.close()
-        
-        # Generate PDF report
-        pdf_content = generate_pdf_report(invoices, top_clients, severe_clients, moderate_clients)
+        # Aggregates shared by the CSV, the PDF and the email
+        report_aggregates = build_report_aggregates(client_aggregates)
+        top_clients = report_aggregates['top_clients']
+        total_invoices = report_aggregates['total_invoices']
+        total_amount = report_aggregates['total_amount']
+        total_clients = report_aggregates['total_clients']
+        
+        log_message(f"Debug: Calculated {len(report_aggregates['severe_clients'])} severe clients and {len(report_aggregates['moderate_clients'])} moderate clients")
+        
+        # Render the PDF in the worker process while invoice rows are fetched and the CSV is written
+        pdf_future = start_pdf_report(report_aggregates, rows_pending=invoices is None)
+        history_rows = None
+        if invoices is None:
+            invoices, complete = load_invoice_rows(connector)
+            history_rows = invoices if complete else None
+        # History only takes the uncapped rows; otherwise it fetches them itself
+        delta = record_overdue_history(connector, history_rows)
+        csv_content = build_report_csv(invoices, top_clients, delta)
+        pdf_content = finish_pdf_report(pdf_future, report_aggregates)
         
         # Create summary
         summary = {
@@ -430,7 +493,8 @@ def generate_daily_report(connector):
             'top_clients_to_follow_up': top_clients,
             'report_date': datetime.now().strftime("%Y-%m-%d"),
             'csv_content': csv_content,
-            'pdf_content': pdf_content
+            'pdf_content': pdf_content,
+            'changes': summarize_changes(delta)
         }
         
         log_message(f"Report generated: {total_invoices} invoices, {total_clients} clients, ${total_amount:,.2f} total")
@@ -440,6 +504,31 @@ def generate_daily_report(connector):
         log_message(f"Error generating report: {str(e)}", "ERROR")
         return None
 
+def get_daily_report(connector, report_cache=None):
+    """Today's report for the current Odoo data, reused from the report cache when nothing changed
+    
+    Returns (report_data, from_cache). Without a dataset version (Odoo fingerprint failed)
+    the report is generated without caching.
+    """
+    report_cache = report_cache or create_report_cache()
+    try:
+        dataset_version = connector.get_overdue_dataset_version()
+        if dataset_version:
+            # Namespaced by database so tenants with the same fingerprint never share a report
+            source = hashlib.sha1(f"{connector.url}|{connector.database}".encode('utf-8')).hexdigest()[:8]
+            dataset_version = f"{source}-{dataset_version}"
+    except Exception as e:
+        log_message(f"Could not fingerprint Odoo data ({str(e)}), generating a fresh report", "WARNING")
+        dataset_version = None
+    
+    if not dataset_version:
+        return generate_daily_report(connector), False
+    
+    report_data, from_cache = report_cache.get_or_generate(dataset_version, lambda: generate_daily_report(connector))
+    if from_cache:
+        log_message(f"Reusing today's report for unchanged Odoo data (version {dataset_version})")
+    return report_data, from_cache
+
 def send_daily_report_email(config, report_data):
     """Send the daily report via email with threading support"""
     try:
@@ -460,7 +549,11 @@ def send_daily_report_email(config, report_data):
         msg = MIMEMultipart()
         msg['From'] = email_config['sender_email']
         msg['To'] = recipient_email
-        msg['Subject'] = f"Daily Invoice Follow-Up Report - {datetime.now().strftime('%Y-%m-%d')}"
+        subject = f"Daily Invoice Follow-Up Report - {datetime.now().strftime('%Y-%m-%d')}"
+        profile_name = config['automated_reports'].get('name')
+        if profile_name and profile_name != 'default':
+            subject += f" ({profile_name})"  # Tell tenants apart when several report profiles are configured
+        msg['Subject'] = subject
         
         # Create email body
         body = f"""Dear Finance Team,
@@ -488,6 +581,15 @@ Top 3 Clients to Follow Up On:
         else:
             body += "No clients identified for follow-up at this time.\n"
         
+        # Add what changed since the previous snapshot (not on the first run)
+        changes = report_data.get('changes')
+        if changes:
+            body += f"\nChanges since {changes['previous_day']}:\n"
+            for key, label in CHANGE_CATEGORIES:
+                body += f"- {label}: {changes[key]['count']} invoices (${changes[key]['amount']:,.2f})\n"
+            amount_change = changes['total_amount_change']
+            body += f"- Outstanding amount: {'+' if amount_change >= 0 else '-'}${abs(amount_change):,.2f}\n"
+        
         body += f"""
 
 The detailed report is attached as a CSV file.
@@ -567,66 +669,175 @@ Invoice Follow-Up System
         log_message(f"Error sending email: {str(e)}", "ERROR")
         return False
 
+def get_connector(odoo_config, connector=None):
+    """Connect to Odoo, reusing a warm connector (HTTP pool, partner caches) when the credentials match"""
+    credentials = (odoo_config['url'].rstrip('/'), odoo_config['database'], odoo_config['username'], odoo_config['password'])
+    if connector is None or (connector.url, connector.database, connector.username, connector.password) != credentials:
+        connector = OdooConnector(
+            odoo_config['url'],
+            odoo_config['database'],
+            odoo_config['username'],
+            odoo_config['password']
+        )
+    
+    # Re-authenticate every run so an expired Odoo session doesn't produce an empty report
+    if not connector.connect():
+        return None
+    return connector
+
+def connection_key(odoo_config):
+    """Profiles with the same Odoo URL, database and login share one connector (and session cookie)"""
+    return (odoo_config.get('url', '').rstrip('/'), odoo_config.get('database', ''), odoo_config.get('username', ''))
+
+def send_profile_reports(profiles):
+    """Generate and send the reports of profiles sharing one Odoo connection, one after another
+    
+    The connector is reused from earlier runs, and profiles after the first reuse the
+    cached report when the data is unchanged. Returns one result dict per profile.
+    """
+    odoo_config = profiles[0]['odoo_connection']
+    key = connection_key(odoo_config)
+    connector = None
+    results = []
+    
+    for profile in profiles:
+        started = time.time()
+        result = {'profile': profile['name'], 'success': False, 'from_cache': False}
+        try:
+            if not all([odoo_config.get('url'), odoo_config.get('database'),
+                        odoo_config.get('username'), odoo_config.get('password')]):
+                raise Exception("Odoo connection details not configured")
+            
+            if connector is None:
+                connector = get_connector(odoo_config, _connectors.get(key))
+                if connector is None:
+                    raise Exception("Failed to connect to Odoo")
+                _connectors[key] = connector
+                log_message(f"[{profile['name']}] Connected to Odoo successfully")
+            
+            # Generate report (or reuse today's report if a test send or another profile already built it)
+            report_data, result['from_cache'] = get_daily_report(connector)
+            if not report_data:
+                raise Exception("No report data to send")
+            
+            if not send_daily_report_email({'automated_reports': profile}, report_data):
+                raise Exception("Failed to send daily report email")
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            log_message(f"[{profile['name']}] {str(e)}", "ERROR")
+        result['seconds'] = round(time.time() - started, 2)
+        results.append(result)
+    
+    return results
+
+def send_scheduled_reports(config_manager, profiles=None, max_workers=None):
+    """Generate and send the report of every pending profile. Returns a result dict per profile.
+    
+    Profiles are grouped by Odoo connection and the groups run concurrently in a thread
+    pool bounded by automated_reports.max_parallel_reports (default 4). Successful
+    profiles are marked as sent; failed ones stay pending and are retried once the
+    retry delay has passed (see ConfigManager.get_due_report_profiles).
+    """
+    if profiles is None:
+        profiles = config_manager.get_due_report_profiles()
+    if not profiles:
+        return []
+    
+    groups = {}
+    for profile in profiles:
+        groups.setdefault(connection_key(profile.get('odoo_connection', {})), []).append(profile)
+    
+    max_workers = max_workers or config_manager.get("automated_reports.max_parallel_reports", 4)
+    started = time.time()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups))), thread_name_prefix='report') as pool:
+        for group_results in pool.map(send_profile_reports, groups.values()):
+            results.extend(group_results)
+    
+    sent = [result['profile'] for result in results if result['success']]
+    if sent:
+        config_manager.mark_report_sent(sent)
+    failed = [result['profile'] for result in results if not result['success']]
+    if failed:
+        config_manager.mark_report_failed(failed)
+    
+    for result in results:
+        outcome = "sent" + (" (cached report)" if result['from_cache'] else "") if result['success'] else f"failed: {result['error']}"
+        log_message(f"[{result['profile']}] {outcome} in {result['seconds']:.1f}s", "SUCCESS" if result['success'] else "ERROR")
+    log_message(f"Sent {len(sent)}/{len(results)} daily reports across {len(groups)} Odoo connections in {time.time() - started:.1f}s")
+    return results
+
+def run_scheduler(retry_minutes=REPORT_RETRY_MINUTES, config_check_minutes=5):
+    """Long-running mode: sleep until the next report time, catch up on a missed one, keep Odoo warm"""
+    log_message("Starting daily report scheduler...")
+    
+    # Reloads by itself when the Settings page saves changes
+    config_manager = get_config_manager()
+    announced_run = None
+    
+    while True:
+        try:
+            now = datetime.now()
+            if config_manager.is_time_to_send_report(now, retry_minutes):
+                scheduled_for = config_manager.get_report_time_on(now)
+                log_message(f"Sending daily report scheduled for {scheduled_for.strftime('%Y-%m-%d %H:%M')}")
+                results = send_scheduled_reports(config_manager)
+                if not all(result['success'] for result in results):
+                    log_message(f"Retrying in {retry_minutes} minutes", "WARNING")
+                    time.sleep(retry_minutes * 60)
+                    continue
+            
+            if config_manager.get("automated_reports.enabled", False):
+                next_run = config_manager.get_next_report_time()
+                if next_run != announced_run:
+                    log_message(f"Next daily report at {next_run.strftime('%Y-%m-%d %H:%M')}")
+                    announced_run = next_run
+                sleep_seconds = (next_run - datetime.now()).total_seconds()
+            else:
+                log_message("Automated reports are disabled, waiting for them to be enabled", "INFO")
+                sleep_seconds = config_check_minutes * 60
+            
+            # Wake up periodically so config changes (new report time, disabled reports) apply
+            time.sleep(min(max(sleep_seconds, 1), config_check_minutes * 60))
+            
+        except KeyboardInterrupt:
+            log_message("Daily report scheduler stopped")
+            return
+        except Exception as e:
+            log_message(f"Unexpected error in scheduler: {str(e)}", "ERROR")
+            time.sleep(retry_minutes * 60)
+
 def main():
     """Main function - entry point for the script"""
+    if '--scheduler' in sys.argv:
+        run_scheduler()
+        return
+    
     log_message("Starting daily report script...")
     
     try:
         # Load configuration
-        config_manager = ConfigManager()
-        config = config_manager.get_decrypted_config()
+        config_manager = get_config_manager()
         
         # Check if automated reports are enabled
         if not config_manager.get("automated_reports.enabled", False):
             log_message("Automated reports are disabled", "INFO")
             return
         
-        # Check if it's time to send a report
+        # Check if it's time to send a report (a failed attempt waits REPORT_RETRY_MINUTES)
         if not config_manager.is_time_to_send_report():
-            log_message("Not time to send report yet", "INFO")
+            if config_manager.get_pending_report_profiles() and not config_manager.get_due_report_profiles():
+                log_message(f"Last attempt failed, retrying {REPORT_RETRY_MINUTES} minutes after it", "INFO")
+            else:
+                log_message("Not time to send report yet", "INFO")
             return
         
         log_message("Time to send daily report!")
-        
-        # Get Odoo connection details
-        odoo_config = config['automated_reports']['odoo_connection']
-        
-        if not all([odoo_config['url'], odoo_config['database'], 
-                   odoo_config['username'], odoo_config['password']]):
-            log_message("Odoo connection details not configured", "ERROR")
-            return
-        
-        # Connect to Odoo
-        connector = OdooConnector(
-            odoo_config['url'],
-            odoo_config['database'],
-            odoo_config['username'],
-            odoo_config['password']
-        )
-        
-        if not connector.connect():
-            log_message("Failed to connect to Odoo", "ERROR")
-            return
-        
-        log_message("Connected to Odoo successfully")
-        
-        # Generate report
-        report_data = generate_daily_report(connector)
-        
-        if not report_data:
-            log_message("No report data to send", "WARNING")
-            return
-        
-        # Send email
-        if send_daily_report_email(config, report_data):
-            # Mark report as sent
-            config_manager.mark_report_sent()
-            log_message("Daily report completed successfully", "SUCCESS")
-        else:
-            log_message("Failed to send daily report", "ERROR")
+        send_scheduled_reports(config_manager)
         
     except Exception as e:
         log_message(f"Unexpected error in main function: {str(e)}", "ERROR")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Single-flight request coalescing for Odoo Invoice Follow-Up Manager
+Concurrent callers asking for the same key share one in-flight call,
+and its result is reused for a short freshness window afterwards.
+Expired results are swept on every call, at most max_entries are retained, and
+results carrying more than max_result_bytes of binary data (PDFs) are only
+shared with the callers already waiting on them.
+"""
+
+import os
+import time
+import threading
+
+
+class _Call:
+    """One in-flight (or recently finished) call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls by key"""
+
+    def __init__(self, freshness_seconds=5, max_entries=128, max_result_bytes=1024 * 1024):
+        self.freshness_seconds = freshness_seconds
+        self.max_entries = max_entries
+        self.max_result_bytes = max_result_bytes
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key; concurrent and recent callers share its result"""
+        with self._lock:
+            self._sweep()
+            call = self._calls.get(key)
+
+            if call:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            if call.done.is_set():
+                print(f"♻️ Reusing fresh result for {key}")
+            else:
+                print(f"⏳ Waiting on in-flight call for {key}")
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+        finally:
+            call.finished_at = time.time()
+            with self._lock:
+                # Failures and large binary results are shared with current waiters but never cached
+                if (call.error or _binary_size(call.result) > self.max_result_bytes) and self._calls.get(key) is call:
+                    del self._calls[key]
+                else:
+                    self._sweep()
+            call.done.set()
+
+        if call.error:
+            raise call.error
+        return call.result
+
+    def forget(self, key_prefix):
+        """Drop cached results whose key starts with key_prefix (e.g. a connection id)"""
+        with self._lock:
+            for key in list(self._calls.keys()):
+                if key[:len(key_prefix)] == key_prefix and self._calls[key].done.is_set():
+                    del self._calls[key]
+
+    def _is_fresh(self, call):
+        return call.finished_at is not None and (time.time() - call.finished_at) < self.freshness_seconds
+
+    def _sweep(self):
+        """Drop expired results, then the oldest finished ones beyond max_entries (caller holds the lock)"""
+        finished = [(key, call) for key, call in self._calls.items() if call.finished_at is not None]
+        for key, call in finished:
+            if not self._is_fresh(call):
+                del self._calls[key]
+
+        excess = len(self._calls) - self.max_entries
+        if excess > 0:
+            oldest = sorted((call.finished_at, key) for key, call in finished if key in self._calls)
+            for _, key in oldest[:excess]:
+                del self._calls[key]
+
+
+def _binary_size(value, depth=0):
+    """Bytes of binary data held by a result: bytes, or bytes inside a (report dict, flag) style tuple
+
+    Lists (invoice rows) are not walked so sizing stays cheap for large datasets.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if depth >= 2:
+        return 0
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, tuple):
+        return 0
+    return sum(_binary_size(item, depth + 1) for item in value)
+
+
+# Global single-flight instance shared by the backend endpoints
+single_flight = SingleFlight(
+    freshness_seconds=float(os.environ.get('SINGLE_FLIGHT_FRESHNESS_SECONDS', 5)),
+    max_entries=int(os.environ.get('SINGLE_FLIGHT_MAX_ENTRIES', 128)),
+    max_result_bytes=int(os.environ.get('SINGLE_FLIGHT_MAX_RESULT_BYTES', 1024 * 1024)),
+)
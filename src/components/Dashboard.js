@@ -1,4 +1,4 @@
-import React, { useMemo, useState } from 'react';
+import React, { useCallback, useEffect, useMemo, useState } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { Card, CardHeader, CardTitle, CardContent } from './ui/Card';
 import { Badge } from './ui/Badge';
@@ -32,8 +32,24 @@ const getCurrencySymbol = (currencyCode) => {
   return symbols[currencyCode] || currencyCode;
 };
 
+// Aging bucket shown by each invoice list (the full table is unfiltered)
+const LIST_BUCKETS = { moderate: 'moderate', severe: 'severe', allInvoices: null };
+// Rows shown while a list is collapsed, and rows fetched per page once it is expanded
+const COLLAPSED_ROWS = { moderate: 5, severe: 5, allInvoices: 6 };
+const PAGE_SIZE = 100;
+const EMPTY_LIST = { items: [], total: 0, nextCursor: null };
+
 const Dashboard = () => {
-  const { overdueInvoices, isConnected, settings, convertCurrency, formatCurrencyAmount } = useAuth();
+  const {
+    isConnected,
+    connectionId,
+    datasetVersion,
+    summary: connectionSummary,
+    queryInvoices,
+    settings,
+    convertCurrency,
+    formatCurrencyAmount
+  } = useAuth();
   
   // State to track which categories are expanded
   const [expandedCategories, setExpandedCategories] = useState({
@@ -42,30 +58,67 @@ const Dashboard = () => {
     allInvoices: false
   });
 
+  // Totals and the loaded rows of each list, paged from /api/invoices/query
+  const [querySummary, setQuerySummary] = useState(null);
+  const [lists, setLists] = useState({ moderate: EMPTY_LIST, severe: EMPTY_LIST, allInvoices: EMPTY_LIST });
+  const summary = querySummary || connectionSummary;
+
+  const loadList = useCallback(async (category, limit, cursor = null) => {
+    const data = await queryInvoices({
+      sortBy: 'days_overdue',
+      limit,
+      cursor,
+      filters: LIST_BUCKETS[category] ? { bucket: LIST_BUCKETS[category] } : {},
+      includeSummary: category === 'allInvoices' && !cursor
+    });
+    setLists(prev => ({
+      ...prev,
+      [category]: {
+        items: cursor ? prev[category].items.concat(data.items) : data.items,
+        total: data.total,
+        nextCursor: data.nextCursor
+      }
+    }));
+    if (data.summary) setQuerySummary(data.summary);
+  }, [queryInvoices]);
+
+  // First page of every list, again whenever the dataset changes
+  useEffect(() => {
+    if (!isConnected || !connectionId) return;
+    setExpandedCategories({ moderate: false, severe: false, allInvoices: false });
+    Promise.all(Object.keys(LIST_BUCKETS).map(category => loadList(category, COLLAPSED_ROWS[category])))
+      .catch(error => console.error('Error loading dashboard invoices:', error));
+  }, [isConnected, connectionId, datasetVersion, loadList]);
+
   // Toggle function for expanding/collapsing categories
   const toggleCategory = (category) => {
+    const expanding = !expandedCategories[category];
     setExpandedCategories(prev => ({
       ...prev,
-      [category]: !prev[category]
+      [category]: expanding
     }));
+    if (expanding && lists[category].items.length < Math.min(PAGE_SIZE, lists[category].total)) {
+      loadList(category, PAGE_SIZE).catch(error => console.error('Error loading invoices:', error));
+    }
+  };
+
+  const loadMore = (category) => {
+    loadList(category, PAGE_SIZE, lists[category].nextCursor)
+      .catch(error => console.error('Error loading invoices:', error));
   };
 
   const stats = useMemo(() => {
-    if (!overdueInvoices.length) return null;
+    if (!summary || !summary.totalInvoices) return null;
 
-    const totalAmount = overdueInvoices.reduce((sum, inv) => sum + inv.amount_due, 0);
-    const avgDaysOverdue = overdueInvoices.reduce((sum, inv) => sum + inv.days_overdue, 0) / overdueInvoices.length;
-    const uniqueClients = new Set(overdueInvoices.map(inv => inv.client_name)).size;
+    const totalAmount = summary.totalAmount;
+    const avgDaysOverdue = summary.averageDaysOverdue;
+    const uniqueClients = summary.totalClients;
     
     // Get the most common currency from invoices (fallback to AED)
-    const invoiceCurrencies = overdueInvoices.map(inv => inv.currency_symbol || 'AED');
-    const mostCommonCurrency = invoiceCurrencies.reduce((acc, curr) => {
-      acc[curr] = (acc[curr] || 0) + 1;
-      return acc;
-    }, {});
-    const sourceCurrency = Object.keys(mostCommonCurrency).reduce((a, b) => 
-      mostCommonCurrency[a] > mostCommonCurrency[b] ? a : b
-    );
+    const currencyCounts = summary.currencies || {};
+    const sourceCurrency = Object.keys(currencyCounts).reduce((a, b) => 
+      currencyCounts[a] > currencyCounts[b] ? a : b
+    , 'AED');
 
     // Use the saved currency setting from context
     const displayCurrency = settings.currency || 'AED';
@@ -74,7 +127,7 @@ const Dashboard = () => {
     const convertedAmount = convertCurrency(totalAmount, sourceCurrency, displayCurrency);
 
     return {
-      totalInvoices: overdueInvoices.length,
+      totalInvoices: summary.totalInvoices,
       totalAmount,
       displayAmount: convertedAmount,
       avgDaysOverdue,
@@ -84,17 +137,7 @@ const Dashboard = () => {
       // For ORIGINAL currency, we need to track individual currencies
       isOriginalCurrency: displayCurrency === 'ORIGINAL'
     };
-  }, [overdueInvoices, settings.currency, convertCurrency]);
-
-  const groupedInvoices = useMemo(() => {
-    if (!overdueInvoices.length) return { recent: [], moderate: [], severe: [] };
-
-    return {
-      recent: overdueInvoices.filter(inv => inv.days_overdue <= 15),
-      moderate: overdueInvoices.filter(inv => inv.days_overdue > 15 && inv.days_overdue <= 30),
-      severe: overdueInvoices.filter(inv => inv.days_overdue > 30),
-    };
-  }, [overdueInvoices]);
+  }, [summary, settings.currency, convertCurrency]);
 
   const getOverdueBadge = (days) => {
     if (days <= 15) return <Badge variant="success">Recent</Badge>;
@@ -108,11 +151,27 @@ const Dashboard = () => {
     return <AlertTriangle className="h-4 w-4 text-danger-600" />;
   };
 
+  // "Load more" for an expanded list with rows left on the server
+  const renderLoadMore = (category) => {
+    const list = lists[category];
+    if (!expandedCategories[category] || !list.nextCursor) return null;
+
+    return (
+      <button
+        onClick={() => loadMore(category)}
+        className="w-full text-xs text-blue-600 hover:text-blue-800 text-center py-2 transition-colors"
+      >
+        Load more ({list.total - list.items.length} remaining)
+      </button>
+    );
+  };
+
   // Helper function to render invoice items for a category
-  const renderInvoiceItems = (invoices, category) => {
+  const renderInvoiceItems = (category) => {
+    const { items, total } = lists[category];
     const isExpanded = expandedCategories[category];
-    const displayInvoices = isExpanded ? invoices : invoices.slice(0, 5);
-    const hasMore = invoices.length > 5;
+    const displayInvoices = isExpanded ? items : items.slice(0, COLLAPSED_ROWS[category]);
+    const hasMore = total > COLLAPSED_ROWS[category];
 
     return (
       <div className="space-y-3">
@@ -157,11 +216,12 @@ const Dashboard = () => {
             ) : (
               <>
                 <ChevronDown className="h-3 w-3" />
-                +{invoices.length - 5} more
+                +{total - COLLAPSED_ROWS[category]} more
               </>
             )}
           </button>
         )}
+        {renderLoadMore(category)}
       </div>
     );
   };
@@ -178,7 +238,19 @@ const Dashboard = () => {
     );
   }
 
-  if (!overdueInvoices.length) {
+  if (!summary) {
+    return (
+      <div className="flex items-center justify-center h-64">
+        <div className="text-center">
+          <Clock className="h-12 w-12 text-gray-400 mx-auto mb-4" />
+          <h3 className="text-lg font-medium text-gray-900 mb-2">Loading Invoices</h3>
+          <p className="text-gray-500">Fetching the overdue invoice summary...</p>
+        </div>
+      </div>
+    );
+  }
+
+  if (!stats) {
     return (
       <div className="flex items-center justify-center h-64">
         <div className="text-center">
@@ -258,12 +330,12 @@ const Dashboard = () => {
             <CardTitle className="flex items-center gap-2">
               <AlertTriangle className="h-5 w-5 text-warning-600" />
               Moderate (16-30 days)
-              <Badge variant="warning">{groupedInvoices.moderate.length}</Badge>
+              <Badge variant="warning">{lists.moderate.total}</Badge>
             </CardTitle>
           </CardHeader>
           <CardContent>
-            {groupedInvoices.moderate.length > 0 ? (
-              renderInvoiceItems(groupedInvoices.moderate, 'moderate')
+            {lists.moderate.total > 0 ? (
+              renderInvoiceItems('moderate')
             ) : (
               <p className="text-sm text-gray-500 text-center py-4">No moderate overdue invoices</p>
             )}
@@ -276,12 +348,12 @@ const Dashboard = () => {
             <CardTitle className="flex items-center gap-2">
               <AlertTriangle className="h-5 w-5 text-danger-600" />
               Severe (31+ days)
-              <Badge variant="danger">{groupedInvoices.severe.length}</Badge>
+              <Badge variant="danger">{lists.severe.total}</Badge>
             </CardTitle>
           </CardHeader>
           <CardContent>
-            {groupedInvoices.severe.length > 0 ? (
-              renderInvoiceItems(groupedInvoices.severe, 'severe')
+            {lists.severe.total > 0 ? (
+              renderInvoiceItems('severe')
             ) : (
               <p className="text-sm text-gray-500 text-center py-4">No severe overdue invoices</p>
             )}
@@ -309,7 +381,7 @@ const Dashboard = () => {
                 </tr>
               </thead>
               <tbody>
-                {(expandedCategories.allInvoices ? overdueInvoices : overdueInvoices.slice(0, 6)).map((invoice) => {
+                {(expandedCategories.allInvoices ? lists.allInvoices.items : lists.allInvoices.items.slice(0, COLLAPSED_ROWS.allInvoices)).map((invoice) => {
                   // Convert amount to display currency
                   const sourceCurrency = invoice.currency_symbol || 'AED';
                   const displayCurrency = settings.currency || 'AED';
@@ -364,7 +436,7 @@ const Dashboard = () => {
                 })}
               </tbody>
             </table>
-            {overdueInvoices.length > 6 && (
+            {lists.allInvoices.total > COLLAPSED_ROWS.allInvoices && (
               <div className="mt-4 text-center">
                 <button
                   onClick={() => toggleCategory('allInvoices')}
@@ -373,15 +445,16 @@ const Dashboard = () => {
                   {expandedCategories.allInvoices ? (
                     <>
                       <ChevronUp className="h-4 w-4" />
-                      Show less ({overdueInvoices.length} total)
+                      Show less ({lists.allInvoices.total} total)
                     </>
                   ) : (
                     <>
                       <ChevronDown className="h-4 w-4" />
-                      Show all ({overdueInvoices.length - 6} more)
+                      Show all ({lists.allInvoices.total - COLLAPSED_ROWS.allInvoices} more)
                     </>
                   )}
                 </button>
+                {renderLoadMore('allInvoices')}
               </div>
             )}
           </div>
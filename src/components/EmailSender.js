@@ -1,4 +1,4 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { Card, CardHeader, CardTitle, CardDescription, CardContent } from './ui/Card';
 import Button from './ui/Button';
@@ -20,11 +20,12 @@ import {
   Edit,
   Eye as EyeIcon,
   ChevronDown,
-  ChevronRight
+  ChevronRight,
+  Loader2
 } from 'lucide-react';
 
 const EmailSender = () => {
-  const { overdueInvoices, isConnected, settings, connectionId, convertCurrency, formatCurrencyAmount } = useAuth();
+  const { overdueInvoices, invoicesLoaded, loadAllInvoices, isConnected, settings, connectionId, convertCurrency, formatCurrencyAmount } = useAuth();
   const [currentStep, setCurrentStep] = useState(1);
   const [selectedClients, setSelectedClients] = useState([]);
   const [emailConfigs, setEmailConfigs] = useState({});
@@ -40,6 +41,11 @@ const EmailSender = () => {
   const [sendResults, setSendResults] = useState(null);
   const [showSuccessMessage, setShowSuccessMessage] = useState(false);
 
+  // Client selection works on every invoice, which the dashboard no longer loads
+  useEffect(() => {
+    if (isConnected) loadAllInvoices();
+  }, [isConnected, loadAllInvoices]);
+
   // Group invoices by client
   const clientInvoices = useMemo(() => {
     const grouped = {};
@@ -525,6 +531,18 @@ Thank you for your cooperation.`
     );
   }
 
+  if (!invoicesLoaded) {
+    return (
+      <div className="flex items-center justify-center h-64">
+        <div className="text-center">
+          <Loader2 className="h-12 w-12 text-gray-400 mx-auto mb-4 animate-spin" />
+          <h3 className="text-lg font-medium text-gray-900 mb-2">Loading Invoices</h3>
+          <p className="text-gray-500">Fetching every overdue invoice for client selection...</p>
+        </div>
+      </div>
+    );
+  }
+
   if (!overdueInvoices.length) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useReducer, useEffect } from 'react';
+import React, { createContext, useContext, useReducer, useEffect, useCallback } from 'react';
 
 const AuthContext = createContext();
 
@@ -6,7 +6,11 @@ const initialState = {
   isConnected: false,
   connectionDetails: null,
   connectionId: null,
+  datasetVersion: null,
+  // Dataset totals from the backend; the full invoice list is only loaded on demand (loadAllInvoices)
+  summary: null,
   overdueInvoices: [],
+  invoicesLoaded: false,
   clientsMissingEmail: [],
   isLoading: false,
   loadingProgress: 0,
@@ -68,8 +72,11 @@ function authReducer(state, action) {
         isConnected: true,
         connectionDetails: action.payload.connectionDetails,
         connectionId: action.payload.connectionId,
-        overdueInvoices: action.payload.overdueInvoices,
-        clientsMissingEmail: action.payload.clientsMissingEmail,
+        datasetVersion: action.payload.datasetVersion || null,
+        summary: action.payload.summary || null,
+        overdueInvoices: action.payload.overdueInvoices || [],
+        invoicesLoaded: Boolean(action.payload.invoicesLoaded),
+        clientsMissingEmail: action.payload.clientsMissingEmail || [],
         isLoading: false,
         loadingProgress: 0,
         loadingMessage: '',
@@ -81,19 +88,49 @@ function authReducer(state, action) {
         isConnected: false,
         connectionDetails: null,
         connectionId: null,
+        datasetVersion: null,
+        summary: null,
         overdueInvoices: [],
+        invoicesLoaded: false,
         clientsMissingEmail: [],
         isLoading: false,
         loadingProgress: 0,
         loadingMessage: '',
         error: null,
       };
+    case 'UPDATE_SUMMARY':
+      return {
+        ...state,
+        datasetVersion: action.payload.datasetVersion || null,
+        summary: action.payload.summary,
+      };
     case 'UPDATE_INVOICES':
       return {
         ...state,
+        datasetVersion: action.payload.datasetVersion || null,
+        summary: action.payload.summary || state.summary,
         overdueInvoices: action.payload.overdueInvoices,
+        invoicesLoaded: true,
         clientsMissingEmail: action.payload.clientsMissingEmail,
       };
+    case 'APPLY_INVOICE_DELTA': {
+      // Merge only the invoices that changed since our datasetVersion
+      const invoiceId = (inv) => (inv.id !== undefined ? inv.id : inv.invoice_id);
+      const removedIds = new Set(action.payload.removed);
+      const addedIds = new Set(action.payload.added.map(invoiceId));
+      const updatedById = new Map(action.payload.updated.map(inv => [invoiceId(inv), inv]));
+      const mergedInvoices = state.overdueInvoices
+        .filter(inv => !removedIds.has(invoiceId(inv)) && !addedIds.has(invoiceId(inv)))
+        .map(inv => updatedById.get(invoiceId(inv)) || inv)
+        .concat(action.payload.added);
+      return {
+        ...state,
+        datasetVersion: action.payload.datasetVersion,
+        summary: action.payload.summary || state.summary,
+        overdueInvoices: mergedInvoices,
+        clientsMissingEmail: mergedInvoices.filter(inv => !inv.client_email),
+      };
+    }
     // Add settings actions
     case 'UPDATE_EMAIL_CONFIG':
       return {
@@ -210,6 +247,7 @@ export function AuthProvider({ children }) {
         headers: {
           'Content-Type': 'application/json',
         },
+        // Summary only: the dashboard pages through /api/invoices/query
         body: JSON.stringify(connectionDetails),
       });
 
@@ -243,8 +281,8 @@ export function AuthProvider({ children }) {
           isDemoMode: false,
           connectionDetails,
           connectionId: data.connectionId,
-          overdueInvoices: data.overdueInvoices,
-          clientsMissingEmail: data.clientsMissingEmail,
+          datasetVersion: data.datasetVersion,
+          summary: data.summary,
         },
       });
     } catch (error) {
@@ -295,7 +333,9 @@ export function AuthProvider({ children }) {
         },
         body: JSON.stringify({
           connectionId: state.connectionId,
-          ...state.connectionDetails
+          ...state.connectionDetails,
+          // Once the full list is loaded, only the invoices that changed are sent
+          ...(state.invoicesLoaded ? { sinceVersion: state.datasetVersion } : {})
         }),
       });
 
@@ -318,17 +358,95 @@ export function AuthProvider({ children }) {
       // Small delay to show completion
       await new Promise(resolve => setTimeout(resolve, 300));
       
+      if (data.delta) {
+        dispatch({
+          type: 'APPLY_INVOICE_DELTA',
+          payload: {
+            datasetVersion: data.datasetVersion,
+            summary: data.summary,
+            added: data.added,
+            updated: data.updated,
+            removed: data.removed,
+          },
+        });
+      } else if (data.overdueInvoices) {
+        dispatch({
+          type: 'UPDATE_INVOICES',
+          payload: {
+            datasetVersion: data.datasetVersion,
+            summary: data.summary,
+            overdueInvoices: data.overdueInvoices,
+            clientsMissingEmail: data.clientsMissingEmail,
+          },
+        });
+      } else {
+        dispatch({
+          type: 'UPDATE_SUMMARY',
+          payload: {
+            datasetVersion: data.datasetVersion,
+            summary: data.summary,
+          },
+        });
+      }
+    } catch (error) {
+      dispatch({ type: 'SET_ERROR', payload: error.message });
+    }
+  };
+
+  // One page of cached invoices (or client summaries) from the backend
+  const queryInvoices = useCallback(async (options) => {
+    const response = await fetch('http://localhost:8000/api/invoices/query', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ connectionId: state.connectionId, ...options }),
+    });
+
+    if (!response.ok) {
+      const error = new Error('Failed to load invoices');
+      error.status = response.status;
+      throw error;
+    }
+
+    return response.json();
+  }, [state.connectionId]);
+
+  // Full invoice list for the pages that still work on every invoice (email sender, report settings)
+  const loadAllInvoices = useCallback(async () => {
+    if (state.invoicesLoaded || !state.connectionId) return;
+
+    try {
+      let invoices = [];
+      let cursor = null;
+      let data;
+      for (;;) {
+        try {
+          data = await queryInvoices({ limit: 1000, sortBy: 'client', sortOrder: 'asc', cursor });
+        } catch (error) {
+          if (error.status !== 409 || !cursor) throw error;
+          // The dataset changed while paging: start over on the new version
+          invoices = [];
+          cursor = null;
+          continue;
+        }
+        invoices = invoices.concat(data.items);
+        cursor = data.nextCursor;
+        if (!cursor) break;
+      }
+
       dispatch({
         type: 'UPDATE_INVOICES',
         payload: {
-          overdueInvoices: data.overdueInvoices,
-          clientsMissingEmail: data.clientsMissingEmail,
+          datasetVersion: data.datasetVersion,
+          overdueInvoices: invoices,
+          clientsMissingEmail: invoices.filter(inv => !inv.client_email),
         },
       });
     } catch (error) {
       dispatch({ type: 'SET_ERROR', payload: error.message });
     }
-  };
+  }, [state.invoicesLoaded, state.connectionId, queryInvoices]);
 
   // Settings management functions
   const updateEmailConfig = (emailConfig) => {
@@ -413,6 +531,8 @@ export function AuthProvider({ children }) {
     connectToOdoo,
     disconnect,
     refreshInvoices,
+    queryInvoices,
+    loadAllInvoices,
     updateEmailConfig,
     updateCurrency,
     updateSecuritySettings,
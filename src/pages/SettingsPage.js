@@ -69,6 +69,7 @@ const SettingsPage = () => {
     disconnect, 
     refreshInvoices,
     overdueInvoices,
+    loadAllInvoices,
     settings,
     updateEmailConfig,
     updateCurrency,
@@ -127,6 +128,11 @@ const SettingsPage = () => {
   const [isTestingAutomatedReport, setIsTestingAutomatedReport] = useState(false);
   const [showSaveSuccess, setShowSaveSuccess] = useState(false);
 
+  // Report previews and test sends summarize every invoice, which the dashboard no longer loads
+  useEffect(() => {
+    if (isConnected) loadAllInvoices();
+  }, [isConnected, loadAllInvoices]);
+
   // Sync local state with context settings
   useEffect(() => {
     setEmailConfig(settings.emailConfig);
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared state store for the Odoo Invoice Follow-Up Manager backend
+Connection metadata and invoice caches live here so every server worker
+sees the same data. MemoryStore is the single-process stand-in; SQLiteStore
+is shared by all worker processes on the host.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class StateStore:
+    """Key-value store interface: subclasses implement bytes get/set/delete/keys"""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def keys(self, prefix=''):
+        raise NotImplementedError
+
+    def get_json(self, key, default=None):
+        """Load a JSON value (transparently decompressing values saved with compress=True)"""
+        raw = self.get(key)
+        if raw is None:
+            return default
+        if raw[:1] == b'z':
+            raw = zlib.decompress(raw[1:])
+        else:
+            raw = raw[1:]
+        return json.loads(raw)
+
+    def set_json(self, key, value, compress=False):
+        """Save a JSON value; compress large values such as invoice lists"""
+        raw = json.dumps(value, default=str, separators=(',', ':')).encode('utf-8')
+        if compress:
+            self.set(key, b'z' + zlib.compress(raw, 6))
+        else:
+            self.set(key, b'j' + raw)
+
+
+class MemoryStore(StateStore):
+    """In-process store (only suitable for a single worker)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def keys(self, prefix=''):
+        with self._lock:
+            return [key for key in self._data if key.startswith(prefix)]
+
+
+class SQLiteStore(StateStore):
+    """SQLite-backed store shared by every worker process on the host"""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        connection.commit()
+
+    def _connection(self):
+        """One SQLite connection per thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO kv (key, value, updated_at) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(value), time.time())
+        )
+        connection.commit()
+
+    def delete(self, key):
+        connection = self._connection()
+        connection.execute("DELETE FROM kv WHERE key = ?", (key,))
+        connection.commit()
+
+    def keys(self, prefix=''):
+        # Escape LIKE wildcards in the prefix
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        rows = self._connection().execute("SELECT key FROM kv WHERE key LIKE ? ESCAPE '\\'", (pattern,)).fetchall()
+        return [row[0] for row in rows]
+
+
+def create_state_store(backend=None, path=None):
+    """Create the store selected by STATE_STORE ('memory' or 'sqlite') and STATE_STORE_PATH"""
+    backend = backend or os.environ.get('STATE_STORE', 'memory')
+    if backend == 'sqlite':
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'backend_state.sqlite3')
+        path = path or os.environ.get('STATE_STORE_PATH', default_path)
+        print(f"🗄️ Using SQLite state store at {path}")
+        return SQLiteStore(path)
+    if backend != 'memory':
+        print(f"⚠️ Unknown STATE_STORE '{backend}', using in-memory state store")
+    return MemoryStore()
@@ -0,0 +1,23 @@
+import os
+import sys
+import importlib
+from pathlib import Path
+
+import pytest
+
+# Root-level modules (job_manager, state_store, core, ...) and the backend package
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'backend'))
+
+
+@pytest.fixture(scope='session')
+def backend(tmp_path_factory):
+    """backend/run_backend.py with its data directories in a temporary folder"""
+    data_dir = tmp_path_factory.mktemp('backend')
+    for name in ('OVERDUE_HISTORY_DIR', 'REPORT_CACHE_DIR', 'CACHE_SNAPSHOT_DIR'):
+        os.environ[name] = str(data_dir / name.lower())
+    os.environ['BACKGROUND_REFRESH_SECONDS'] = '0'
+    os.environ['CACHE_SNAPSHOT_SECONDS'] = '0'
+    os.environ['STATE_STORE'] = 'memory'
+    return importlib.import_module('run_backend')
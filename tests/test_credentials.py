@@ -0,0 +1,26 @@
+"""Several gunicorn workers only run when they can share Odoo credentials"""
+
+import pytest
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+from credentials import create_credentials_cipher, production_workers
+
+fernet = pytest.importorskip('cryptography.fernet')
+
+
+def test_single_worker_without_key(monkeypatch):
+    monkeypatch.delenv('CREDENTIALS_KEY', raising=False)
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    assert production_workers() == 1
+    assert create_credentials_cipher() is None
+
+
+def test_workers_with_key(monkeypatch):
+    key = fernet.Fernet.generate_key().decode()
+    monkeypatch.setenv('CREDENTIALS_KEY', key)
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    assert production_workers() == 2
+
+    token = create_credentials_cipher().encrypt(b'secret')
+    assert b'secret' not in token
+    assert create_credentials_cipher(key).decrypt(token) == b'secret'
@@ -0,0 +1,21 @@
+"""The demo dataset is stable, so its datasetVersion/ETag lets clients revalidate it"""
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+from demo_data import generate_demo_data
+
+
+def test_demo_data_is_stable():
+    assert generate_demo_data() == generate_demo_data()
+    assert generate_demo_data(seed=1) != generate_demo_data(seed=2)
+
+
+def test_demo_etag_revalidates(backend):
+    client = backend.app.test_client()
+    first = client.get('/api/demo/data')
+    second = client.get('/api/demo/data')
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.get_json()['datasetVersion'] == second.get_json()['datasetVersion']
+
+    revalidated = client.get('/api/demo/data', headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
@@ -0,0 +1,32 @@
+"""Email threads stay consistent when report groups send in parallel"""
+
+import json
+import threading
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+from core import EmailThreadManager
+
+
+def test_parallel_thread_updates(tmp_path):
+    thread_file = tmp_path / 'email_threads.json'
+    manager = EmailThreadManager(str(thread_file))
+    clients = [(f"Client {number}", f"c{number}@example.com") for number in range(20)]
+    sends_per_client = 5
+
+    def send(client_name, client_email):
+        for _ in range(sends_per_client):
+            manager.get_thread_id(client_name, client_email, 'Prezlab FZ LLC')
+            manager.update_thread_subject(client_name, client_email, 'Overdue invoices', 'Prezlab FZ LLC')
+
+    workers = [threading.Thread(target=send, args=client) for client in clients]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    saved = json.loads(thread_file.read_text(encoding='utf-8'))
+    assert len(saved) == len(clients)
+    # The first send creates the thread (count 0), every later one increments it
+    assert all(thread['message_count'] == sends_per_client - 1 for thread in saved.values())
+    assert EmailThreadManager(str(thread_file)).threads == manager.threads
+    assert list(tmp_path.iterdir()) == [thread_file]
@@ -0,0 +1,80 @@
+"""Invoice exports carry the client email whether rows come from the cache or straight from Odoo"""
+
+import csv
+import io
+import json
+
+import pytest
+
+import conftest  # noqa: F401 (adds the repo root and backend/ to sys.path)
+from core import OdooConnector
+
+PARTNERS = [
+    {'id': 7, 'name': 'Acme', 'email': 'billing@acme.example', 'currency_id': False},
+    {'id': 8, 'name': 'No Email Ltd', 'email': False, 'currency_id': False},
+]
+INVOICES = [
+    {'id': 1, 'name': 'PLFZ/2026/0001', 'partner_id': [7, 'Acme'], 'amount_total': 100.0, 'amount_residual': 100.0,
+     'invoice_date': '2026-01-01', 'invoice_date_due': '2026-02-01', 'currency_id': [2, 'USD'],
+     'company_id': [1, 'Prezlab FZ LLC'], 'invoice_origin': 'S1'},
+    {'id': 2, 'name': 'PLFZ/2026/0002', 'partner_id': [8, 'No Email Ltd'], 'amount_total': 50.0, 'amount_residual': 20.0,
+     'invoice_date': '2026-01-05', 'invoice_date_due': '2026-02-05', 'currency_id': [2, 'USD'],
+     'company_id': [1, 'Prezlab FZ LLC'], 'invoice_origin': ''},
+]
+
+
+class FakeOdoo(OdooConnector):
+    """OdooConnector answering JSON-RPC calls from canned records instead of a server"""
+
+    def _post_rpc(self, url, payload):
+        params = payload['params']
+        model, method = params.get('model'), params.get('method')
+        if url.endswith('/web/session/authenticate'):
+            return None, {'result': {'uid': 2}}
+        if (model, method) == ('account.move', 'search_read'):
+            last_id = next((value for field, _, value in params['args'][0] if field == 'id'), 0)
+            return None, {'result': [invoice for invoice in INVOICES if invoice['id'] > last_id]}
+        if (model, method) == ('res.partner', 'read'):
+            return None, {'result': [partner for partner in PARTNERS if partner['id'] in params['args'][0]]}
+        if (model, method) == ('res.currency', 'read'):
+            return None, {'result': [{'id': 2, 'name': 'USD', 'symbol': '$'}]}
+        return None, {'result': []}
+
+
+def connect(backend, connection_id):
+    connector = FakeOdoo('http://odoo.test', 'db', 'user', 'secret')
+    connector.connect()
+    backend.active_connections[connection_id] = {'connector': connector, 'connection_details': {}}
+    return connector
+
+
+def export(backend, connection_id, export_format):
+    response = backend.app.test_client().get(f'/api/invoices/export?connectionId={connection_id}&format={export_format}')
+    assert response.status_code == 200
+    return response.headers['X-Export-Source'], response.get_data(as_text=True)
+
+
+def emails_by_invoice(export_format, body):
+    if export_format == 'csv':
+        rows = list(csv.DictReader(io.StringIO(body)))
+    else:
+        rows = [json.loads(line) for line in body.splitlines()]
+    return {row['invoice_number']: row['client_email'] for row in rows}
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'ndjson'])
+def test_odoo_export_includes_client_email(backend, export_format):
+    connect(backend, f'odoo-{export_format}')
+    source, body = export(backend, f'odoo-{export_format}', export_format)
+    assert source == 'odoo'
+    assert emails_by_invoice(export_format, body) == {'PLFZ/2026/0001': 'billing@acme.example', 'PLFZ/2026/0002': ''}
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'ndjson'])
+def test_cached_export_includes_client_email(backend, export_format):
+    connector = connect(backend, f'cache-{export_format}')
+    connection = backend.active_connections.peek(f'cache-{export_format}')
+    backend._index_invoices(connection, connector.get_overdue_invoice_rows())
+    source, body = export(backend, f'cache-{export_format}', export_format)
+    assert source == 'cache'
+    assert emails_by_invoice(export_format, body) == {'PLFZ/2026/0001': 'billing@acme.example', 'PLFZ/2026/0002': ''}
@@ -0,0 +1,41 @@
+"""Concurrent queries share one index's memoized views safely"""
+
+import threading
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+import invoice_index
+from invoice_index import build_invoice_index
+
+
+def make_invoices(count):
+    return [{'id': i, 'client_name': f'Client {i % 7}', 'company_name': f'Company {i % 3}',
+             'amount_due': float(i), 'amount_total': float(i), 'days_overdue': i % 45,
+             'client_email': '' if i % 5 else f'c{i}@example.com'} for i in range(1, count + 1)]
+
+
+def test_concurrent_queries_respect_cache_size(monkeypatch):
+    monkeypatch.setattr(invoice_index, 'QUERY_CACHE_SIZE', 4)
+    index = build_invoice_index(make_invoices(200))
+    views = [(mode, sort_by, company)
+             for mode in ('invoices', 'clients')
+             for sort_by in ('amount', 'days_overdue', 'client')
+             for company in (None, 'Company 0', 'Company 1')]
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(200):
+                mode, sort_by, company = views[(i + offset) % len(views)]
+                index.query(mode=mode, sort_by=sort_by, company=company)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(index._query_cache) <= 4
+    assert index.query(sort_by='amount')[0]['amount_due'] == 200.0
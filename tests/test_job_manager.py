@@ -0,0 +1,131 @@
+"""Jobs submitted in one worker process are visible to the others through the SQLite state store"""
+
+import sys
+import json
+import subprocess
+import textwrap
+import time
+
+from conftest import ROOT
+from job_manager import MAX_JOB_EVENTS, JobManager
+from state_store import SQLiteStore
+
+
+def start_job_in_other_process(store_path, steps, step_seconds):
+    """Submit a job in a separate process; returns (process, job id) once the job is queued"""
+    code = textwrap.dedent(f"""
+        import sys, time
+        sys.path.insert(0, {str(ROOT)!r})
+        from job_manager import JobManager
+        from state_store import SQLiteStore
+
+        def work(progress_callback):
+            for step in range({steps}):
+                time.sleep({step_seconds})
+                progress_callback(f"step {{step + 1}}", (step + 1) * 100 / {steps})
+            return {{'invoices': {steps}}}
+
+        manager = JobManager()
+        manager.use_store(SQLiteStore({str(store_path)!r}))
+        job = manager.submit('fetch', work, description='db')
+        print(job.id, flush=True)
+        while not job.is_finished:
+            time.sleep(0.05)
+    """)
+    process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, text=True)
+    job_id = process.stdout.readline().split()[-1]
+    return process, job_id
+
+
+def test_job_status_and_result_from_another_process(tmp_path):
+    store_path = tmp_path / 'state.sqlite3'
+    process, job_id = start_job_in_other_process(store_path, steps=2, step_seconds=0.05)
+    process.wait(timeout=30)
+
+    manager = JobManager()
+    manager.use_store(SQLiteStore(store_path))
+    job = manager.get(job_id)
+
+    assert job is not None
+    info = job.to_dict()
+    assert info['jobId'] == job_id
+    assert info['status'] == 'completed'
+    assert info['progress'] == 100.0
+    assert info['result'] == {'invoices': 2}
+    assert [summary['jobId'] for summary in manager.list_jobs()] == [job_id]
+    assert 'result' not in manager.list_jobs()[0]
+
+
+def test_job_events_stream_from_another_process(tmp_path):
+    store_path = tmp_path / 'state.sqlite3'
+    process, job_id = start_job_in_other_process(store_path, steps=3, step_seconds=0.3)
+
+    manager = JobManager()
+    manager.use_store(SQLiteStore(store_path))
+    assert manager.get(job_id) is not None
+
+    messages = list(manager.stream_events(job_id, heartbeat=1))
+    process.wait(timeout=30)
+
+    events = [message for message in messages if not message.startswith(':')]
+    event_types = [line.split(': ', 1)[1] for message in events for line in message.splitlines() if line.startswith('event: ')]
+    assert event_types[:2] == ['status', 'status']
+    assert event_types.count('progress') == 3
+    assert event_types[-1] == 'result'
+    assert json.loads(events[-1].splitlines()[2][len('data: '):]) == {'invoices': 3}
+
+    # Resuming after the last event id sends nothing more for a finished job
+    last_id = int(events[-1].splitlines()[0][len('id: '):])
+    assert list(manager.stream_events(job_id, last_event_id=last_id, heartbeat=1)) == []
+
+
+def test_unknown_job(tmp_path):
+    manager = JobManager()
+    manager.use_store(SQLiteStore(tmp_path / 'state.sqlite3'))
+    assert manager.get('missing') is None
+
+
+def wait_until_published(store, job):
+    """Wait until the job's finished status has reached the store"""
+    deadline = time.time() + 10
+    while not (store.get_json(f"job:{job.id}") or {}).get('finishedAt') and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_status_record_references_result_and_events_are_capped(tmp_path):
+    store = SQLiteStore(tmp_path / 'state.sqlite3')
+    manager = JobManager()
+    manager.use_store(store)
+
+    def work(progress_callback):
+        for step in range(MAX_JOB_EVENTS * 2):
+            progress_callback(f"step {step}", step / 2)
+        return {'invoices': ['row'] * 50}
+
+    job = manager.submit('fetch', work)
+    wait_until_published(store, job)
+
+    record = store.get_json(f"job:{job.id}")
+    assert 'result' not in record['job']
+    assert store.get_json(record['resultKey']) == {'invoices': ['row'] * 50}
+    assert len(store.keys(f"job_event:{job.id}:")) == MAX_JOB_EVENTS
+    assert len(job.events) == MAX_JOB_EVENTS
+
+    other_worker = JobManager()
+    other_worker.use_store(store)
+    stored = other_worker.get(job.id)
+    assert stored.to_dict()['result'] == {'invoices': ['row'] * 50}
+    assert stored.events[-1] == job.events[-1]
+    assert [event['id'] for event in stored.events] == [event['id'] for event in job.events]
+
+
+def test_prune_drops_expired_jobs_from_store(tmp_path):
+    store = SQLiteStore(tmp_path / 'state.sqlite3')
+    manager = JobManager(retention_seconds=0)
+    manager.use_store(store)
+    job = manager.submit('fetch', lambda progress_callback: {'ok': True})
+    wait_until_published(store, job)
+
+    manager.prune()
+    assert manager.get(job.id) is None
+    assert store.keys('job') == []
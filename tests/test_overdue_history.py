@@ -0,0 +1,79 @@
+"""Overdue history snapshots read back exactly, join day over day, and are fetched once a day"""
+
+import time
+
+import conftest  # noqa: F401 (adds the repo root and backend/ to sys.path)
+from overdue_history import OverdueHistoryStore, history_source
+
+
+def invoice(invoice_id, amount_due, days_overdue, client='Acme'):
+    return {'id': invoice_id, 'invoice_number': f'INV/{invoice_id:04d}', 'partner_id': 7, 'client_name': client,
+            'company_name': 'Prezlab FZ LLC', 'currency_symbol': '$', 'amount_total': 500.0,
+            'amount_due': amount_due, 'due_date': '2026-01-01', 'days_overdue': days_overdue}
+
+
+def test_snapshot_round_trip(tmp_path):
+    history = OverdueHistoryStore(str(tmp_path))
+    invoices = [invoice(1, 100.125, 3), invoice(2, 0.5, 40, client='Ünïcode Ltd'), invoice(3, 250.0, 0, client='')]
+    assert history.record('http://odoo.test/', 'db', invoices, dataset_version='v1', day='2026-03-01') > 0
+    # Same dataset version, same day: not rewritten
+    assert history.record('http://odoo.test', 'db', invoices, dataset_version='v1', day='2026-03-01') == 0
+
+    source = history_source('http://odoo.test', 'db')
+    snapshot = history.load(source, '2026-03-01')
+    for name, values in snapshot.items():
+        assert values == [row[name] for row in invoices], name
+    assert history.load(source, '2026-03-01', columns=('id',)) == {'id': [1, 2, 3]}
+    assert history.load(source, '2026-03-02') is None
+
+    trend = history.aging_trend(source)
+    assert [day['day'] for day in trend] == ['2026-03-01']
+    assert trend[0]['invoiceCount'] == 3 and trend[0]['totalAmount'] == 350.62
+    assert history.has_snapshot(source, '2026-03-01') and not history.has_snapshot(source, '2026-03-02')
+
+
+def test_day_over_day(tmp_path):
+    history = OverdueHistoryStore(str(tmp_path))
+    history.record('http://odoo.test', 'db', [invoice(1, 100.0, 10), invoice(2, 50.0, 0), invoice(3, 75.0, 29)], day='2026-03-01')
+    history.record('http://odoo.test', 'db', [invoice(1, 60.0, 11), invoice(2, 50.0, 1), invoice(3, 75.0, 31),
+                                             invoice(4, 20.0, 0)], day='2026-03-03')
+    source = history_source('http://odoo.test', 'db')
+
+    assert history.day_over_day(source, '2026-03-01') is None
+    delta = history.day_over_day(source, '2026-03-03')
+    assert delta['previousDay'] == '2026-03-01'
+    assert [row['id'] for row in delta['added']] == [4]
+    assert [row['id'] for row in delta['newlyOverdue']] == [2]
+    assert delta['resolved'] == []
+    assert [(row['id'], row['previous_bucket'], row['bucket']) for row in delta['escalated']] == [(3, 'moderate', 'severe')]
+    assert [(row['id'], row['previous_amount_due']) for row in delta['changed']] == [(1, 100.0)]
+    assert (delta['previousTotalAmount'], delta['totalAmount']) == (225.0, 205.0)
+
+    history.record('http://odoo.test', 'db', [invoice(2, 50.0, 2)], day='2026-03-04')
+    assert sorted(row['id'] for row in history.day_over_day(source, '2026-03-04')['resolved']) == [1, 3, 4]
+
+
+class CountingConnector:
+    url = 'http://history.test'
+    database = 'db'
+
+    def __init__(self):
+        self.row_fetches = 0
+
+    def get_overdue_dataset_version(self):
+        return f"v{self.row_fetches}"
+
+    def get_overdue_invoice_rows(self):
+        self.row_fetches += 1
+        return [invoice(1, 10.0, 5)]
+
+
+def test_backend_records_history_once_per_day(backend):
+    connector = CountingConnector()
+    for _ in range(3):
+        backend._record_history('history-conn', connector)
+        deadline = time.time() + 5
+        while backend._history_writes and time.time() < deadline:
+            time.sleep(0.01)
+    assert connector.row_fetches == 1
+    assert backend.overdue_history.has_snapshot(history_source(connector.url, connector.database))
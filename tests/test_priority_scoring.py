@@ -0,0 +1,43 @@
+"""numpy and pure-Python priority ranking pick the same clients in the same order"""
+
+import random
+
+import pytest
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+import priority_scoring
+from priority_scoring import PriorityScorer
+
+pytest.importorskip('numpy')
+
+
+def make_summaries(count, seed):
+    rng = random.Random(seed)
+    # Few distinct values so many clients tie, including at the k-th place
+    return [{'clientName': f'Client {i}', 'maxDays': rng.choice([10, 20, 40]), 'avgDays': rng.choice([5, 15]),
+             'totalAmount': rng.choice([0, 1000, 5000])} for i in range(count)]
+
+
+def ranking(monkeypatch, numpy_available, summaries, k, weights=None):
+    monkeypatch.setattr(priority_scoring, 'NUMPY_AVAILABLE', numpy_available)
+    # Fresh list so columns cached by the other implementation are not reused
+    return [(score, summary['clientName']) for score, summary in PriorityScorer(weights).top(list(summaries), k)]
+
+
+@pytest.mark.parametrize('k', [None, 0, 1, 7, 50, 199, 500])
+def test_numpy_and_heapq_rank_identically(monkeypatch, k):
+    summaries = make_summaries(200, seed=k or 0)
+    with_numpy = ranking(monkeypatch, True, summaries, k)
+    without_numpy = ranking(monkeypatch, False, summaries, k)
+
+    assert [name for _, name in with_numpy] == [name for _, name in without_numpy]
+    assert [score for score, _ in with_numpy] == pytest.approx([score for score, _ in without_numpy])
+    assert len(with_numpy) == (200 if k is None else min(k, 200))
+
+
+def test_ties_keep_input_order(monkeypatch):
+    summaries = [{'clientName': name, 'maxDays': 30, 'avgDays': 10, 'totalAmount': 100} for name in 'abcde']
+    summaries.insert(2, {'clientName': 'top', 'maxDays': 90, 'avgDays': 10, 'totalAmount': 100})
+    for numpy_available in (True, False):
+        assert [name for _, name in ranking(monkeypatch, numpy_available, summaries, 3)] == ['top', 'a', 'b']
+        assert [name for _, name in ranking(monkeypatch, numpy_available, summaries, 3, {'maxDays': 0})] == ['a', 'b', 'top']
@@ -0,0 +1,31 @@
+"""A failed refresh keeps the cached dataset instead of publishing an empty one"""
+
+import conftest  # noqa: F401 (adds the repo root and backend/ to sys.path)
+from test_invoice_export import FakeOdoo
+
+
+class FailingOdoo(FakeOdoo):
+    """Authenticated connector whose invoice search starts failing"""
+
+    failing = False
+
+    def _post_rpc(self, url, payload):
+        if self.failing and payload['params'].get('model') == 'account.move':
+            return None, {'error': {'message': 'Odoo is down'}}
+        return super()._post_rpc(url, payload)
+
+
+def test_failed_refresh_keeps_cache(backend):
+    connector = FailingOdoo('http://odoo.test', 'db', 'user', 'secret')
+    connector.connect()
+    backend.active_connections['refresh-fail'] = {'connector': connector, 'connection_details': {}}
+    connection = backend.active_connections.peek('refresh-fail')
+    invoice_index = backend._store_invoices('refresh-fail', connector.get_overdue_invoice_rows())
+    assert len(invoice_index) == 2
+
+    connector.failing = True
+    response = backend.app.test_client().post('/api/odoo/refresh', json={'connectionId': 'refresh-fail'})
+
+    assert response.status_code == 502
+    assert connection['invoice_index'] is invoice_index
+    assert len(backend.state_store.get_json('invoices:refresh-fail')) == 2
@@ -0,0 +1,45 @@
+"""A failed scheduled report waits for the retry delay instead of retrying on every Task Scheduler run"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+from config_manager import ConfigManager, REPORT_RETRY_MINUTES
+
+
+@pytest.fixture
+def config_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = ConfigManager('reports.json')
+    manager.update_automated_reports_config({'enabled': True, 'report_time': '09:00'})
+    return manager
+
+
+def test_failed_attempt_backs_off(config_manager):
+    failed_at = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    assert config_manager.is_time_to_send_report(failed_at)
+
+    config_manager.mark_report_failed(now=failed_at)
+    # Reloaded from disk, as a new Task Scheduler run would
+    reloaded = ConfigManager('reports.json')
+    for manager in (config_manager, reloaded):
+        assert not manager.is_time_to_send_report(failed_at + timedelta(minutes=1))
+        assert not manager.is_time_to_send_report(failed_at + timedelta(minutes=REPORT_RETRY_MINUTES - 1))
+        assert manager.is_time_to_send_report(failed_at + timedelta(minutes=REPORT_RETRY_MINUTES))
+
+    config_manager.mark_report_sent()
+    assert not config_manager.is_time_to_send_report(failed_at + timedelta(minutes=REPORT_RETRY_MINUTES))
+
+
+def test_backoff_is_per_profile(config_manager):
+    config_manager.update_automated_reports_config({'profiles': [{'name': 'finance'}, {'name': 'sales'}]})
+    failed_at = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+
+    config_manager.mark_report_failed(['finance'], now=failed_at)
+    due = config_manager.get_due_report_profiles(failed_at + timedelta(minutes=1))
+    assert [profile['name'] for profile in due] == ['sales']
+
+    config_manager.mark_report_sent(['sales'])
+    assert not config_manager.is_time_to_send_report(failed_at + timedelta(minutes=1))
+    assert config_manager.is_time_to_send_report(failed_at + timedelta(minutes=REPORT_RETRY_MINUTES))
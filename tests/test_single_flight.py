@@ -0,0 +1,68 @@
+"""Single-flight results are only reused while fresh and never pile up"""
+
+import threading
+import time
+
+import conftest  # noqa: F401 (adds the repo root to sys.path)
+from single_flight import SingleFlight
+
+
+def counter():
+    calls = []
+
+    def fn(value=None):
+        calls.append(value)
+        return value if value is not None else len(calls)
+    return calls, fn
+
+
+def test_result_reused_while_fresh_then_expires():
+    flight = SingleFlight(freshness_seconds=0.05)
+    calls, fn = counter()
+    assert flight.do('k', fn) == 1
+    assert flight.do('k', fn) == 1
+    time.sleep(0.06)
+    assert flight.do('k', fn) == 2
+    assert len(calls) == 2
+
+
+def test_expired_results_swept_by_other_keys():
+    flight = SingleFlight(freshness_seconds=0.05)
+    _, fn = counter()
+    for key in range(10):
+        flight.do(key, fn)
+    time.sleep(0.06)
+    flight.do('other', fn)
+    assert list(flight._calls) == ['other']
+
+
+def test_retained_entries_capped():
+    flight = SingleFlight(freshness_seconds=60, max_entries=3)
+    _, fn = counter()
+    for key in range(10):
+        flight.do(key, fn)
+    assert sorted(flight._calls) == [7, 8, 9]
+
+
+def test_large_binary_result_shared_with_waiters_only():
+    flight = SingleFlight(freshness_seconds=60, max_result_bytes=10)
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def render():
+        started.set()
+        release.wait(1)
+        return ({'pdf_content': b'x' * 100}, False)
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('pdf', render)))
+    leader.start()
+    started.wait(1)
+    waiter = threading.Thread(target=lambda: results.append(flight.do('pdf', render)))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(1)
+    waiter.join(1)
+
+    assert len(results) == 2 and results[0] is results[1]
+    assert 'pdf' not in flight._calls